@@ -1,46 +1,303 @@
+import math
+import threading
+
+import Core.Cons.ScoreTypes as ScoreTypes
+import Core.ModelSnapshot as ModelSnapshot
+import Database.Helpers.IndexKeyHelper as IndexKeyHelper
 from Core.Error import AnalyzeError
 from Data.Dataset import WorldDS, WordDS
-from Database.Index.BTree.BTree import BTree
+from Database.DBManager import DBManager
 from Database.Index.BTree.BTreeNode import BTreeNode50String
 
+try:
+    import numpy
+except ImportError:
+    # Without NumPy the batches are scored in Python, with the same scores
+    numpy = None
+
+# Model of infer_emotion, loaded in the first use
+_model = None
+_model_lock = threading.Lock()
+
+# Smaller batches are scored in Python even with NumPy, the arrays cost more than the scores
+_NUMPY_MIN_BATCH = 64
+
+# Scores given by the model of infer_emotion, the log scores don't become zero in long texts
+_score_type = ScoreTypes.LOG
+# Laplace smoothing added to the word counts, zero uses only the words that appeared in both classes
+_smoothing = 0
+
 
 # Classes: positivo, negativo
 # True for negative and False for positive
 # Using Naive Bayes algorithm
 def infer_emotion(tweet: object) -> (bool, float, float):
-    world_ds = WorldDS.load(0)
+    return get_model().infer(tweet.get_filtered_words())
+
+
+# Return the (negative, positive score, negative score) of each tweet, in the order of the tweets
+# Each distinct word of the batch is searched in the model only once
+def infer_emotion_batch(tweets: list) -> list:
+    return get_model().infer_batch([tweet.get_filtered_words() for tweet in tweets])
+
+
+# Return the model shared by the process
+def get_model():
+    global _model
+
+    with _model_lock:
+        if _model is None:
+            _model = NaiveBayesModel(_score_type, _smoothing)
+
+    return _model
+
+
+# Load the trained data again, call after a training so the next inferences use it
+# A model not loaded yet already reads the new data in its first use
+def reload_model():
+    with _model_lock:
+        model = _model
+
+    if model is not None:
+        model.reload()
+
+
+# Build the model again from the tables and save its snapshot, call after a training
+# The next processes load the snapshot instead of reading the tables
+def export_model():
+    global _model
+
+    model = NaiveBayesModel(_score_type, _smoothing, use_snapshot=False)
+
+    with _model_lock:
+        old_model = _model
+        _model = model
+
+    # The old snapshot is released before it's replaced
+    if old_model is not None:
+        old_model.close()
+
+    if model.trained:
+        model.save_snapshot()
+
+
+# Change the scores of infer_emotion, the saved scores must be rebuilt to be compared with the new ones
+def set_scoring(score_type: str, smoothing=0):
+    global _model, _score_type, _smoothing
+
+    _verify_score_type(score_type)
+
+    with _model_lock:
+        _score_type = score_type
+        _smoothing = smoothing
+        _model = None
+
+
+def _verify_score_type(score_type: str):
+    if score_type not in (ScoreTypes.LINEAR, ScoreTypes.LOG):
+        raise AnalyzeError.UnknownScoreType('Unknown score type: ' + str(score_type))
+
+
+# Keeps the probabilities of all trained words in memory, read from the tables in one scan or mapped from the snapshot
+# Each inference only combines the probabilities of its words, without reading the database
+# The log scores add the logarithms of the probabilities, the linear ones multiply the probabilities
+class NaiveBayesModel:
+
+    def __init__(self, score_type=ScoreTypes.LOG, smoothing=0, use_snapshot=True):
+        _verify_score_type(score_type)
+
+        self.score_type = score_type
+        self.smoothing = smoothing
+        self.use_snapshot = use_snapshot
+        # Probabilities (positive, negative) of each word in the scale of the scores, a dict or the snapshot
+        self.word_probabilities = {}
+        self.positive_prior = 0
+        self.negative_prior = 0
+        self.total_positive = 0
+        self.total_negative = 0
+        self.trained = False
+        self.reload()
+
+    # Read the world and the words of the training
+    # The snapshot is used if it was saved with the same scores and training, otherwise the tables are read
+    def reload(self):
+        world_ds = WorldDS.load(0)
+
+        if self.use_snapshot and self._load_snapshot(world_ds):
+            return
 
-    if world_ds is not None and world_ds.total_positive != 0 and world_ds.total_negative != 0:
-        words = tweet.get_filtered_words()
-        word_dataset_text_id = BTree('word_dataset_text_id', BTreeNode50String, WordDS, WordDS)
+        word_probabilities = {}
+        positive_prior = 0
+        negative_prior = 0
+        trained = world_ds is not None and world_ds.total_positive != 0 and world_ds.total_negative != 0
 
-        mult_sum_pos = 1
-        mult_sum_neg = 1
+        if trained:
+            for word_ds in DBManager(WordDS).find_all():
+                # The index finds the word with the smallest id, the same one is kept
+                if word_ds.text not in word_probabilities:
+                    word_probabilities[word_ds.text] = self._get_word_probabilities(word_ds, world_ds)
 
-        # Calcula probabilidade de cada palavra ser negativa ou positiva
-        for word in words:
-            word_ds = word_dataset_text_id.find_first_or_default(word)
+            world_total = world_ds.total_positive + world_ds.total_negative
+            positive_prior = self._scale(world_ds.total_positive/world_total)
+            negative_prior = self._scale(world_ds.total_negative/world_total)
 
-            # Apenas considera palavras com aparições
-            if word_ds is not None:
-                # Probabilidade da palavra (positivo e negativo): Vezes que apareceu sobre total de frases analisadas
-                p_positive = word_ds.n_positive/world_ds.total_positive
-                p_negative = word_ds.n_negative/world_ds.total_negative
+        # The inferences keep using the old data until all the new data is read
+        self.word_probabilities = {word: probabilities for word, probabilities in word_probabilities.items()
+                                   if probabilities is not None}
+        self.positive_prior = positive_prior
+        self.negative_prior = negative_prior
+        self.total_positive = world_ds.total_positive if trained else 0
+        self.total_negative = world_ds.total_negative if trained else 0
+        self.trained = trained
 
-                # Produtório das probabilidades
-                if p_positive != 0 and p_negative != 0:
-                    mult_sum_pos = mult_sum_pos * p_positive
-                    mult_sum_neg = mult_sum_neg * p_negative
+    # Save the probabilities of the model, the model must be trained and read from the tables
+    def save_snapshot(self):
+        ModelSnapshot.write_snapshot(self.score_type, float(self.smoothing), self.positive_prior, self.negative_prior,
+                                     self.total_positive, self.total_negative, self.word_probabilities)
 
-        # Finally multiply with the total probability
-        world_total = world_ds.total_positive + world_ds.total_negative
-        mult_sum_pos = mult_sum_pos * (world_ds.total_positive/world_total)
-        mult_sum_neg = mult_sum_neg * (world_ds.total_negative/world_total)
+    # Release the snapshot of the model, the model can't be used after
+    def close(self):
+        if isinstance(self.word_probabilities, ModelSnapshot.ModelSnapshot):
+            self.word_probabilities.close()
 
-        if mult_sum_pos >= mult_sum_neg:
-            return False, mult_sum_pos, mult_sum_neg
+    # Use the saved snapshot, return False if there isn't one for the scores and the training in the world
+    def _load_snapshot(self, world_ds: WorldDS) -> bool:
+        if world_ds is None:
+            return False
+
+        snapshot = ModelSnapshot.open_snapshot()
+
+        if snapshot is None:
+            return False
+
+        if snapshot.score_type != self.score_type or snapshot.smoothing != self.smoothing \
+                or snapshot.total_positive != world_ds.total_positive \
+                or snapshot.total_negative != world_ds.total_negative:
+            snapshot.close()
+            return False
+
+        self.word_probabilities = snapshot
+        self.positive_prior = snapshot.positive_prior
+        self.negative_prior = snapshot.negative_prior
+        self.total_positive = snapshot.total_positive
+        self.total_negative = snapshot.total_negative
+        self.trained = True
+
+        return True
+
+    # Return if the words are negative and the positive and negative scores
+    def infer(self, words: list) -> (bool, float, float):
+        if not self.trained:
+            raise AnalyzeError.TryingToInferWithoutWorldData("World dataset without any data!")
+
+        words_probabilities = [self.word_probabilities.get(IndexKeyHelper.normalize_key(BTreeNode50String, word))
+                               for word in words]
+
+        return self._get_emotion([probabilities for probabilities in words_probabilities if probabilities is not None])
+
+    # Return the (negative, positive score, negative score) of the words of each text, the same of infer
+    def infer_batch(self, texts_words: list) -> list:
+        if not self.trained:
+            raise AnalyzeError.TryingToInferWithoutWorldData("World dataset without any data!")
+
+        # Position of each distinct word of the batch in the probabilities, None for the words out of the model
+        word_positions = {}
+        batch_probabilities = []
+        # The text and the position in the probabilities of each word found in the model
+        texts = []
+        positions = []
+
+        for text, words in enumerate(texts_words):
+            for word in words:
+                if word not in word_positions:
+                    probabilities = self.word_probabilities.get(IndexKeyHelper.normalize_key(BTreeNode50String, word))
+                    word_positions[word] = len(batch_probabilities) if probabilities is not None else None
+
+                    if probabilities is not None:
+                        batch_probabilities.append(probabilities)
+
+                position = word_positions[word]
+
+                if position is not None:
+                    texts.append(text)
+                    positions.append(position)
+
+        if numpy is not None and len(texts_words) >= _NUMPY_MIN_BATCH:
+            return self._get_emotions_with_numpy(len(texts_words), batch_probabilities, texts, positions)
+
+        texts_probabilities = [[] for _ in texts_words]
+
+        for text, position in zip(texts, positions):
+            texts_probabilities[text].append(batch_probabilities[position])
+
+        return [self._get_emotion(words_probabilities) for words_probabilities in texts_probabilities]
+
+    # Return the emotion of the probabilities of the words of a text
+    def _get_emotion(self, words_probabilities: list) -> (bool, float, float):
+        if self.score_type == ScoreTypes.LOG:
+            positive_score = 0
+            negative_score = 0
+
+            # Added one by one in the order of the words, like the sums of the batches
+            for probabilities in words_probabilities:
+                positive_score = positive_score + probabilities[0]
+                negative_score = negative_score + probabilities[1]
+
+            positive_score = positive_score + self.positive_prior
+            negative_score = negative_score + self.negative_prior
+        else:
+            positive_score = 1
+            negative_score = 1
+
+            # Produtório das probabilidades das palavras com aparições
+            for probabilities in words_probabilities:
+                positive_score = positive_score * probabilities[0]
+                negative_score = negative_score * probabilities[1]
+
+            # Finally multiply with the total probability
+            positive_score = positive_score * self.positive_prior
+            negative_score = negative_score * self.negative_prior
+
+        return positive_score < negative_score, positive_score, negative_score
+
+    # Return the emotions of all texts combining the probabilities of their words in arrays
+    # The values of each text are added or multiplied in the order of its words, like _get_emotion
+    def _get_emotions_with_numpy(self, n_texts: int, batch_probabilities: list, texts: list, positions: list) -> list:
+        texts = numpy.array(texts, dtype=numpy.intp)
+        words_probabilities = numpy.array(batch_probabilities, dtype=numpy.float64).reshape(-1, 2)[
+            numpy.array(positions, dtype=numpy.intp)]
+
+        if self.score_type == ScoreTypes.LOG:
+            positive_scores = numpy.bincount(texts, weights=words_probabilities[:, 0], minlength=n_texts) \
+                + self.positive_prior
+            negative_scores = numpy.bincount(texts, weights=words_probabilities[:, 1], minlength=n_texts) \
+                + self.negative_prior
         else:
-            return True, mult_sum_pos, mult_sum_neg
+            positive_scores = numpy.ones(n_texts)
+            negative_scores = numpy.ones(n_texts)
+            numpy.multiply.at(positive_scores, texts, words_probabilities[:, 0])
+            numpy.multiply.at(negative_scores, texts, words_probabilities[:, 1])
+            positive_scores = positive_scores * self.positive_prior
+            negative_scores = negative_scores * self.negative_prior
+
+        return list(zip((positive_scores < negative_scores).tolist(), positive_scores.tolist(),
+                        negative_scores.tolist()))
+
+    # Return the (positive, negative) probabilities of the word in the scale of the scores
+    # Without smoothing a word that didn't appear in both classes isn't used, it returns None
+    def _get_word_probabilities(self, word_ds: WordDS, world_ds: WorldDS):
+        # Probabilidade da palavra (positivo e negativo): Vezes que apareceu sobre total de frases analisadas
+        # The smoothing counts each word as present and as absent in the smoothing number of extra texts of each class
+        p_positive = (word_ds.n_positive + self.smoothing)/(world_ds.total_positive + 2 * self.smoothing)
+        p_negative = (word_ds.n_negative + self.smoothing)/(world_ds.total_negative + 2 * self.smoothing)
+
+        if p_positive == 0 or p_negative == 0:
+            return None
+
+        return self._scale(p_positive), self._scale(p_negative)
+
+    def _scale(self, probability: float) -> float:
+        if self.score_type == ScoreTypes.LOG:
+            return math.log(probability)
 
-    else:
-        raise AnalyzeError.TryingToInferWithoutWorldData("World dataset without any data!")
\ No newline at end of file
+        return probability
@@ -0,0 +1,5 @@
+# Scale of the scores given by the model, the same scale must be used by all scores saved in the indexes
+# Linear: product of the probabilities, it becomes zero in texts with a few words
+LINEAR = 'linear'
+# Log: sum of the logarithms of the probabilities, always negative and ordered like the linear scores
+LOG = 'log'
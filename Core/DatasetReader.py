@@ -0,0 +1,137 @@
+import csv
+import io
+import itertools
+
+from Core.Error import TrainError
+
+# Rows of a batch when the size isn't given
+BATCH_SIZE = 256
+# Bytes of a shard when the size isn't given, the rows of a shard are read in memory at once
+SHARD_SIZE = 4 * 1024 * 1024
+
+
+# Read the (emotion, text) of each row of a csv dataset, a batch of rows at a time, so the memory doesn't grow with the
+# size of the file. The columns are positions or, in files with a header, the names in the header
+# The dialect and the format params are the ones of the csv module, quoted fields may have commas and line breaks
+class DatasetReader:
+
+    # The rows before the init row are skipped, the header isn't counted
+    # Rows with more than n_columns fields have the commas of the last column in the text, like the old line splits
+    # A shard (start, end) of read_shards reads only the rows in these bytes, its columns must be positions
+    def __init__(self, file_name: str, encoding: str, emotion_column, text_column, n_columns=None, init_row=0,
+                 dialect='excel', shard=None, **format_params):
+        if shard is None:
+            self.file = open(file_name, encoding=encoding, newline='')
+        else:
+            self.file = io.StringIO(_read_bytes(file_name, *shard).decode(encoding), newline='')
+
+        self.file_name = file_name
+        self.encoding = encoding
+        self.reader = csv.reader(self.file, dialect, **format_params)
+        self.n_columns = n_columns
+        self.init_row = init_row
+        self.skipped_rows = 0
+        self.header_rows = 0
+
+        if isinstance(emotion_column, str) or isinstance(text_column, str):
+            self.header_rows = 1
+            header = next(self.reader, [])
+
+            try:
+                self.emotion_position = self._get_position(header, emotion_column)
+                self.text_position = self._get_position(header, text_column)
+            except TrainError.ColumnNotInDatasetHeader:
+                self.close()
+                raise
+        else:
+            self.emotion_position = emotion_column
+            self.text_position = text_column
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    # Return lists with the (emotion, text) of the next rows, the last one may be smaller
+    # Rows without the columns, like blank lines, are skipped and counted in skipped_rows
+    def read_batches(self, batch_size=BATCH_SIZE):
+        rows = itertools.islice(self.reader, self.init_row, None)
+        batch = self._read_batch(rows, batch_size)
+
+        while batch:
+            yield batch
+            batch = self._read_batch(rows, batch_size)
+
+    def _read_batch(self, rows, batch_size: int) -> list:
+        batch = []
+
+        for row in rows:
+            if self.n_columns is not None and len(row) > self.n_columns:
+                row = row[:self.n_columns - 1] + [self.reader.dialect.delimiter.join(row[self.n_columns - 1:])]
+
+            if len(row) > max(self.emotion_position, self.text_position):
+                batch.append((row[self.emotion_position], row[self.text_position]))
+
+                if len(batch) == batch_size:
+                    break
+            else:
+                self.skipped_rows = self.skipped_rows + 1
+
+        return batch
+
+    # Return the (start, end) bytes of shards of the rows after the init row, each one with whole rows
+    # The rows are found counting the quotes of the lines, a line break inside quotes doesn't end a row. Use encodings
+    # where the quote is a single byte that isn't part of other chars, like utf-8 and latin-1
+    # If the byte of the first row is given, like the end of a shard, the shards start there without skipping rows
+    def read_shards(self, shard_size=SHARD_SIZE, start=None):
+        dialect = self.reader.dialect
+        quote = dialect.quotechar.encode(self.encoding) \
+            if dialect.quotechar is not None and dialect.quoting != csv.QUOTE_NONE else None
+        skip_rows = self.header_rows + self.init_row if start is None else 0
+        rows = 0
+        quotes = 0
+        position = start if start is not None else 0
+        shard_start = position
+
+        with open(self.file_name, 'rb') as file:
+            file.seek(position)
+
+            for line in file:
+                position = position + len(line)
+
+                if quote is not None:
+                    quotes = quotes + line.count(quote)
+
+                # Escaped quotes are doubled, the row only ends after a closed quote
+                if quotes % 2 == 0:
+                    quotes = 0
+                    rows = rows + 1
+
+                    if rows <= skip_rows:
+                        shard_start = position
+                    elif position - shard_start >= shard_size:
+                        yield shard_start, position
+                        shard_start = position
+
+        if position > shard_start:
+            yield shard_start, position
+
+    @staticmethod
+    def _get_position(header: list, column) -> int:
+        if not isinstance(column, str):
+            return column
+
+        if column not in header:
+            raise TrainError.ColumnNotInDatasetHeader('Column ' + column + ' isn\'t in the header of the dataset')
+
+        return header.index(column)
+
+
+def _read_bytes(file_name: str, start: int, end: int) -> bytes:
+    with open(file_name, 'rb') as file:
+        file.seek(start)
+        return file.read(end - start)
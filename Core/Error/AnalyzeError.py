@@ -5,4 +5,9 @@ class Error(Exception):
 
 class TryingToInferWithoutWorldData(Error):
     """First you need to train the program with some data!"""
-    pass
\ No newline at end of file
+    pass
+
+
+class UnknownScoreType(Error):
+    """The score type must be one of ScoreTypes"""
+    pass
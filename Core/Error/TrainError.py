@@ -0,0 +1,8 @@
+class Error(Exception):
+    """TrainError"""
+    pass
+
+
+class ColumnNotInDatasetHeader(Error):
+    """The columns given by name must be in the first row of the dataset"""
+    pass
@@ -0,0 +1,168 @@
+import array
+import bisect
+import functools
+import struct
+import sys
+
+import Database.Helpers.DirHelper as DirHelper
+import Database.Helpers.FileHandleHelper as FileHandleHelper
+from Database.Cons.Encode import DEFAULT_STR_ENCONDE
+
+# Changes in the format of the snapshot must change the version, snapshots of other versions are ignored
+SNAPSHOT_VERSION = 1
+_MAGIC = b'NBMS'
+# Magic, version, score type, smoothing, positive and negative priors, world totals, number of words and size of the
+# vocabulary, padded so the arrays after it are aligned. All numbers are little endian
+_HEADER = struct.Struct('<4sq8sdddqqqq4x')
+_OFFSET_TYPE = 'q'
+_VALUE_TYPE = 'd'
+
+_SNAPSHOT_DIR = 'NaiveBayesModel'
+_SNAPSHOT_FILE = 'snapshot'
+# The snapshot is written in this file first, it replaces the snapshot at the end
+_REWRITE_FILE = 'snapshot_rewrite'
+
+# Words searched in a snapshot that are remembered with their probabilities
+_WORD_CACHE_SIZE = 100000
+
+
+# FUNCTIONS
+
+# Return the file of the snapshot
+def get_snapshot_file() -> str:
+    return DirHelper.get_database_file(_SNAPSHOT_DIR, _SNAPSHOT_FILE)
+
+
+# Write the snapshot of a model, replacing the saved one
+# The probabilities are (positive, negative) of each word in the scale of the scores
+# A process with the old snapshot open must close it first, the open snapshots block the replace in some systems
+def write_snapshot(score_type: str, smoothing: float, positive_prior: float, negative_prior: float,
+                   total_positive: int, total_negative: int, word_probabilities: dict):
+    entries = sorted((word.encode(DEFAULT_STR_ENCONDE), probabilities)
+                     for word, probabilities in word_probabilities.items())
+    offsets = array.array(_OFFSET_TYPE, [0])
+    values = array.array(_VALUE_TYPE)
+
+    for word, probabilities in entries:
+        offsets.append(offsets[-1] + len(word))
+        values.extend(probabilities)
+
+    vocabulary = b''.join(word for word, _ in entries)
+    header = _HEADER.pack(_MAGIC, SNAPSHOT_VERSION, score_type.encode(DEFAULT_STR_ENCONDE), smoothing,
+                          positive_prior, negative_prior, total_positive, total_negative, len(entries), len(vocabulary))
+
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+        values.byteswap()
+
+    DirHelper.create_database_directory(_SNAPSHOT_DIR)
+    rewrite_file = DirHelper.get_database_file(_SNAPSHOT_DIR, _REWRITE_FILE)
+    DirHelper.create_file(rewrite_file)
+    FileHandleHelper.clear_file(rewrite_file)
+
+    storage = FileHandleHelper.get_file(rewrite_file)
+    storage.write_at(0, header + offsets.tobytes() + values.tobytes() + vocabulary)
+    storage.sync()
+
+    DirHelper.replace_file(rewrite_file, get_snapshot_file())
+
+
+# Return the saved snapshot, None if there isn't one or it's from other version
+def open_snapshot():
+    snapshot_file = get_snapshot_file()
+
+    if not DirHelper.file_exists(snapshot_file):
+        return None
+
+    buffer = FileHandleHelper.map_file(snapshot_file)
+
+    if len(buffer) < _HEADER.size:
+        return None
+
+    magic, version = _HEADER.unpack_from(buffer)[:2]
+
+    if magic != _MAGIC or version != SNAPSHOT_VERSION:
+        return None
+
+    snapshot = ModelSnapshot(buffer)
+
+    # A snapshot cut by a failed write has less bytes than its header says
+    if not snapshot.complete:
+        snapshot.close()
+        return None
+
+    return snapshot
+
+
+def _cast(view: memoryview, typecode: str):
+    if sys.byteorder == 'little':
+        return view.cast(typecode)
+
+    values = array.array(typecode, view.tobytes())
+    values.byteswap()
+    return values
+
+
+# Snapshot of a model mapped from the file, only the pages of the searched words are read
+# The words are sorted, each search is a binary search in the vocabulary and its result is remembered
+# Use get like in a dict of the probabilities of the words
+class ModelSnapshot:
+
+    def __init__(self, buffer):
+        (_, _, score_type, self.smoothing, self.positive_prior, self.negative_prior, self.total_positive,
+         self.total_negative, self.words_count, vocabulary_size) = _HEADER.unpack_from(buffer)
+        self.score_type = score_type.rstrip(b'\0').decode(DEFAULT_STR_ENCONDE)
+
+        offsets_start = _HEADER.size
+        values_start = offsets_start + (self.words_count + 1) * struct.calcsize(_OFFSET_TYPE)
+        vocabulary_start = values_start + self.words_count * 2 * struct.calcsize(_VALUE_TYPE)
+        self.complete = len(buffer) == vocabulary_start + vocabulary_size
+
+        self.buffer = buffer
+        self.view = memoryview(buffer)
+
+        if self.complete:
+            self.offsets = _cast(self.view[offsets_start:values_start], _OFFSET_TYPE)
+            self.values = _cast(self.view[values_start:vocabulary_start], _VALUE_TYPE)
+            self.vocabulary = self.view[vocabulary_start:]
+
+        # The same words appear again in most texts
+        self.get = functools.lru_cache(maxsize=_WORD_CACHE_SIZE)(self._find)
+
+    # Return the (positive, negative) probabilities of the word, None if it isn't in the snapshot
+    def _find(self, word: str):
+        key = word.encode(DEFAULT_STR_ENCONDE)
+        position = bisect.bisect_left(_Vocabulary(self), key)
+
+        if position < self.words_count and self.get_word(position) == key:
+            return self.values[2 * position], self.values[2 * position + 1]
+
+        return None
+
+    def get_word(self, position: int) -> bytes:
+        return self.vocabulary[self.offsets[position]:self.offsets[position + 1]].tobytes()
+
+    # Release the map of the file, the snapshot can't be used after
+    def close(self):
+        self.get.cache_clear()
+
+        if self.complete:
+            for view in (self.offsets, self.values, self.vocabulary):
+                if isinstance(view, memoryview):
+                    view.release()
+
+        self.view.release()
+        self.buffer = None
+
+
+# Sorted words of a snapshot, read only when the binary search compares them
+class _Vocabulary:
+
+    def __init__(self, snapshot: ModelSnapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return self.snapshot.words_count
+
+    def __getitem__(self, position: int) -> bytes:
+        return self.snapshot.get_word(position)
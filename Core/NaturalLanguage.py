@@ -1,38 +1,72 @@
+import functools
 import re
+import threading
+
 import nltk
 from nltk.corpus import stopwords
 from nltk.stem.lancaster import LancasterStemmer
+from nltk.tag import PerceptronTagger
 
 _TAG_LIST = ['JJ', 'JJR ', 'JJS', 'NN', 'NNS', 'RB', 'RBR', 'RBS', 'VB', 'VBD', 'VBG', 'VBN', 'VBP', 'VBZ']
 # Changes in this value implies in BTree changes, some BTree that uses this function are adapted for 50 chars
 _WORD_MAX_SIZE = 50
+# Stems kept by each normalizer, the same words appear again in most texts
+_STEM_CACHE_SIZE = 100000
+_INVALID_CHARS = re.compile('[^a-z0-9- ]+')
+
+# Normalizer of filter_text, created in the first use
+_normalizer = None
+_normalizer_lock = threading.Lock()
 
 
 def filter_text(text: str) -> str:
-    try:
-        text = re.sub('[^a-z0-9- ]+', '', text.lower().rstrip())
+    return get_normalizer().filter_text(text)
+
+
+# Return the normalizer shared by the process
+def get_normalizer():
+    global _normalizer
+
+    with _normalizer_lock:
+        if _normalizer is None:
+            _normalizer = TextNormalizer()
+
+    return _normalizer
+
+
+# Keeps the stopwords, the stemmer and the tagger loaded, so each text only pays for its own words
+# Many texts can be tagged in one call with filter_texts, each result is the same of filter_text
+class TextNormalizer:
+
+    def __init__(self):
+        try:
+            self._load()
+        except LookupError:
+            nltk.download('stopwords')
+            nltk.download('punkt')
+            self._load()
 
-        sw = set(stopwords.words('english'))
-        result = ''
-        words = list(filter(lambda x: x != '', text.split(' ')))
+        # The stems of the words seen last are remembered
+        self.stem = functools.lru_cache(maxsize=_STEM_CACHE_SIZE)(self.stemmer.stem)
 
-        st = LancasterStemmer()  # Normalize the words
+    def _load(self):
+        self.stopwords = set(stopwords.words('english'))
+        self.stemmer = LancasterStemmer()  # Normalize the words
+        # The tagger of nltk.pos_tag, that loads it again in each call
+        self.tagger = PerceptronTagger()
 
-        # Filter all words based in their types using the list _TAG_LIST
-        for token in nltk.pos_tag(words):
-            text = token[0]
-            if len(text) <= _WORD_MAX_SIZE:
-                text = text[:_WORD_MAX_SIZE]
+    def filter_text(self, text: str) -> str:
+        return self._join_stems(self.tagger.tag(self._get_words(text)))
 
-            if token[1] in _TAG_LIST and token[0] not in sw:
-                if result == '':
-                    result = st.stem(text)
-                else:
-                    result = result + ' ' + st.stem(token[0])
+    # Return the filtered text of each text, in the same order
+    def filter_texts(self, texts) -> list:
+        return [self._join_stems(tokens) for tokens in self.tagger.tag_sents([self._get_words(text) for text in texts])]
 
-        return result
+    @staticmethod
+    def _get_words(text: str) -> list:
+        text = _INVALID_CHARS.sub('', text.lower().rstrip())
+        return [word for word in text.split(' ') if word != '']
 
-    except LookupError:
-        nltk.download('stopwords')
-        nltk.download('punkt')
-        return filter_text(text)
+    # Filter all words based in their types using the list _TAG_LIST
+    def _join_stems(self, tokens) -> str:
+        return ' '.join([self.stem(word) for word, tag in tokens if tag in _TAG_LIST and word not in self.stopwords])
@@ -0,0 +1,142 @@
+import collections
+import itertools
+import multiprocessing
+import os
+import signal
+
+from Core import NaturalLanguage
+
+# Texts sent to a worker at a time, big enough to pay the transfer between the processes
+CHUNK_SIZE = 256
+# Chunks waiting in each worker, so the workers don't stop while the results are read and the memory stays bounded
+_CHUNKS_PER_WORKER = 2
+# Seconds between the checks of the stop request while a result is waited
+_STOP_CHECK_TIME = 0.5
+
+# Normalizer of the worker process, created once when the worker starts
+_worker_normalizer = None
+
+
+# Return the number of workers used when it isn't given: one for each core
+def get_default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+# Filter the texts in worker processes, each one with its own normalizer
+# The results come in the order of the texts. With one worker the texts are filtered in this process, without a pool
+# With a stop request the results stop when the stop is asked, the ones not returned yet are discarded
+class TextPreprocessor:
+
+    def __init__(self, workers=None, chunk_size=CHUNK_SIZE, stop_request=None):
+        self.workers = workers if workers is not None else get_default_workers()
+        self.chunk_size = chunk_size
+        self.stop_request = stop_request
+        self.pool = None
+
+        if self.workers > 1:
+            self.pool = multiprocessing.Pool(self.workers, initializer=_start_worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # Stop the workers, the texts being filtered are discarded
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    # Return the filtered text of each text, read from the iterable only while there is space for more chunks
+    def filter_texts(self, texts):
+        for _, filtered_texts in self.filter_batches(_get_chunks(texts, self.chunk_size)):
+            yield from filtered_texts
+
+    # Return each batch with the filtered texts of its items, the next batches are filtered while one is used
+    # The batches are read only while there is space for more of them, get_text returns the text of an item
+    def filter_batches(self, batches, get_text=None):
+        return self._apply(_filter_chunk, batches, lambda batch: _get_texts(batch, get_text))
+
+    # Return the result of the function for each item, run by the workers in the order of the items
+    # The function must be picklable, like the functions of a module, and gets the normalizer with get_normalizer
+    def map(self, function, items):
+        for _, result in self._apply(function, items, lambda item: item):
+            yield result
+
+    # Return each item with the result of the function for get_arg(item)
+    def _apply(self, function, items, get_arg):
+        if self.pool is None:
+            for item in items:
+                yield item, function(get_arg(item))
+            return
+
+        pending = collections.deque()
+
+        for item in items:
+            pending.append((item, self.pool.apply_async(function, (get_arg(item),))))
+
+            if len(pending) >= self.workers * _CHUNKS_PER_WORKER:
+                item, result = pending.popleft()
+
+                if not self._wait(result):
+                    return
+
+                yield item, result.get()
+
+        while pending:
+            item, result = pending.popleft()
+
+            if not self._wait(result):
+                return
+
+            yield item, result.get()
+
+    # Wait the result of a worker, return False if the stop is asked before it's ready
+    # A worker killed by a signal never returns its result, the stop request ends the wait
+    def _wait(self, result) -> bool:
+        while not result.ready():
+            if self.stop_request is not None and self.stop_request.is_requested():
+                return False
+
+            result.wait(_STOP_CHECK_TIME)
+
+        return True
+
+
+# Return the normalizer of the process, the one of the worker in the worker processes
+def get_normalizer():
+    if _worker_normalizer is not None:
+        return _worker_normalizer
+
+    return NaturalLanguage.get_normalizer()
+
+
+def _start_worker():
+    global _worker_normalizer
+
+    # The main process decides when to stop, a SIGINT sent to all the processes must not kill a worker with its chunk
+    # The handlers of the main process aren't used, the pool stops the workers with SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    _worker_normalizer = NaturalLanguage.TextNormalizer()
+
+
+def _filter_chunk(texts: list) -> list:
+    return get_normalizer().filter_texts(texts)
+
+
+def _get_texts(batch: list, get_text) -> list:
+    return batch if get_text is None else [get_text(item) for item in batch]
+
+
+# Split the texts in lists of the chunk size, the last one may be smaller
+def _get_chunks(texts, chunk_size: int):
+    texts = iter(texts)
+    chunk = list(itertools.islice(texts, chunk_size))
+
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(texts, chunk_size))
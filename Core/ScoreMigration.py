@@ -0,0 +1,82 @@
+import itertools
+
+from Core import Analyze
+from Data.Dataset import ScoresInfo
+from Data.Twitter import Tweet
+from Database.DBManager import DBManager
+from Database.Index import IndexRegistry
+from Database.Index.BTree.BTree import BTree
+from Database.Index.BTree.BTreeNode import BTreeNodeFloat, BTreeNodeInt, BTreeNode50String
+from Twitter.TwitterCore import TwitterCore
+
+# Tweets scored in each call of the model
+_RESCORE_BATCH = 4096
+
+
+# Rebuild the saved scores if they were given by other scores than the ones of infer_emotion
+# Databases without a scores info have the linear scores of the first versions
+def migrate_if_needed():
+    model = Analyze.get_model()
+    scores_info = ScoresInfo.load()
+
+    if scores_info is not None and scores_info.scale == model.score_type \
+            and scores_info.smoothing == model.smoothing:
+        return
+
+    # Without training there are no saved tweets to score, the verification runs again in the next start
+    if model.trained:
+        rebuild_scores(model)
+
+
+# Give new scores to all saved tweets and rebuild the score indexes with them
+# The tweets keep their emotion, so they stay in the same trees of most positive and most negative tweets
+def rebuild_scores(model: Analyze.NaiveBayesModel):
+    tweet_manager = DBManager(Tweet)
+    scores = {}
+
+    tweets = tweet_manager.find_all()
+    batch = list(itertools.islice(tweets, _RESCORE_BATCH))
+
+    while batch:
+        emotions = model.infer_batch([tweet.get_filtered_words() for tweet in batch])
+
+        for tweet, (_, positive_score, negative_score) in zip(batch, emotions):
+            tweet.positive_score = positive_score
+            tweet.negative_score = negative_score
+            tweet_manager.save(tweet)
+            scores[tweet.id] = (tweet.negative, tweet.positive_score, tweet.negative_score)
+
+        batch = list(itertools.islice(tweets, _RESCORE_BATCH))
+
+    bt_tweet_positive_score = IndexRegistry.get_btree('tweet_positive_score', BTreeNodeFloat, Tweet, Tweet)
+    bt_tweet_positive_score.bulk_load([(positive_score, tweet_id)
+                                       for tweet_id, (_, positive_score, _) in scores.items()])
+
+    bt_tweet_negative_score = IndexRegistry.get_btree('tweet_negative_score', BTreeNodeFloat, Tweet, Tweet)
+    bt_tweet_negative_score.bulk_load([(negative_score, tweet_id)
+                                       for tweet_id, (_, _, negative_score) in scores.items()])
+
+    bt_core_tweets = IndexRegistry.get_btree('twitter_core_tweets', BTreeNodeInt, TwitterCore, Tweet)
+
+    for data_name, core_id in BTree.read_saved_entries('twitter_core_data_name', BTreeNode50String, TwitterCore,
+                                                        TwitterCore):
+        # The tweets of a core are in its tree more than once
+        core_scores = [(tweet_id, scores[tweet_id]) for tweet_id in set(bt_core_tweets.find_contents(core_id))
+                       if tweet_id in scores]
+
+        bt_core_most_negative = IndexRegistry.get_btree('twitter_core_most_negative_' + data_name,
+                                                        BTreeNodeFloat, TwitterCore, Tweet)
+        bt_core_most_negative.bulk_load([(negative_score, tweet_id)
+                                         for tweet_id, (negative, _, negative_score) in core_scores if negative])
+
+        bt_core_most_positive = IndexRegistry.get_btree('twitter_core_most_positive_' + data_name,
+                                                        BTreeNodeFloat, TwitterCore, Tweet)
+        bt_core_most_positive.bulk_load([(positive_score, tweet_id)
+                                         for tweet_id, (negative, positive_score, _) in core_scores if not negative])
+
+    tweet_manager.sync()
+
+    scores_info = ScoresInfo()
+    scores_info.scale = model.score_type
+    scores_info.smoothing = float(model.smoothing)
+    scores_info.db_save()
@@ -0,0 +1,48 @@
+import signal
+import threading
+
+try:
+    import msvcrt
+except ImportError:
+    # Out of the Windows console only the signals ask to stop
+    msvcrt = None
+
+# Signals that ask a long work to stop, the work ends where it can stop without losing data
+STOP_SIGNALS = (signal.SIGINT, signal.SIGTERM)
+
+
+# Remember if a stop signal was received while it's entered, the work asks is_requested where it can stop
+# The old handlers are restored at the exit. A second SIGINT interrupts the work at once, like without the request
+# In the Windows console the "C" key also asks to stop
+class StopRequest:
+
+    def __init__(self, signals=STOP_SIGNALS):
+        self.signals = signals
+        self.requested = False
+        self.old_handlers = {}
+
+    def __enter__(self):
+        # The handlers can only be changed in the main thread, the other ones only use the key
+        if threading.current_thread() is threading.main_thread():
+            for signal_number in self.signals:
+                self.old_handlers[signal_number] = signal.signal(signal_number, self._handle)
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for signal_number, old_handler in self.old_handlers.items():
+            signal.signal(signal_number, old_handler)
+
+        self.old_handlers = {}
+
+    def is_requested(self) -> bool:
+        if not self.requested and msvcrt is not None and msvcrt.kbhit():
+            self.requested = msvcrt.getch() in (b'c', b'C')
+
+        return self.requested
+
+    def _handle(self, signal_number, frame):
+        if self.requested and signal_number == signal.SIGINT:
+            raise KeyboardInterrupt
+
+        self.requested = True
@@ -1,71 +1,377 @@
+import functools
+import operator
+import os
 import time
-import msvcrt
+from Core import Analyze
+from Core import Preprocessing
+from Core import TrainCheckpoint
+from Core.DatasetReader import DatasetReader, SHARD_SIZE
+from Core.Preprocessing import TextPreprocessor
+from Core.StopRequest import StopRequest
+import Database.Helpers.IndexKeyHelper as IndexKeyHelper
 from Data.Dataset import TweetDS, WordDS, WorldDS
+from Database.DBManager import DBManager
+from Database.Index.BTree.BTreeNode import BTreeNode280String, BTreeNode50String
 
-DATA_SET_LOCATION = '.\\Dataset\\'
+DATA_SET_LOCATION = os.path.join('.', 'Dataset')
+# New tweets counted in memory before the counts are saved
+FLUSH_ROWS = 10000
 
 
 class Train:
 
-    def read_train_data(self, filename: str, enconding: str, n_columns: int, emotion_position: int, text_position: int,
+    # The dataset is read as a csv file in shards of whole rows, the texts of each batch of rows are filtered by the
+    # workers of the preprocessing, one for each core if the number isn't given
+    # The positions of the columns can be names of the header, the dialect and format params are the ones of csv
+    # The counts are added in memory and saved every flush_rows new tweets, at the end of a shard, with a checkpoint of
+    # the byte after it. A training of the same dataset starts after the checkpoint, if it's after the init line
+    # SIGINT and SIGTERM stop the training after saving the shards counted, the rows of the shard being read are read
+    # again in the next training. Use encodings where the quote is a single byte, see DatasetReader.read_shards
+    def read_train_data(self, filename: str, enconding: str, n_columns: int, emotion_position, text_position,
                         init_line: int,
-                        negative_emotion_value, consider_only_negative=False):
+                        negative_emotion_value, consider_only_negative=False, workers=None, dialect='excel',
+                        flush_rows=FLUSH_ROWS, shard_size=SHARD_SIZE, **format_params):
+        file_name = os.path.join(DATA_SET_LOCATION, filename)
+        chunk = TrainingChunk(file_name)
+        init_line, position = chunk.get_start(init_line)
 
-        with open(DATA_SET_LOCATION + filename, encoding=enconding) as dataset:
+        with StopRequest() as stop_request, \
+                DatasetReader(file_name, enconding, emotion_position, text_position, n_columns, init_line, dialect,
+                              **format_params) as dataset, \
+                TextPreprocessor(workers, stop_request=stop_request) as preprocessor:
             start_time = time.time()
-            lines = dataset.readlines()
-            data_count = init_line
-            world_ds = WorldDS.load(0)
+            shards_counts = self._count_shards(file_name, enconding, dataset, n_columns, dialect, format_params,
+                                               preprocessor, stop_request, negative_emotion_value,
+                                               consider_only_negative, dataset.read_shards(shard_size, position))
 
-            if world_ds is None:
-                world_ds = WorldDS()
+            self._save_counts(chunk, shards_counts, init_line, position, flush_rows, stop_request)
 
-            for line in range(init_line, len(lines)):
-                print("Lendo linha: " + str(data_count))
-                data_count = data_count + 1
-                data = lines[line].split(',', n_columns - 1)
+        # The inferences use the new words from now on, the next processes load them from the snapshot
+        Analyze.export_model()
 
-                text = data[text_position].replace('"', '')
-                negative = data[emotion_position].replace('"', '') == negative_emotion_value
-                tweet_ds = TweetDS.load_by_text(data[text_position])
+        end_time = time.time()
+        print('Finishing training in: ' + str(end_time - start_time) + ' seconds')
 
-                # Just use new tweets texts
-                if tweet_ds is None and (not consider_only_negative or negative):
-                    tweet_ds = TweetDS(text, negative)
-                    tweet_ds.db_save()
+    # The dataset is split in shards of whole rows, each worker filters the texts of a shard and counts its new tweets
+    # and words. The counts of the shards are added in their order, so the first row of a repeated text is the one
+    # counted, like in read_train_data. The counts and the checkpoints are saved like in read_train_data
+    # Use encodings where the quote is a single byte, see DatasetReader.read_shards
+    def read_train_data_sharded(self, filename: str, enconding: str, n_columns: int, emotion_position, text_position,
+                                init_line: int, negative_emotion_value, consider_only_negative=False, workers=None,
+                                dialect='excel', shard_size=SHARD_SIZE, flush_rows=FLUSH_ROWS, **format_params):
+        file_name = os.path.join(DATA_SET_LOCATION, filename)
+        chunk = TrainingChunk(file_name)
+        init_line, position = chunk.get_start(init_line)
 
-                    if negative:
-                        world_ds.add_negative()
-                    else:
-                        world_ds.add_positive()
+        with StopRequest() as stop_request, \
+                DatasetReader(file_name, enconding, emotion_position, text_position, n_columns, init_line, dialect,
+                              **format_params) as dataset, \
+                TextPreprocessor(workers, stop_request=stop_request) as preprocessor:
+            start_time = time.time()
+            count_shard = functools.partial(_count_shard, file_name, enconding, dataset.emotion_position,
+                                            dataset.text_position, n_columns, dialect, format_params,
+                                            preprocessor.chunk_size, negative_emotion_value, consider_only_negative)
+            shards_counts = preprocessor.map(count_shard, dataset.read_shards(shard_size, position))
 
-                    world_ds.db_save()
+            self._save_counts(chunk, shards_counts, init_line, position, flush_rows, stop_request)
 
-                    words = tweet_ds.get_words()
+        Analyze.export_model()
+
+        end_time = time.time()
+        print('Finishing training in: ' + str(end_time - start_time) + ' seconds')
 
-                    for word in words:
-                        word_ds = WordDS.load_by_text(word)
+    # Write the counts of a training stopped while they were written, call before using the trained data
+    @staticmethod
+    def recover():
+        checkpoint = TrainCheckpoint.read_checkpoint()
 
-                        if word_ds is None:
-                            word_ds = WordDS(word)
+        if checkpoint is not None and checkpoint.flush is not None:
+            _write_flush(checkpoint.flush)
+            TrainCheckpoint.write_checkpoint(TrainCheckpoint.Checkpoint(checkpoint.dataset, checkpoint.rows,
+                                                                        checkpoint.position))
 
-                        if negative:
-                            word_ds.add_negative()
-                        else:
-                            word_ds.add_positive()
+    # Add the counts of each shard to the chunk, in the order of the shards, and save them every flush_rows new tweets
+    # The checkpoints keep the row and the byte after the last shard added
+    @staticmethod
+    def _save_counts(chunk, shards_counts, data_count: int, position, flush_rows: int, stop_request: StopRequest):
+        for counts in shards_counts:
+            data_count = data_count + counts.rows
+            position = counts.position
+            print("Lendo linha: " + str(data_count))
 
-                        word_ds.db_save()
+            chunk.add_counts(counts)
 
-                if self.verify_end_option():
-                    break
+            if len(chunk.counts) >= flush_rows:
+                chunk.flush(data_count, position)
 
-        end_time = time.time()
-        print('Finishing training in: ' + str(end_time - start_time) + ' seconds')
+            if stop_request.is_requested():
+                break
 
+        chunk.flush(data_count, position)
+
+    # Return the counts of each shard, read in this process while the workers filter its next batches
+    # A shard not read to the end when the stop is asked isn't returned
     @staticmethod
-    def verify_end_option() -> bool:
-        if msvcrt.kbhit():
-            if msvcrt.getch() == b'c' or msvcrt.getch() == b'C':
-                return True
+    def _count_shards(file_name: str, encoding: str, dataset: DatasetReader, n_columns, dialect, format_params: dict,
+                      preprocessor: TextPreprocessor, stop_request: StopRequest, negative_emotion_value,
+                      consider_only_negative: bool, shards):
+        for shard in shards:
+            counts = TrainCounts()
+            counts.position = shard[1]
+
+            with DatasetReader(file_name, encoding, dataset.emotion_position, dataset.text_position, n_columns, 0,
+                               dialect, shard, **format_params) as shard_dataset:
+                batches = shard_dataset.read_batches(preprocessor.chunk_size)
+
+                for batch, filtered_texts in preprocessor.filter_batches(batches, operator.itemgetter(1)):
+                    counts.add_batch(batch, filtered_texts, negative_emotion_value, consider_only_negative)
+
+                    if stop_request.is_requested():
+                        return
+
+                counts.rows = counts.rows + shard_dataset.skipped_rows
+
+            # The preprocessing also stops returning batches when the stop is asked
+            if stop_request.is_requested():
+                return
+
+            yield counts
+
+
+# Write the records of a flush, the records written before are written again with the same values
+# Return the words and the world written
+def _write_flush(flush: TrainCheckpoint.Flush):
+    tweets = []
+    words = []
+    new_words = set(flush.new_words)
+
+    for tweet_id, filtered_text, negative in flush.tweets:
+        tweet_ds = TweetDS(None, negative, filtered_text)
+        tweet_ds.id = tweet_id
+        tweet_ds.saved = True
+        tweets.append(tweet_ds)
+
+    for word_id, text, n_positive, n_negative in flush.words:
+        word_ds = WordDS(text)
+        word_ds.id = word_id
+        word_ds.saved = True
+        word_ds.n_positive = n_positive
+        word_ds.n_negative = n_negative
+        words.append(word_ds)
+
+    world_ds = WorldDS.load(0)
+
+    if world_ds is None:
+        world_ds = WorldDS()
+
+    world_ds.total_positive = flush.total_positive
+    world_ds.total_negative = flush.total_negative
+
+    DBManager(TweetDS).save_many(tweets)
+    TweetDS.db_index_many(tweets)
+    DBManager(WordDS).save_many(words)
+    WordDS.db_index_many([word_ds for word_ds in words if word_ds.text in new_words])
+    world_ds.db_save()
+
+    # The checkpoint after the flush is only saved when the records are durable
+    for db_class in (TweetDS, WordDS, WorldDS):
+        DBManager(db_class).sync()
+
+    return words, world_ds
+
+
+# Count the new tweets of the rows of a shard of the dataset, run by the workers of the sharded training
+def _count_shard(file_name: str, encoding: str, emotion_position: int, text_position: int, n_columns, dialect,
+                 format_params: dict, batch_size: int, negative_emotion_value, consider_only_negative: bool,
+                 shard: tuple):
+    counts = TrainCounts()
+    normalizer = Preprocessing.get_normalizer()
+
+    counts.position = shard[1]
+
+    with DatasetReader(file_name, encoding, emotion_position, text_position, n_columns, 0, dialect, shard,
+                       **format_params) as dataset:
+        for batch in dataset.read_batches(batch_size):
+            counts.add_batch(batch, normalizer.filter_texts([text for _, text in batch]), negative_emotion_value,
+                             consider_only_negative)
+
+        counts.rows = counts.rows + dataset.skipped_rows
+
+    return counts
+
+
+# Tweets without repeated texts and the counts of their words and classes
+# The counts of different parts of the dataset are added with merge
+class TrainCounts:
+
+    def __init__(self):
+        # Filtered text and negative of each tweet, by the text as it's saved in the index
+        self.tweets = {}
+        # Number of positive and negative tweets of each word, by the word as it's saved in the index
+        self.word_counts = {}
+        self.n_positive = 0
+        self.n_negative = 0
+        # Rows of the dataset read, with the ones not counted and the ones skipped by the reader
+        self.rows = 0
+        # Byte after the rows read, None if they weren't read by bytes
+        self.position = None
+
+    def __len__(self):
+        return len(self.tweets)
+
+    def __contains__(self, filtered_text: str):
+        return IndexKeyHelper.normalize_key(BTreeNode280String, filtered_text) in self.tweets
+
+    # Count a tweet, return False if its text was already counted
+    def add(self, filtered_text: str, negative: bool) -> bool:
+        key = IndexKeyHelper.normalize_key(BTreeNode280String, filtered_text)
+
+        if key in self.tweets:
+            return False
+
+        self.tweets[key] = (filtered_text, negative)
+        self._count(filtered_text, negative, 1)
+
+        return True
+
+    # Count the tweets of the (emotion, text) rows of a batch, with the filtered texts of the rows
+    def add_batch(self, batch: list, filtered_texts: list, negative_emotion_value, consider_only_negative: bool):
+        self.rows = self.rows + len(batch)
+
+        for (emotion, _), filtered_text in zip(batch, filtered_texts):
+            negative = emotion == negative_emotion_value
+
+            if not consider_only_negative or negative:
+                self.add(filtered_text, negative)
+
+    # Remove a counted tweet
+    def remove(self, filtered_text: str):
+        filtered_text, negative = self.tweets.pop(IndexKeyHelper.normalize_key(BTreeNode280String, filtered_text))
+        self._count(filtered_text, negative, -1)
+
+    # Add the counts of other tweets, the texts must not be counted here
+    def merge(self, counts):
+        self.tweets.update(counts.tweets)
+        self.n_positive = self.n_positive + counts.n_positive
+        self.n_negative = self.n_negative + counts.n_negative
+        self.rows = self.rows + counts.rows
+
+        for word, (n_positive, n_negative) in counts.word_counts.items():
+            word_counts = self.word_counts.get(word)
+
+            if word_counts is None:
+                self.word_counts[word] = [n_positive, n_negative]
+            else:
+                word_counts[0] = word_counts[0] + n_positive
+                word_counts[1] = word_counts[1] + n_negative
+
+    def _count(self, filtered_text: str, negative: bool, delta: int):
+        if negative:
+            self.n_negative = self.n_negative + delta
+        else:
+            self.n_positive = self.n_positive + delta
+
+        for word in TweetDS(None, negative, filtered_text).get_words():
+            word = IndexKeyHelper.normalize_key(BTreeNode50String, word)
+            word_counts = self.word_counts.get(word)
+
+            if word_counts is None:
+                word_counts = self.word_counts[word] = [0, 0]
+
+            word_counts[negative] = word_counts[negative] + delta
+
+            # A word of removed tweets only isn't saved
+            if word_counts == [0, 0]:
+                del self.word_counts[word]
+
+
+# New tweets of the training and the counts of their words and classes, kept in memory until they are saved
+# Each flush writes the new tweets and words with a single write, updates the changed words and saves the world once
+# The records of a flush are saved in the checkpoint before they're written, so a stopped flush can be written again
+class TrainingChunk:
+
+    def __init__(self, dataset: str):
+        Train.recover()
+
+        checkpoint = TrainCheckpoint.read_checkpoint()
+        self.dataset = dataset
+        # Checkpoint of the last training of the dataset
+        self.checkpoint = checkpoint if checkpoint is not None and checkpoint.dataset == dataset else None
+        self.world_ds = WorldDS.load(0)
+
+        if self.world_ds is None:
+            self.world_ds = WorldDS()
+
+        # Saved words by text, read in the first flush with a scan of the table
+        self.words = None
+        self.counts = TrainCounts()
+
+    # Return the (row, byte) where the training starts, the checkpoint if it's after the init row
+    # The byte is None if it isn't known
+    def get_start(self, init_row: int) -> (int, int):
+        if self.checkpoint is None or self.checkpoint.rows <= init_row:
+            return init_row, None
+
+        print("Continuando o treinamento do checkpoint salvo na linha " + str(self.checkpoint.rows)
+              + " em vez da linha " + str(init_row) + ".")
+
+        return self.checkpoint.rows, self.checkpoint.position
+
+    # Return if the filtered text isn't saved or in the chunk
+    def is_new_text(self, filtered_text: str) -> bool:
+        if filtered_text in self.counts:
+            return False
+
+        return TweetDS.load_by_filtered_text(filtered_text) is None
+
+    # Add the counts of a part of the dataset, the tweets already saved or in the chunk are removed from them
+    def add_counts(self, counts: TrainCounts):
+        for filtered_text, _ in list(counts.tweets.values()):
+            if not self.is_new_text(filtered_text):
+                counts.remove(filtered_text)
+
+        self.counts.merge(counts)
+
+    # Save the tweets and add the counts of the chunk to the saved ones, the chunk is empty after
+    # The checkpoint keeps the rows of the dataset counted until here and the byte after them, if it's known
+    def flush(self, rows: int, position=None):
+        if self.counts:
+            flush = self._get_flush()
+
+            TrainCheckpoint.write_checkpoint(TrainCheckpoint.Checkpoint(self.dataset, rows, position, flush))
+            words, self.world_ds = _write_flush(flush)
+
+            for word_ds in words:
+                self.words[word_ds.text] = word_ds
+
+        TrainCheckpoint.write_checkpoint(TrainCheckpoint.Checkpoint(self.dataset, rows, position))
+        self.counts = TrainCounts()
+
+    # Return the records of the counts of the chunk, with the ids of the new records after the ends of the tables
+    def _get_flush(self) -> TrainCheckpoint.Flush:
+        if self.words is None:
+            self.words = {}
+
+            for word_ds in DBManager(WordDS).find_all():
+                # The index finds the word with the smallest id, the same one is kept
+                self.words.setdefault(word_ds.text, word_ds)
+
+        tweet_id = DBManager(TweetDS).get_next_id()
+        word_id = DBManager(WordDS).get_next_id()
+        tweets = [(tweet_id + number, filtered_text, negative)
+                  for number, (filtered_text, negative) in enumerate(self.counts.tweets.values())]
+        words = []
+        new_words = []
+
+        for word, (n_positive, n_negative) in self.counts.word_counts.items():
+            word_ds = self.words.get(word)
+
+            if word_ds is None:
+                words.append((word_id, word, n_positive, n_negative))
+                new_words.append(word)
+                word_id = word_id + 1
+            else:
+                words.append((word_ds.id, word, word_ds.n_positive + n_positive, word_ds.n_negative + n_negative))
 
-        return False
+        return TrainCheckpoint.Flush(tweets, words, new_words, self.world_ds.total_positive + self.counts.n_positive,
+                                     self.world_ds.total_negative + self.counts.n_negative)
@@ -0,0 +1,71 @@
+import pickle
+
+import Database.Helpers.DirHelper as DirHelper
+import Database.Helpers.FileHandleHelper as FileHandleHelper
+
+# Changes in the fields of the checkpoint must change the version, checkpoints of other versions are ignored
+CHECKPOINT_VERSION = 1
+
+_CHECKPOINT_DIR = 'TrainCheckpoint'
+_CHECKPOINT_FILE = 'checkpoint'
+# The checkpoint is written in this file first, it replaces the checkpoint at the end
+_REWRITE_FILE = 'checkpoint_rewrite'
+
+
+# Where a training stopped and, while its counts are written, the records of the counts
+# A checkpoint with a flush is saved before the records are written, so a stopped write is written again in the next
+# training with the same records. The records have the final values, writing them again doesn't count them twice
+class Checkpoint:
+
+    def __init__(self, dataset: str, rows: int, position=None, flush=None):
+        self.version = CHECKPOINT_VERSION
+        self.dataset = dataset
+        # Rows of the dataset already counted, after the header, like the init line
+        self.rows = rows
+        # Byte of the first row not counted, None if the training didn't read the bytes of the rows
+        self.position = position
+        # Records of the counts being written, a Flush
+        self.flush = flush
+
+
+# Records of the tweets, words and world of a flush of the training, with the ids they're written in
+class Flush:
+
+    def __init__(self, tweets: list, words: list, new_words: list, total_positive: int, total_negative: int):
+        # (id, filtered text, negative) of the new tweets
+        self.tweets = tweets
+        # (id, text, n_positive, n_negative) of the changed words, with the counts of the flush added
+        self.words = words
+        # Texts of the words that aren't in the index yet
+        self.new_words = new_words
+        self.total_positive = total_positive
+        self.total_negative = total_negative
+
+
+# Save the checkpoint, replacing the saved one only when it's written and durable
+def write_checkpoint(checkpoint: Checkpoint):
+    DirHelper.create_database_directory(_CHECKPOINT_DIR)
+    rewrite_file = DirHelper.get_database_file(_CHECKPOINT_DIR, _REWRITE_FILE)
+    DirHelper.create_file(rewrite_file)
+    FileHandleHelper.clear_file(rewrite_file)
+
+    storage = FileHandleHelper.get_file(rewrite_file)
+    storage.write_at(0, pickle.dumps(checkpoint, pickle.HIGHEST_PROTOCOL))
+    storage.sync()
+
+    DirHelper.replace_file(rewrite_file, DirHelper.get_database_file(_CHECKPOINT_DIR, _CHECKPOINT_FILE))
+
+
+# Return the saved checkpoint, None if there isn't one or it's from other version
+def read_checkpoint():
+    checkpoint_file = DirHelper.get_database_file(_CHECKPOINT_DIR, _CHECKPOINT_FILE)
+
+    if not DirHelper.file_exists(checkpoint_file):
+        return None
+
+    checkpoint = pickle.loads(bytes(FileHandleHelper.map_file(checkpoint_file)))
+
+    if getattr(checkpoint, 'version', None) != CHECKPOINT_VERSION:
+        return None
+
+    return checkpoint
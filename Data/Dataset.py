@@ -3,7 +3,8 @@ from Database.DBManager import DBManager
 from Database import DBManager as DBM
 from Database.Cons import Values
 from Database.DBData import DBData
-from Database.Index.BTree.BTree import BTree
+from Database.Index import IndexRegistry
+from Database.Index.Bloom import BloomCons
 from Database.Index.BTree.BTreeNode import BTreeNode280String, BTreeNode50String
 
 
@@ -31,22 +32,56 @@ class WorldDS(DBData):
             dbm.delete(self)
 
 
+# Scores of the saved tweets, they are rebuilt when the model gives other scores
+class ScoresInfo(DBData):
+    # Score type of the model, the columns ending in _type are list types
+    scale = Values.STRING_EMPTY
+    scale_size = 10
+    smoothing = 0.0
+
+    def db_save(self):
+        # The info is always the first record
+        self.id = 0
+        self.saved = True
+
+        dbm = DBManager(ScoresInfo)
+        dbm.save(self)
+
+    def load():
+        dbm = DBManager(ScoresInfo)
+        return dbm.find_by_id(0)
+
+
 class TweetDS(DBData):
     text = Values.STRING_EMPTY
     text_size = 280
     negative = False
 
-    def __init__(self, text, negative):
-        self.text = NaturalLanguage.filter_text(text)
+    # The text is filtered here if the filtered text isn't given
+    # Without a text the tweet is empty, like the ones read from the table
+    def __init__(self, text=None, negative=False, filtered_text=None):
+        if text is not None or filtered_text is not None:
+            self.text = filtered_text if filtered_text is not None else NaturalLanguage.filter_text(text)
         self.negative = negative
 
     def db_save(self):
-        if not DBManager:
-            dbm = DBManager(TweetDS)
-            dbm.save(self)
+        if not DBM.is_saved(self):
+            TweetDS.db_save_many([self])
 
-            tweet_dataset_text_id = BTree('tweet_dataset_text_id', BTreeNode280String, TweetDS, TweetDS)
-            tweet_dataset_text_id.insert(self.text, self.id)
+    # Save new tweets with a single write and add all their texts to the index at once
+    def db_save_many(tweets: list):
+        dbm = DBManager(TweetDS)
+        dbm.save_many(tweets)
+
+        TweetDS.db_index_many(tweets)
+
+    # Add the texts of saved tweets to the index, the ones already there with the tweet aren't added again
+    def db_index_many(tweets: list):
+        tweet_dataset_text_id = IndexRegistry.get_hash_index(
+            'tweet_dataset_text_id', BTreeNode280String, TweetDS, TweetDS,
+            bloom_false_positive_rate=BloomCons.FALSE_POSITIVE_RATE)
+        tweet_dataset_text_id.insert_many([(tweet.text, tweet.id) for tweet in tweets if DBM.is_saved(tweet)
+                                           and tweet.id not in tweet_dataset_text_id.find_contents(tweet.text)])
 
     # Return the words without repeat
     # Bernoulli model: just present or not present
@@ -59,8 +94,13 @@ class TweetDS(DBData):
         return dbm.find_by_id(id)
 
     def load_by_text(text: str):
-        tweet_dataset_text_id = BTree('tweet_dataset_text_id', BTreeNode280String, TweetDS, TweetDS)
-        return tweet_dataset_text_id.find_first_or_default(NaturalLanguage.filter_text(text))
+        return TweetDS.load_by_filtered_text(NaturalLanguage.filter_text(text))
+
+    def load_by_filtered_text(filtered_text: str):
+        tweet_dataset_text_id = IndexRegistry.get_hash_index(
+            'tweet_dataset_text_id', BTreeNode280String, TweetDS, TweetDS,
+            bloom_false_positive_rate=BloomCons.FALSE_POSITIVE_RATE)
+        return tweet_dataset_text_id.find_first_or_default(filtered_text)
 
     def db_delete(self):
         if DBM.is_saved(self):
@@ -95,16 +135,32 @@ class WordDS(DBData):
         dbm.save(self)
 
         if not saved:
-            word_dataset_text_id = BTree('word_dataset_text_id', BTreeNode50String, WordDS, WordDS)
+            word_dataset_text_id = IndexRegistry.get_hash_index('word_dataset_text_id',
+                                                                BTreeNode50String, WordDS, WordDS)
             word_dataset_text_id.insert(self.text, self.id)
 
+    # Save the words together, the new ones are written with a single write and added to the index at once
+    def db_save_many(words: list):
+        new_words = [word_ds for word_ds in words if not DBM.is_saved(word_ds)]
+
+        dbm = DBManager(WordDS)
+        dbm.save_many(words)
+
+        WordDS.db_index_many(new_words)
+
+    # Add the texts of saved words to the index, the ones already there with the word aren't added again
+    def db_index_many(words: list):
+        word_dataset_text_id = IndexRegistry.get_hash_index('word_dataset_text_id', BTreeNode50String, WordDS, WordDS)
+        word_dataset_text_id.insert_many([(word_ds.text, word_ds.id) for word_ds in words if DBM.is_saved(word_ds)
+                                          and word_ds.id not in word_dataset_text_id.find_contents(word_ds.text)])
+
     def load(id):
         dbm = DBManager(WordDS)
         return dbm.find_by_id(id)
 
     # Ever use filtered text by TweetDS
     def load_by_text(text):
-        word_dataset_text_id = BTree('word_dataset_text_id', BTreeNode50String, WordDS, WordDS)
+        word_dataset_text_id = IndexRegistry.get_hash_index('word_dataset_text_id', BTreeNode50String, WordDS, WordDS)
         return word_dataset_text_id.find_first_or_default(text)
 
     def db_delete(self):
@@ -2,7 +2,8 @@ from Core import NaturalLanguage, Analyze
 from Data.Error.TwitterConversionException import TwitterConversionException
 from Database.Error import ClassError as DBError
 from Database.Cons import Values
-from Database.Index.BTree.BTree import BTree
+from Database.Index import IndexRegistry
+from Database.Index.Bloom import BloomCons
 from Database.Index.BTree.BTreeNode import BTreeNodeInt, BTreeNode280String, BTreeNodeFloat
 from Database.DBManager import DBManager
 from Database.DBData import DBData
@@ -18,7 +19,7 @@ class User(DBData):
     location_size = 100
 
     def find_self(self):
-        bt_twitter_id_user = BTree('twitter_id_user', BTreeNodeInt, User, User)
+        bt_twitter_id_user = IndexRegistry.get_hash_index('twitter_id_user', BTreeNodeInt, User, User)
         saved_self = bt_twitter_id_user.find_first_or_default(self.twitter_id)
 
         if saved_self is not None:
@@ -47,7 +48,7 @@ class User(DBData):
         dbm.save(self)
 
         if not DBM.is_saved(self):
-            bt_twitter_id_user = BTree('twitter_id_user', BTreeNodeInt, User, User)
+            bt_twitter_id_user = IndexRegistry.get_hash_index('twitter_id_user', BTreeNodeInt, User, User)
             bt_twitter_id_user.insert(self.twitter_id, self.id)
 
     def load(id):
@@ -56,7 +57,7 @@ class User(DBData):
 
     def get_tweets(self):
         if DBM.is_saved(self):
-            bt_user_tweet = BTree('user_tweet', BTreeNodeInt, User, Tweet)
+            bt_user_tweet = IndexRegistry.get_btree('user_tweet', BTreeNodeInt, User, Tweet)
             return bt_user_tweet.find(self.id)
 
 
@@ -70,14 +71,16 @@ class Tweet(DBData):
     filtered_text = Values.STRING_EMPTY
     filtered_text_size = 280
     negative = False
-    negative_score = 0
-    positive_score = 0
+    negative_score = 0.0
+    positive_score = 0.0
 
     def __init__(self):
         self.hashtag_ids = Values.LIST_EMPTY()
 
     def find_self(self):
-        tweet_id_tweet = BTree('tweet_id_tweet', BTreeNodeInt, Tweet, Tweet)
+        tweet_id_tweet = IndexRegistry.get_hash_index(
+            'tweet_id_tweet', BTreeNodeInt, Tweet, Tweet,
+            bloom_false_positive_rate=BloomCons.FALSE_POSITIVE_RATE)
         saved_self = tweet_id_tweet.find_first_or_default(self.tweet_id)
 
         if saved_self is not None:
@@ -86,12 +89,13 @@ class Tweet(DBData):
 
         return saved_self
 
-    def set(self, tweet_data):
+    # The text is filtered here if the filtered text isn't given
+    def set(self, tweet_data, filtered_text=None):
         try:
             self.tweet_id = tweet_data['id']
             self.text = tweet_data['text']
             self.created_at = tweet_data['created_at']
-            self.filtered_text = NaturalLanguage.filter_text(self.text)
+            self.filtered_text = filtered_text if filtered_text is not None else NaturalLanguage.filter_text(self.text)
 
             return True
         except KeyError:
@@ -114,26 +118,33 @@ class Tweet(DBData):
     def infer(self):
         self.negative, self.positive_score, self.negative_score = Analyze.infer_emotion(self)
 
+    # Infer the emotions of many tweets in one call, faster than inferring each one
+    @staticmethod
+    def infer_many(tweets: list):
+        for tweet, emotion in zip(tweets, Analyze.infer_emotion_batch(tweets)):
+            tweet.negative, tweet.positive_score, tweet.negative_score = emotion
+
     def db_save(self):
         if self.user_id != Values.INT_EMPTY:
             if not DBM.is_saved(self):
                 dbm = DBManager(Tweet)
                 dbm.save(self)
 
-                tweet_id_tweet = BTree('tweet_id_tweet', BTreeNodeInt, Tweet, Tweet)
+                tweet_id_tweet = IndexRegistry.get_hash_index(
+                    'tweet_id_tweet', BTreeNodeInt, Tweet, Tweet,
+                    bloom_false_positive_rate=BloomCons.FALSE_POSITIVE_RATE)
                 tweet_id_tweet.insert(self.tweet_id, self.id)
 
-                for hashtag_id in self.hashtag_ids:
-                    bt_tweet_hashtag = BTree('tweet_hashtag', BTreeNodeInt, Tweet, Hashtag)
-                    bt_tweet_hashtag.insert(self.id, hashtag_id)
+                bt_tweet_hashtag = IndexRegistry.get_btree('tweet_hashtag', BTreeNodeInt, Tweet, Hashtag)
+                bt_tweet_hashtag.insert_many([(self.id, hashtag_id) for hashtag_id in self.hashtag_ids])
 
-                bt_user_tweet = BTree('user_tweet', BTreeNodeInt, User, Tweet)
+                bt_user_tweet = IndexRegistry.get_btree('user_tweet', BTreeNodeInt, User, Tweet)
                 bt_user_tweet.insert(self.user_id, self.id)
 
-                bt_tweet_positive_score = BTree('tweet_positive_score', BTreeNodeFloat, Tweet, Tweet)
+                bt_tweet_positive_score = IndexRegistry.get_btree('tweet_positive_score', BTreeNodeFloat, Tweet, Tweet)
                 bt_tweet_positive_score.insert(self.positive_score, self.id)
 
-                bt_tweet_negative_score = BTree('tweet_negative_score', BTreeNodeFloat, Tweet, Tweet)
+                bt_tweet_negative_score = IndexRegistry.get_btree('tweet_negative_score', BTreeNodeFloat, Tweet, Tweet)
                 bt_tweet_negative_score.insert(self.negative_score, self.id)
         else:
             raise DBError.ChildNotFoundInDataBase("You need to set User before saving a Tweet!")
@@ -156,7 +167,7 @@ class Tweet(DBData):
 
     def get_hashtags(self) -> list:
         if DBM.is_saved(self):
-            bt_tweet_hashtag = BTree('tweet_hashtag', BTreeNodeInt, Tweet, Hashtag)
+            bt_tweet_hashtag = IndexRegistry.get_btree('tweet_hashtag', BTreeNodeInt, Tweet, Hashtag)
             return bt_tweet_hashtag.find(self.id)
 
 
@@ -165,7 +176,9 @@ class Hashtag(DBData):
     text_size = 280
 
     def find_self(self):
-        hashtag_text_hashtag = BTree('hashtag_text_hashtag', BTreeNode280String, Hashtag, Hashtag)
+        hashtag_text_hashtag = IndexRegistry.get_hash_index(
+            'hashtag_text_hashtag', BTreeNode280String, Hashtag, Hashtag,
+            bloom_false_positive_rate=BloomCons.FALSE_POSITIVE_RATE)
         saved_self = hashtag_text_hashtag.find_first_or_default(self.text)
 
         if saved_self is not None:
@@ -186,7 +199,9 @@ class Hashtag(DBData):
     def db_save(self):
         dbm = DBManager(Hashtag)
         dbm.save(self)
-        hashtag_text_hashtag = BTree('hashtag_text_hashtag', BTreeNode280String, Hashtag, Hashtag)
+        hashtag_text_hashtag = IndexRegistry.get_hash_index(
+            'hashtag_text_hashtag', BTreeNode280String, Hashtag, Hashtag,
+            bloom_false_positive_rate=BloomCons.FALSE_POSITIVE_RATE)
         hashtag_text_hashtag.insert(self.text, self.id)
 
     def load(id):
@@ -194,7 +209,7 @@ class Hashtag(DBData):
         return dbm.find_by_id(id)
 
     def add_tweet(self, tweet):
-        bt_hashtag_tweet = BTree('hashtag_tweet', BTreeNodeInt, Hashtag, Tweet)
+        bt_hashtag_tweet = IndexRegistry.get_btree('hashtag_tweet', BTreeNodeInt, Hashtag, Tweet)
         bt_hashtag_tweet.insert(self.id, tweet.id)
 
     def db_delete(self):
@@ -204,7 +219,7 @@ class Hashtag(DBData):
 
     def get_tweets(self) -> list:
         if DBM.is_saved(self):
-            bt_hashtag = BTree('hashtag_tweet', BTreeNodeInt, Hashtag, Tweet)
+            bt_hashtag = IndexRegistry.get_btree('hashtag_tweet', BTreeNodeInt, Hashtag, Tweet)
             return bt_hashtag.find(self.id)
         else:
             return []
\ No newline at end of file
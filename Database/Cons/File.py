@@ -1,4 +1,5 @@
 ABSOLUTE_FILE_POSITION = 0
+END_FILE_POSITION = 2
 FLAG_EXISTS = True
 FLAG_NOT_EXISTS = False
 INDEX_SEPARATOR = '__'
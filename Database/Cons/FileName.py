@@ -5,4 +5,10 @@ INDEX = 'index'
 # INDEX NAMES
 INDEX_MANAGER = 'main'
 INDEX_DATA = 'data'
+INDEX_OVERFLOW = 'overflow'
+INDEX_FREE = 'free'
+INDEX_BLOOM_MANAGER = 'bloom_main'
+INDEX_BLOOM_DATA = 'bloom_data'
+INDEX_LOG = 'log'
+INDEX_RUN = 'run_'
 INDEX_SEPARATOR = '__'
@@ -0,0 +1,7 @@
+# Storage of the database files, each class of the database can use a different one
+FILE = 'file'
+MMAP = 'mmap'
+MEMORY = 'memory'
+
+# Environment variable with the storage type used when the class hasn't one, the file storage by default
+STORAGE_TYPE_VARIABLE = 'PYDATABASE_STORAGE'
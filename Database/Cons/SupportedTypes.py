@@ -33,6 +33,9 @@ END_OF_LIST_TYPE_VARIABLE = '_type'
 # INDEX ATTRIBUTE END
 END_OF_INDEX_ATTRIBUTE = '_index'
 
+# CLASS ATTRIBUTE WITH THE PAGE SIZE IN BYTES, THE RECORDS OF THE CLASS ARE PADDED TO FILL WHOLE PAGES
+RECORD_PAGE_SIZE_VARIABLE = 'record_page_size'
+
 # EMPTY BINARY, NOTHING READ
 EMPTY_BINARY = b''
 
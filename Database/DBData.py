@@ -11,5 +11,9 @@ class DBData(object):
     def initialize():
         return None
 
+    # Used for do some stuff before database save
+    def prepare_save(self):
+        return None
+
     def db_save(self):
         raise ClassError.SaveFunctionNotImplemented("It's necessary to implement db_save in all database entities!")
@@ -1,17 +1,20 @@
-import Database.Cons.File as File
+import io
+
 import Database.Cons.FileName as FileName
 import Database.Helpers.DirHelper as DirHelper
+import Database.Helpers.FileHandleHelper as FileHandleHelper
 import Database.Helpers.FileIndexHelper as FileIndexHelper
 import Database.Helpers.ObjectHelper as ObjHelper
 import Database.Helpers.ObjectReadWriteHelper as ObjectReadWriteHelper
 from Database import DBData
 from Database.Cons import DBTypes, Values
-
-
-# Verify if a object is saved in database
 from Database.Error.ReadWriteError import WritingAListBiggerThanMaxSize
 
+# Records read at a time by find_all
+_SCAN_RECORDS = 4096
 
+
+# Verify if a object is saved in database
 def is_saved(obj):
     return obj.saved and obj.id != Values.INT_EMPTY
 
@@ -22,6 +25,7 @@ class DBManager:
     class_name = None
     ref_class_name = None
     table_file = None
+    record_size = None
     type = None
 
     # Create and/or manage a table or index
@@ -35,6 +39,7 @@ class DBManager:
     def init_table(self, db_class: type):
         self.db_class = db_class
         self.db_columns = ObjHelper.get_columns(db_class)
+        self.record_size = ObjHelper.get_class_size(db_class)
         self.class_name = ObjHelper.get_class_name(db_class)
         self.type = DBTypes.TABLE
         DirHelper.create_database_directory(self.class_name)
@@ -45,15 +50,14 @@ class DBManager:
     def init_index(self, db_class: type, index_name: str, index_filename: str, ref_class: type):
         self.db_class = db_class
         self.db_columns = ObjHelper.get_columns(db_class)
+        self.record_size = ObjHelper.get_class_size(db_class)
         self.class_name = index_name
         self.ref_class_name = ObjHelper.get_class_name(ref_class)
         self.type = DBTypes.INDEX
-        index_dir = self.ref_class_name + '\\' + FileName.INDEX
-        file_dir = index_dir + '\\' + index_name
         DirHelper.create_database_directory(self.ref_class_name)
-        DirHelper.create_database_directory(index_dir)
-        DirHelper.create_database_directory(file_dir)
-        self.table_file = DirHelper.get_database_file(file_dir, index_filename)
+        DirHelper.create_database_directory(DirHelper.get_indexes_database_dir(self.ref_class_name))
+        DirHelper.create_database_directory(DirHelper.get_index_database_dir(self.ref_class_name, index_name))
+        self.table_file = DirHelper.get_index_file(self.ref_class_name, index_name, index_filename)
         DirHelper.create_file(self.table_file)
 
     # Save a new record in the table
@@ -68,42 +72,151 @@ class DBManager:
         except WritingAListBiggerThanMaxSize:
             return
 
+    # Each record is written in memory first and then in the file with a single write
+    # The table lock keeps the id given by the file end until the record is written
     def _save(self, obj):
-        with open(self.table_file, 'ab') as table_file:
-            file_tell = table_file.tell()
+        table_file = FileHandleHelper.get_file(self.table_file)
+
+        with FileHandleHelper.get_file_lock(self.table_file):
+            file_end = table_file.size()
 
-        # Open in append mode
-        with open(self.table_file, 'r+b') as table_file:
-            table_file.seek(file_tell, File.ABSOLUTE_FILE_POSITION)
-            obj.id = FileIndexHelper.get_last_id_by_file_end(self.db_class, file_tell)
+            obj.id = FileIndexHelper.get_last_id_by_file_end(self.db_class, file_end)
             obj.saved = True
-            ObjectReadWriteHelper.write_obj(table_file, obj, self.db_class)
+            self._write_record(table_file, file_end, obj)
+
+    # Save a list of objects, the saved ones are updated and the new ones are written together after the file end
+    # Saved objects of consecutive ids are also written together, even after the file end
+    # Objects with a list bigger than its max size aren't saved, like in save
+    def save_many(self, objs: list):
+        table_file = FileHandleHelper.get_file(self.table_file)
+
+        with FileHandleHelper.get_file_lock(self.table_file):
+            first_id = None
+            records = []
+
+            for obj in sorted([obj for obj in objs if obj.saved], key=lambda saved_obj: saved_obj.id):
+                try:
+                    record = self._get_record(obj)
+                except WritingAListBiggerThanMaxSize:
+                    continue
+
+                if records and obj.id != first_id + len(records):
+                    table_file.write_at(FileIndexHelper.calculate_index_by_id(self.db_class, first_id),
+                                        b''.join(records))
+                    records = []
+
+                if not records:
+                    first_id = obj.id
+
+                records.append(record)
+
+            if records:
+                table_file.write_at(FileIndexHelper.calculate_index_by_id(self.db_class, first_id), b''.join(records))
+
+            file_end = table_file.size()
+            obj_id = FileIndexHelper.get_last_id_by_file_end(self.db_class, file_end)
+            records = []
+
+            for obj in objs:
+                if not obj.saved:
+                    obj.id = obj_id
+                    obj.saved = True
+
+                    try:
+                        records.append(self._get_record(obj))
+                        obj_id = obj_id + 1
+                    except WritingAListBiggerThanMaxSize:
+                        obj.id = Values.INT_EMPTY
+                        obj.saved = False
+
+            if records:
+                table_file.write_at(file_end, b''.join(records))
+
+    # Return the id of the next record saved after the file end
+    def get_next_id(self) -> int:
+        with FileHandleHelper.get_file_lock(self.table_file):
+            return FileIndexHelper.get_last_id_by_file_end(self.db_class,
+                                                           FileHandleHelper.get_file(self.table_file).size())
 
     # Update saved data using the id
     def _update(self, obj):
-        # Open in append mode
-        with open(self.table_file, 'r+b') as table_file:
-            seek_pos = FileIndexHelper.calculate_index_by_id(self.db_class, obj.id)
-            table_file.seek(seek_pos, File.ABSOLUTE_FILE_POSITION)
-            ObjectReadWriteHelper.write_obj(table_file, obj, self.db_class)
+        table_file = FileHandleHelper.get_file(self.table_file)
+        seek_pos = FileIndexHelper.calculate_index_by_id(self.db_class, obj.id)
+
+        with FileHandleHelper.get_file_lock(self.table_file):
+            self._write_record(table_file, seek_pos, obj)
 
     # Find one item by id
     def find_by_id(self, obj_id: int) -> object:
         if obj_id >= 0:
-            with open(self.table_file, 'rb') as table_file:
-                seek_pos = FileIndexHelper.calculate_index_by_id(self.db_class, obj_id)
-                table_file.seek(seek_pos, File.ABSOLUTE_FILE_POSITION)
-                obj = ObjectReadWriteHelper.read_obj(table_file, self.db_class)
-            return obj
+            table_file = FileHandleHelper.get_file(self.table_file)
+            seek_pos = FileIndexHelper.calculate_index_by_id(self.db_class, obj_id)
+
+            # Read the whole record with a single read
+            with FileHandleHelper.get_file_lock(self.table_file):
+                record = io.BytesIO(table_file.read_at(seek_pos, self.record_size))
+
+            return ObjectReadWriteHelper.read_obj(record, self.db_class)
         return None
 
+    # Return all saved objects in id order, with their ids, skipping the deleted ones
+    # The table is read in blocks of records, each block with a single read
+    def find_all(self):
+        table_file = FileHandleHelper.get_file(self.table_file)
+        block_size = self.record_size * _SCAN_RECORDS
+        position = 0
+
+        while True:
+            with FileHandleHelper.get_file_lock(self.table_file):
+                block = table_file.read_at(position, block_size)
+
+            records = len(block) // self.record_size
+            obj_id = position // self.record_size
+            block_view = memoryview(block)
+
+            for record_position in range(0, records * self.record_size, self.record_size):
+                record = io.BytesIO(block_view[record_position:record_position + self.record_size])
+                obj = ObjectReadWriteHelper.read_obj(record, self.db_class)
+
+                if obj is not None:
+                    obj.id = obj_id
+                    obj.saved = True
+                    yield obj
+
+                obj_id = obj_id + 1
+
+            if len(block) < block_size:
+                return
+
+            position = position + block_size
+
     # Delete one item by id
     def delete(self, obj: DBData):
         if obj.id >= 0:
-            with open(self.table_file, 'r+b') as table_file:
-                seek_pos = FileIndexHelper.calculate_index_by_id(self.db_class, obj.id)
-                table_file.seek(seek_pos, File.ABSOLUTE_FILE_POSITION)
-                ObjectReadWriteHelper.delete_obj(table_file)
+            table_file = FileHandleHelper.get_file(self.table_file)
+            seek_pos = FileIndexHelper.calculate_index_by_id(self.db_class, obj.id)
+
+            # The exists flag is changed in memory and written back
+            with FileHandleHelper.get_file_lock(self.table_file):
+                record = io.BytesIO(table_file.read_at(seek_pos, ObjHelper.get_exists_flag_size()))
+                ObjectReadWriteHelper.delete_obj(record)
+                table_file.write_at(seek_pos, record.getvalue())
+
+    # Make the written records durable in the storage
+    def sync(self):
+        FileHandleHelper.sync_file(self.table_file)
+
+    # Write the object in memory and then the record in the position of the file
+    # Records of classes with a page size are written with their padding, so the file always ends in a whole record
+    def _write_record(self, table_file, position: int, obj):
+        table_file.write_at(position, self._get_record(obj))
+
+    # Return the bytes of the record of the object, with the padding
+    def _get_record(self, obj) -> bytes:
+        record = io.BytesIO()
+        ObjectReadWriteHelper.write_obj(record, obj, self.db_class)
+
+        return record.getvalue().ljust(self.record_size, b'\0')
 
     # Drop all table if the instance type is a table or delete only the index if the instance type is an index
     def drop(self):
@@ -118,5 +231,4 @@ class DBManager:
 
     # Drop an index
     def _drop_index(self):
-        index_dir = self.ref_class_name + '\\' + FileName.INDEX
-        DirHelper.delete_table_directory(index_dir)
+        DirHelper.delete_table_directory(DirHelper.get_indexes_database_dir(self.ref_class_name))
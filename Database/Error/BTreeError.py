@@ -11,3 +11,18 @@ class OneMoreChildThanDataRequired(Error):
 class NodeWithoutSiblings(Error):
     """Every node, except the root needs to have siblings"""
     pass
+
+
+class TreeWithoutCounts(Error):
+    """Order statistics need a BTree created with counted=True"""
+    pass
+
+
+class PositionOutOfRange(Error):
+    """There is no key in the requested position"""
+    pass
+
+
+class PageTooSmallForNode(Error):
+    """The page size can't keep a node of the node class"""
+    pass
@@ -0,0 +1,13 @@
+class Error(Exception):
+    """IndexRegistryError"""
+    pass
+
+
+class IndexOpenedWithOtherContentClass(Error):
+    """The index is already open with other content class"""
+    pass
+
+
+class IndexOpenedWithoutBloomFilter(Error):
+    """The index is already open without a bloom filter"""
+    pass
@@ -0,0 +1,8 @@
+class Error(Exception):
+    """StorageError"""
+    pass
+
+
+class UnknownStorageType(Error):
+    """There is no storage of the requested type"""
+    pass
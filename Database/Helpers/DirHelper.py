@@ -1,10 +1,23 @@
 import os
-import shutil
+import threading
 
-_DIRECTORY_SEPARATOR = "\\"
+import Database.Cons.FileName as FileName
+import Database.Helpers.FileHandleHelper as FileHandleHelper
+import Database.Helpers.StorageHelper as StorageHelper
+
+_DIRECTORY_SEPARATOR = os.sep
 _DATABASE_DIR = "PyDatabase"
 _TYPE_OF_TABLE_FILE = ".dbt"
 
+# Dirs and files already created, so they aren't verified again in the disk
+_created_paths = set()
+
+# Number of dropped dirs, used to know when open indexes may have lost their files
+_drop_count = 0
+
+# Only one thread creates or deletes paths at a time
+_paths_lock = threading.Lock()
+
 
 # FUNCTIONS
 
@@ -18,30 +31,108 @@ def get_database_file(class_name: str, file_name: str) -> str:
     return get_class_database_dir(class_name) + _DIRECTORY_SEPARATOR + file_name + _TYPE_OF_TABLE_FILE
 
 
+# Return the folder with all indexes of a database class
+def get_indexes_database_dir(ref_class_name: str) -> str:
+    return ref_class_name + _DIRECTORY_SEPARATOR + FileName.INDEX
+
+
+# Return the folder of an index of a database class
+def get_index_database_dir(ref_class_name: str, index_name: str) -> str:
+    return get_indexes_database_dir(ref_class_name) + _DIRECTORY_SEPARATOR + index_name
+
+
+# Return the file of an index using the name of the class, the index and the file
+def get_index_file(ref_class_name: str, index_name: str, file_name: str) -> str:
+    return get_database_file(get_index_database_dir(ref_class_name, index_name), file_name)
+
+
 # Return the folder of a database class
 def get_class_database_dir(class_name: str) -> str:
     return get_database_dir() + _DIRECTORY_SEPARATOR + class_name
 
 
+# Return how many dirs were dropped since the start
+def get_drop_count() -> int:
+    return _drop_count
+
+
 # Delete the master directory if exists
 def delete_table_directory(class_name: str):
+    global _drop_count
+
     class_dir = get_class_database_dir(class_name)
-    if os.path.exists(class_dir):
-        shutil.rmtree(class_dir)
+
+    with _paths_lock:
+        # Open files and created paths inside the dir are forgotten
+        _forget_paths_inside(class_dir)
+        _drop_count = _drop_count + 1
+
+        StorageHelper.get_storage_class(class_dir).remove_dir(class_dir)
 
 
 # Create the master and class folder if not exists
 def create_database_directory(class_name: str):
-    database_dir = get_database_dir()
-    if not os.path.exists(database_dir):
-        os.mkdir(database_dir)
+    with _paths_lock:
+        database_dir = get_database_dir()
+        if database_dir not in _created_paths:
+            StorageHelper.get_storage_class(database_dir).create_dir(database_dir)
+            _created_paths.add(database_dir)
 
-    class_dir = get_class_database_dir(class_name)
-    if not os.path.exists(class_dir):
-        os.mkdir(class_dir)
+        class_dir = get_class_database_dir(class_name)
+        if class_dir not in _created_paths:
+            StorageHelper.get_storage_class(class_dir).create_dir(class_dir)
+            _created_paths.add(class_dir)
+
+
+# Delete a file if exists, closing it first
+def delete_file(file_name: str):
+    with _paths_lock:
+        FileHandleHelper.close_file(file_name)
+        _created_paths.discard(file_name)
+
+        StorageHelper.get_storage_class(file_name).remove(file_name)
 
 
 def create_file(file_name: str):
-    if not os.path.exists(file_name):
-        buffer = open(file_name, 'w')
-        buffer.close()
+    with _paths_lock:
+        if file_name not in _created_paths:
+            StorageHelper.get_storage_class(file_name).create(file_name)
+            _created_paths.add(file_name)
+
+
+# Return if the file exists in its storage
+def file_exists(file_name: str) -> bool:
+    return StorageHelper.get_storage_class(file_name).exists(file_name)
+
+
+# Replace the destination file by the source one, closing both first
+# The open files would keep pointing to the replaced files
+def replace_file(source_name: str, destination_name: str):
+    with _paths_lock:
+        FileHandleHelper.close_file(source_name)
+        FileHandleHelper.close_file(destination_name)
+        _created_paths.discard(source_name)
+
+        StorageHelper.get_storage_class(destination_name).replace(source_name, destination_name)
+
+
+# Change the storage of the database classes without their own storage
+# The open files are closed, so they are opened again in the new storage
+def set_storage_type(storage_type: str):
+    with _paths_lock:
+        StorageHelper.set_default_storage_type(storage_type)
+        _forget_paths_inside(get_database_dir())
+
+
+# Change the storage of the files of a database class, its indexes included
+def set_class_storage_type(class_name: str, storage_type: str):
+    with _paths_lock:
+        StorageHelper.set_dir_storage_type(get_class_database_dir(class_name), storage_type)
+        _forget_paths_inside(get_class_database_dir(class_name))
+
+
+# Close the open files inside the dir and forget the paths created there
+def _forget_paths_inside(dir_name: str):
+    FileHandleHelper.close_files_inside(dir_name, _DIRECTORY_SEPARATOR)
+    _created_paths.difference_update(
+        [path for path in _created_paths if path == dir_name or path.startswith(dir_name + _DIRECTORY_SEPARATOR)])
@@ -0,0 +1,103 @@
+import atexit
+import threading
+
+import Database.Helpers.StorageHelper as StorageHelper
+from Database.Storage.Storage import Storage
+
+# Open files shared by all table managers, one storage for each file name
+_open_files = {}
+
+# Lock of each file, the seek and the read or write of a record must be done together
+_file_locks = {}
+
+# Protects the dicts of open files and locks
+_helper_lock = threading.Lock()
+
+
+# Return the open file, opening it in the first use with the storage of its dir
+# Every manager of a file uses the same storage, so it reads what the others wrote
+def get_file(file_name: str) -> Storage:
+    with _helper_lock:
+        storage = _open_files.get(file_name)
+
+        if storage is None:
+            storage = StorageHelper.get_storage_class(file_name)(file_name)
+            _open_files[file_name] = storage
+
+    return storage
+
+
+# Return the lock of the file
+def get_file_lock(file_name: str) -> threading.Lock:
+    with _helper_lock:
+        lock = _file_locks.get(file_name)
+
+        if lock is None:
+            lock = threading.Lock()
+            _file_locks[file_name] = lock
+
+    return lock
+
+
+# Return the bytes of the whole file to be only read, files on disk are mapped and not copied
+def map_file(file_name: str):
+    return StorageHelper.get_storage_class(file_name).map(file_name)
+
+
+# Return the size of the file in bytes
+def get_file_size(file_name: str) -> int:
+    return get_file(file_name).size()
+
+
+# Remove all data of the file
+def clear_file(file_name: str):
+    truncate_file(file_name, 0)
+
+
+# Remove the data of the file after the size in bytes
+def truncate_file(file_name: str, size: int):
+    storage = get_file(file_name)
+
+    with get_file_lock(file_name):
+        storage.truncate(size)
+
+
+# Make the written data of the file durable
+def sync_file(file_name: str):
+    storage = get_file(file_name)
+
+    with get_file_lock(file_name):
+        storage.sync()
+
+
+# Close the file if it is open, needed before deleting or replacing it
+def close_file(file_name: str):
+    with _helper_lock:
+        storage = _open_files.pop(file_name, None)
+
+    if storage is not None:
+        # Waits the record being read or written
+        with get_file_lock(file_name):
+            storage.close()
+
+
+# Close all open files inside the dir
+def close_files_inside(dir_name: str, separator: str):
+    with _helper_lock:
+        file_names = [name for name in _open_files if name.startswith(dir_name + separator)]
+
+    for file_name in file_names:
+        close_file(file_name)
+
+
+# Close all open files, the storages that keep part of a file only in memory write it when they're closed
+def close_all_files():
+    with _helper_lock:
+        file_names = list(_open_files)
+
+    for file_name in file_names:
+        close_file(file_name)
+
+
+# The files are closed when the process exits, so the mapped files are cut in the size of their data
+atexit.register(close_all_files)
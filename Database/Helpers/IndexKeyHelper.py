@@ -0,0 +1,35 @@
+import Database.Cons.SupportedTypes as SupportedTypes
+import Database.Helpers.ReadWriteHelper as ReadWriteHelper
+import Database.Helpers.StructDataHelper as StructDataHelper
+from Database.Cons.Encode import DEFAULT_STR_ENCONDE
+
+
+# Return the key as it's saved in the nodes of the index class
+# Nodes kept in memory must have the same keys as the ones read from the file
+def normalize_key(node_class: type, key):
+    if node_class.keys_type == SupportedTypes.STRING_NAME and isinstance(key, str):
+        return ReadWriteHelper.normalize_str(key, node_class.keys_size_string)
+
+    # An int key of a float index is read back as a float
+    if node_class.keys_type == SupportedTypes.FLOAT_NAME and isinstance(key, int):
+        return float(key)
+
+    return key
+
+
+# Return the content as it's saved in the nodes of the index class
+def normalize_content(node_class: type, content):
+    if node_class.contents_type == SupportedTypes.STRING_NAME and isinstance(content, str):
+        return ReadWriteHelper.normalize_str(content, node_class.contents_size_string)
+
+    return content
+
+
+# Return the bytes of a normalized key, the same in every execution, used to hash it
+def get_key_bytes(key) -> bytes:
+    if isinstance(key, str):
+        return key.encode(DEFAULT_STR_ENCONDE)
+    elif isinstance(key, float):
+        return StructDataHelper.convert_to_bin_float(key)
+    else:
+        return StructDataHelper.convert_to_bin_int(key)
@@ -1,18 +1,44 @@
 import inspect
+import math
+import weakref
 
 import Database.Cons.File as File
 import Database.Cons.SupportedTypes as SupportedTypes
 import Database.Error.ClassError as ClassError
 
 
+# Columns of each class, the members of a class are inspected only in its first use
+_class_columns = weakref.WeakKeyDictionary()
+
+# Record size of each class, computed in its first use
+_class_sizes = weakref.WeakKeyDictionary()
+
+
 # FUNCTIONS
 
 # Return a list with the columns name of a object
+# Properties are computed from the columns, so they aren't saved
 def get_columns(obj_class: type) -> list:
+    # Objects may have attributes that their classes haven't, so only the columns of classes are kept
+    if not isinstance(obj_class, type):
+        return _inspect_columns(obj_class)
+
+    columns = _class_columns.get(obj_class)
+
+    if columns is None:
+        columns = _inspect_columns(obj_class)
+        _class_columns[obj_class] = columns
+
+    return list(columns)
+
+
+# Return the sorted names of the members that are saved, inspecting the class or object
+def _inspect_columns(obj_class) -> list:
     data = [a[0] for a in (inspect.getmembers(obj_class,
                                               lambda a: not (inspect.isroutine(a)
                                                              or inspect.ismethod(a)
-                                                             or inspect.isfunction(a))))
+                                                             or inspect.isfunction(a)
+                                                             or isinstance(a, property))))
             if not (a[0].startswith('__') and a[0].endswith('__'))]
     data.sort()
 
@@ -30,6 +56,11 @@ def get_class_name(obj_class: type) -> str:
     return name
 
 
+# Return the storage size in bytes of the exists flag in the start of each record
+def get_exists_flag_size() -> int:
+    return SupportedTypes.get_primitive_attribute_size_by_name(get_type_name(File.FLAG_EXISTS))
+
+
 # Return the name of the primitive type of a attribute
 def get_type_name(attribute) -> str:
     return type(attribute).__name__
@@ -37,6 +68,17 @@ def get_type_name(attribute) -> str:
 
 # Return the storage size in bytes of a class
 def get_class_size(obj_class: type) -> int:
+    size = _class_sizes.get(obj_class)
+
+    if size is None:
+        size = _compute_class_size(obj_class)
+        _class_sizes[obj_class] = size
+
+    return size
+
+
+# Sum the sizes of the saved columns of the class
+def _compute_class_size(obj_class: type) -> int:
     columns = get_columns(obj_class)
     size = 0
 
@@ -45,7 +87,14 @@ def get_class_size(obj_class: type) -> int:
             size = size + get_column_size(obj_class, column)
 
     # Sum the size of exists flag
-    return size + SupportedTypes.get_primitive_attribute_size_by_name(get_type_name(File.FLAG_EXISTS))
+    size = size + get_exists_flag_size()
+
+    # Records of classes with a page size fill whole pages
+    page_size = getattr(obj_class, SupportedTypes.RECORD_PAGE_SIZE_VARIABLE, None)
+    if page_size is not None:
+        size = math.ceil(size / page_size) * page_size
+
+    return size
 
 
 # Return the size of a supported type in a obj
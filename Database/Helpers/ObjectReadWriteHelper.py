@@ -1,40 +1,31 @@
 # Return a read value and a bool that says if is the end of the obj
 import _io
+import weakref
 
 import Database.Cons.File as File
 import Database.Cons.SupportedTypes as SupportedTypes
 import Database.Helpers.ObjectHelper as ObjectHelper
 import Database.Helpers.ReadWriteHelper as ReadWriteHelper
 
+# Saved columns of each class with what is needed to read and write them, found only in the first use of the class
+_class_layouts = weakref.WeakKeyDictionary()
+
 
 # Write a object starting from the set seek of the buffer
 # Types with support: String, Int, Float, Boolean
 def write_obj(buffer: _io.BufferedRandom, obj: object, obj_class: type):
-    columns = ObjectHelper.get_columns(obj_class)
-
+    obj.prepare_save()
     _write_exists_flag(buffer)
 
-    for column in columns:
-        if not ObjectHelper.is_info_variable(column):
-            value = getattr(obj, column)
-            column_type_name = ObjectHelper.get_type_name(getattr(obj, column))
-
-            if column_type_name in SupportedTypes.COMPLEX_TYPES_NAME:
-                if column_type_name == SupportedTypes.STRING_NAME:
-                    max_size = ObjectHelper.get_attribute_size(obj, column)
-                    ReadWriteHelper.write_complex_value(buffer, value, max_size)
-                else:  # List type
-                    list_type = ObjectHelper.get_list_type_attribute(obj, column)
+    for column, column_type_name, max_size, list_type, list_string_size in _get_layout(obj_class):
+        value = getattr(obj, column)
 
-                    list_string_type_size = None
-                    if list_type == SupportedTypes.STRING_NAME:
-                        list_string_type_size = ObjectHelper.get_attribute_list_string_size(obj, column)
-
-                    max_size = ObjectHelper.get_attribute_size(obj, column)
-                    ReadWriteHelper.write_complex_value(
-                        buffer, value, max_size, list_type, list_string_type_size)
-            else:
-                ReadWriteHelper.write_primitive_value(buffer, value)
+        if column_type_name == SupportedTypes.STRING_NAME:
+            ReadWriteHelper.write_complex_value(buffer, value, max_size)
+        elif column_type_name == SupportedTypes.LIST_NAME:
+            ReadWriteHelper.write_complex_value(buffer, value, max_size, list_type, list_string_size)
+        else:
+            ReadWriteHelper.write_primitive_value(buffer, value)
 
 
 # Write the initial flag of any object
@@ -56,29 +47,13 @@ def read_obj(buffer: _io.BufferedRandom, obj_class: type):
 
     obj = obj_class()
 
-    columns = ObjectHelper.get_columns(obj_class)
-
-    for column in columns:
-        if not ObjectHelper.is_info_variable(column):
-            value = getattr(obj_class, column)
-            column_type_name = ObjectHelper.get_type_name(getattr(obj_class, column))
-
-            if column_type_name in SupportedTypes.COMPLEX_TYPES_NAME:
-                if column_type_name == SupportedTypes.STRING_NAME:
-                    max_size = ObjectHelper.get_attribute_size(obj_class, column)
-                    setattr(obj, column, ReadWriteHelper.read_complex_type(buffer, value, max_size))
-                else:  # Complex type list
-                    max_size = ObjectHelper.get_attribute_size(obj_class, column)
-                    list_type = ObjectHelper.get_list_type_attribute(obj_class, column)
-                    list_string_size = None
-
-                    if list_type == SupportedTypes.STRING_NAME:
-                        list_string_size = ObjectHelper.get_attribute_list_string_size(obj_class, column)
-
-                    setattr(obj, column, ReadWriteHelper.read_complex_type(
-                        buffer, value, max_size, list_type, list_string_size))
-            else:
-                setattr(obj, column, ReadWriteHelper.read_primitive_type(buffer, value))
+    for column, column_type_name, max_size, list_type, list_string_size in _get_layout(obj_class):
+        if column_type_name == SupportedTypes.STRING_NAME:
+            setattr(obj, column, ReadWriteHelper.read_str(buffer, max_size))
+        elif column_type_name == SupportedTypes.LIST_NAME:
+            setattr(obj, column, ReadWriteHelper.read_list(buffer, max_size, list_type, list_string_size))
+        else:
+            setattr(obj, column, ReadWriteHelper.read_primitive_type(buffer, getattr(obj_class, column)))
 
     obj.initialize()
     
@@ -91,4 +66,35 @@ def delete_obj(buffer: _io.BufferedRandom):
     exists = ReadWriteHelper.read_bool(buffer)
     if exists:
         buffer.seek(pos, File.ABSOLUTE_FILE_POSITION)
-        _write_not_exists_flag(buffer)
\ No newline at end of file
+        _write_not_exists_flag(buffer)
+
+
+# Return the (column, type name, max size, list type, list string size) of each saved column of the class
+# The class attributes are read once, the records of a class always have the same layout
+def _get_layout(obj_class: type) -> list:
+    layout = _class_layouts.get(obj_class)
+
+    if layout is None:
+        layout = []
+
+        for column in ObjectHelper.get_columns(obj_class):
+            if not ObjectHelper.is_info_variable(column):
+                column_type_name = ObjectHelper.get_type_name(getattr(obj_class, column))
+                max_size = None
+                list_type = None
+                list_string_size = None
+
+                if column_type_name in SupportedTypes.COMPLEX_TYPES_NAME:
+                    max_size = ObjectHelper.get_attribute_size(obj_class, column)
+
+                    if column_type_name == SupportedTypes.LIST_NAME:
+                        list_type = ObjectHelper.get_list_type_attribute(obj_class, column)
+
+                        if list_type == SupportedTypes.STRING_NAME:
+                            list_string_size = ObjectHelper.get_attribute_list_string_size(obj_class, column)
+
+                layout.append((column, column_type_name, max_size, list_type, list_string_size))
+
+        _class_layouts[obj_class] = layout
+
+    return layout
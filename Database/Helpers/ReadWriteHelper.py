@@ -43,37 +43,13 @@ def write_float(buffer: _io.BufferedRandom, value: float):
     buffer.write(StructDataHelper.convert_to_bin_float(value))
 
 
+# The string is written with a single write, the space after its chars is filled with string end chars
 def write_str(buffer: _io.BufferedRandom, value: str, max_size: int):
-    stop_count = 0
-    value = _remove_invalid_char(value)
-
-    for char in value:
-        buffer.write(StructDataHelper.convert_to_bin_char(char))
-
-        stop_count = stop_count + 1
-
-        if stop_count == max_size:
-            break
-
-    # Test size to write end of string
-    if max_size > stop_count:
-        buffer.write(StructDataHelper.convert_to_bin_char(SupportedTypes.STRING_END))
-        stop_count = stop_count + 1
-
-    # Seek the empty space
-    if max_size > stop_count:
-        # Gets the end of the file
-        pos = buffer.tell()
-        # Then seek to the end of the string max_size and write other end to preserve the fixed size
-        # The minus one is to preserve the space for string final
-        buffer.seek(pos + (max_size - stop_count - 1)*SupportedTypes.CHAR_SIZE, File.ABSOLUTE_FILE_POSITION)
-        buffer.write(StructDataHelper.convert_to_bin_char(SupportedTypes.STRING_END))
+    buffer.write(StructDataHelper.convert_to_bin_str(_remove_invalid_char(value), max_size))
 
 
 # A LIST NEED TO BE COMPOSED WITH JUST ONE TYPE
 def write_list(buffer: _io.BufferedRandom, values: list, max_size: int, list_type: str, list_string_size: None):
-    stop_count = 0
-
     # Verify if the type is valid
     if list_type not in SupportedTypes.PRIMITIVE_TYPES_NAMES_FOR_LIST:
         raise ReadWriteError.WritingAListOfInvalidType('Type ' + list_type + ' isn`t supported in lists!')
@@ -91,25 +67,21 @@ def write_list(buffer: _io.BufferedRandom, values: list, max_size: int, list_typ
     # First write the list size
     write_primitive_value(buffer, len(values))
 
-    # Second write the values
-    for value in values:
-        value_type = ObjectHelper.get_type_name(value)
-
-        # Verify if the current value type is equal to given param type (Lists should be just one value type)
-        if value_type != list_type:
-            raise ReadWriteError.WritingAListWithDifferentTypes(
-                'List with multiple types!')
-
-        if list_type == SupportedTypes.STRING_NAME:
-            write_complex_value(buffer, value, list_string_size)
-        else:
-            write_primitive_value(buffer, value)
+    # Verify if the values type is equal to given param type (Lists should be just one value type)
+    if any(value_type.__name__ != list_type for value_type in set(map(type, values))):
+        raise ReadWriteError.WritingAListWithDifferentTypes(
+            'List with multiple types!')
 
-        stop_count = stop_count + 1
+    # Second write the values, all converted together and written with a single write
+    if list_type == SupportedTypes.STRING_NAME:
+        buffer.write(b''.join([StructDataHelper.convert_to_bin_str(_remove_invalid_char(value), list_string_size)
+                               for value in values]))
+    else:
+        buffer.write(StructDataHelper.convert_to_bin_list(values, list_type))
 
     # If not a complete array, seek for the final and write a symbolic empty value
     if len(values) < max_size:
-        write_list_end_values(buffer, list_type, stop_count, max_size, list_string_size)
+        write_list_end_values(buffer, list_type, len(values), max_size, list_string_size)
 
 
 # Write empty values to complete the list size
@@ -146,7 +118,17 @@ def write_list_end_values(
     buffer.write(convert_function(end))
 
 
+# Return the string as it's read after being written: without invalid chars, with at most max_size chars and ending
+# before the first string end char
+def normalize_str(value: str, max_size: int) -> str:
+    return _remove_invalid_char(value)[:max_size].split(SupportedTypes.STRING_END, 1)[0]
+
+
 def _remove_invalid_char(value: str) -> str:
+    # Most strings have only ascii chars, they don't change
+    if value.isascii():
+        return value
+
     value = unidecode(value)
     return re.sub(r'[^\x00-\x7f]', r' ', value)
 
@@ -194,42 +176,19 @@ def read_bool(buffer: _io.BufferedRandom) -> bool:
     return StructDataHelper.convert_from_bin_bool(buffer.read(SupportedTypes.BOOL_SIZE))
 
 
+# The whole string space is read with a single read, so the buffer is placed in the end of the string
 def read_str(buffer: _io.BufferedRandom, max_size: int) -> str:
-    value = ''
-    char_count = 0
-
-    # Remove one of the string end \0
-    while char_count < max_size:
-        new_char = StructDataHelper.convert_from_bin_char(buffer.read(SupportedTypes.CHAR_SIZE))
-
-        char_count = char_count + 1
-
-        # \0 is the end
-        if new_char == SupportedTypes.STRING_END:
-            break
-
-        value = value + new_char
-
-
-    # Place the buffer in the end of the string
-    buffer.seek(buffer.tell() + (max_size - char_count) * SupportedTypes.CHAR_SIZE, File.ABSOLUTE_FILE_POSITION)
-
-    return value
+    return StructDataHelper.convert_from_bin_str(buffer.read(max_size * SupportedTypes.CHAR_SIZE))
 
 
 def read_list(buffer: _io.BufferedRandom, max_size: int, list_type: str, list_string_size: int) -> list:
-    return_list = []
     list_size = StructDataHelper.convert_from_bin_int(buffer.read(SupportedTypes.INT_SIZE))
-    count = 0
 
     if list_type == SupportedTypes.INT_NAME:
-        convert_function = StructDataHelper.convert_from_bin_int
         type_size = SupportedTypes.INT_SIZE
     elif list_type == SupportedTypes.FLOAT_NAME:
-        convert_function = StructDataHelper.convert_from_bin_float
         type_size = SupportedTypes.FLOAT_SIZE
     elif list_type == SupportedTypes.BOOL_NAME:
-        convert_function = StructDataHelper.convert_from_bin_bool
         type_size = SupportedTypes.BOOL_SIZE
     elif list_type == SupportedTypes.STRING_NAME:
         # Plus one of the string end
@@ -237,17 +196,17 @@ def read_list(buffer: _io.BufferedRandom, max_size: int, list_type: str, list_st
     else:
         raise ReadWriteError.ReadingAListOfInvalidType('The list has this invalid type:' + list_type)
 
-    # Read all elements from the list
-    while count < list_size:
-        if list_type == SupportedTypes.STRING_NAME:
-            return_list.append(read_str(buffer, list_string_size))
-        else:
-            return_list.append(convert_function(buffer.read(type_size)))
+    # Read all elements from the list with a single read
+    data = buffer.read(list_size * type_size)
 
-        count = count + 1
+    if list_type == SupportedTypes.STRING_NAME:
+        return_list = [StructDataHelper.convert_from_bin_str(data[position:position + type_size])
+                       for position in range(0, len(data), type_size)]
+    else:
+        return_list = StructDataHelper.convert_from_bin_list(data, list_type)
 
     # Place the buffer in the end of the list
-    if count < max_size:
-        buffer.seek(buffer.tell() + (max_size - count) * type_size, File.ABSOLUTE_FILE_POSITION)
+    if list_size < max_size:
+        buffer.seek(buffer.tell() + (max_size - list_size) * type_size, File.ABSOLUTE_FILE_POSITION)
 
     return return_list
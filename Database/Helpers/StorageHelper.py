@@ -0,0 +1,56 @@
+import os
+
+import Database.Cons.StorageTypes as StorageTypes
+import Database.Error.StorageError as StorageError
+from Database.Storage.FileStorage import FileStorage
+from Database.Storage.MemoryStorage import MemoryStorage
+from Database.Storage.MmapStorage import MmapStorage
+
+# Storage class of each storage type
+_storage_classes = {
+    StorageTypes.FILE: FileStorage,
+    StorageTypes.MMAP: MmapStorage,
+    StorageTypes.MEMORY: MemoryStorage
+}
+
+# Storage type of the files inside each dir, the files outside them use the default type
+_dir_storage_types = {}
+
+# The environment can choose the default type, so a whole test run can keep the database in memory
+_default_storage_type = os.environ.get(StorageTypes.STORAGE_TYPE_VARIABLE, StorageTypes.FILE)
+
+
+# FUNCTIONS
+
+# Change the storage type of the files outside the dirs with their own type
+def set_default_storage_type(storage_type: str):
+    global _default_storage_type
+
+    _verify_storage_type(storage_type)
+    _default_storage_type = storage_type
+
+
+# Change the storage type of the files inside the dir
+def set_dir_storage_type(dir_name: str, storage_type: str):
+    _verify_storage_type(storage_type)
+    _dir_storage_types[dir_name] = storage_type
+
+
+# Return the storage class of the file or dir, the type of the innermost dir with a type is used
+def get_storage_class(path: str) -> type:
+    storage_type = _default_storage_type
+    type_dir = ''
+
+    for dir_name, dir_storage_type in list(_dir_storage_types.items()):
+        if (path == dir_name or path.startswith(dir_name + os.sep)) and len(dir_name) > len(type_dir):
+            storage_type = dir_storage_type
+            type_dir = dir_name
+
+    _verify_storage_type(storage_type)
+
+    return _storage_classes[storage_type]
+
+
+def _verify_storage_type(storage_type: str):
+    if storage_type not in _storage_classes:
+        raise StorageError.UnknownStorageType(storage_type)
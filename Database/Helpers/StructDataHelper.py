@@ -1,8 +1,16 @@
+import array
 import struct
 
 import Database.Cons.Encode as Encode
 import Database.Cons.SupportedTypes as SupportedTypes
 
+# Array type codes of the primitive types, the same formats of the struct functions
+_ARRAY_TYPE_CODES = {
+    SupportedTypes.INT_NAME: 'q',
+    SupportedTypes.FLOAT_NAME: 'd',
+    SupportedTypes.BOOL_NAME: 'b'
+}
+
 
 # FUNCTIONS -> CONVERT TO BINARY
 
@@ -27,6 +35,17 @@ def convert_to_bin_bool(value: bool) -> bytes:
     return struct.pack('b', value)
 
 
+# Convert a python list of ints, floats or bools to the binary structs of its values with a single call
+def convert_to_bin_list(values: list, list_type: str) -> bytes:
+    return array.array(_ARRAY_TYPE_CODES[list_type], values).tobytes()
+
+
+# Convert a python string to binary struct chars, filling the size with string end chars
+# value = String with valid chars only
+def convert_to_bin_str(value: str, size: int) -> bytes:
+    return value[:size].encode(Encode.DEFAULT_STR_ENCONDE).ljust(size * SupportedTypes.CHAR_SIZE, b'\0')
+
+
 # FUNCTIONS -> CONVERT FROM BINARY
 
 # Convert a binary struct double to a python float
@@ -51,3 +70,20 @@ def convert_from_bin_bool(value: bytes) -> bool:
         return False
 
     return struct.unpack('b', value)[0] == 1
+
+
+# Convert the binary structs of a list of ints, floats or bools to a python list with a single call
+def convert_from_bin_list(value: bytes, list_type: str) -> list:
+    values = array.array(_ARRAY_TYPE_CODES[list_type])
+    values.frombytes(value)
+
+    if list_type == SupportedTypes.BOOL_NAME:
+        return [item == 1 for item in values]
+
+    return values.tolist()
+
+
+# Convert binary struct chars to a python string, the string ends before the first string end char
+def convert_from_bin_str(value: bytes) -> str:
+    return value.split(SupportedTypes.STRING_END.encode(Encode.DEFAULT_STR_ENCONDE), 1)[0] \
+        .decode(Encode.DEFAULT_STR_ENCONDE)
@@ -1,38 +1,96 @@
+import bisect
+import itertools
 import math
-
-from Database.Error import ClassError
+import threading
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+
+from Database.Error import BTreeError
+from Database.Index.BTree import BTreeUpgrade, BTreeCons
+from Database.Index.BTree.BTreeNode import get_counted_node_class, get_paged_node_class
+from Database.Index.BTree.BTreeFreeNode import BTreeFreeNode
 from Database.Index.BTree.BTreeInfo import BTreeInfo
+from Database.Index.Bloom.BloomFilter import open_bloom_filter
 from Database.DBManager import DBManager
+from Database.ReadWriteLock import ReadWriteLock
 from Database.Cons import FileName
-import Database.Helpers.ListHelper as ListHelper
+import Database.Helpers.DirHelper as DirHelper
+import Database.Helpers.FileHandleHelper as FileHandleHelper
+import Database.Helpers.IndexKeyHelper as IndexKeyHelper
+import Database.Helpers.ObjectHelper as ObjectHelper
 
 
+# Threads: readers run in parallel with one writer (insert, insert_many or delete)
+# Readers hold the read latch of the node they read and only release the parent after latching the child (latch
+# coupling), the writer latches for writing just the nodes it will change. bulk_load and drop lock the whole tree
 class BTree:
-    def __init__(self, index_name: str, node_class: object, ref_class: object, content_class=None):
+    # With counted=True the intern nodes keep the size of each child subtree, allowing count, rank and select
+    # With a bloom false positive rate the keys are kept in a bloom filter too, lookups of missing keys usually stop
+    # there. Once created the filter is always kept by the index
+    # With a page size (BTreeCons.PAGE_SIZE_4K, 16K or 64K) the degree of the nodes comes from the page and each node
+    # is saved in one whole page of the file
+    def __init__(self, index_name: str, node_class: object, ref_class: object, content_class=None, counted=False,
+                 bloom_false_positive_rate=None, page_size=None):
+        if counted:
+            node_class = get_counted_node_class(node_class)
+        if page_size is not None:
+            node_class = get_paged_node_class(node_class, page_size)
+
         # Start the table managers for the index tree
+        self.counted = counted
         self.content_class = content_class
         self.node_class = node_class
+        self.ref_class = ref_class
         self.index_name = index_name
         self.btree_info = BTreeInfo()
+        # Last used nodes by id, the nodes are always saved in the file too
+        self.node_cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+        # Held for reading by every operation and for writing by the ones that replace all nodes
+        self.tree_lock = ReadWriteLock()
+        # Only one writer at a time
+        self.writer_lock = threading.Lock()
+        # Read-write latch of each node id and the latches held by the writer
+        self.node_latches = {}
+        self.latches_lock = threading.Lock()
+        self.write_latches = {}
+        # Ids of the nodes deleted by the writer, their latches are dropped when the writer releases its latches
+        self.freed_node_ids = set()
+        self.bloom_filter = None
         self.btree_info_table_manager = DBManager(
             BTreeInfo, self._get_index_dir(index_name), self._get_manager_name(), ref_class)
         self.btree_node_table_manager = DBManager(
             node_class, self._get_index_dir(index_name), self._get_node_manager_name(), ref_class)
+        # Ids of the deleted nodes, the new nodes use them before growing the node file
+        self.free_node_table_manager = DBManager(
+            BTreeFreeNode, self._get_index_dir(index_name), FileName.INDEX_FREE, ref_class)
+
+        # Rebuild index files saved with an old format
+        BTreeUpgrade.upgrade_if_needed(self, self._get_index_dir(index_name), ref_class)
 
         # Load root if exists, if not create one
         if not self._get_btree_info():
             self._create_root()
 
+        self.bloom_filter = open_bloom_filter(self._get_index_dir(index_name), ref_class, bloom_false_positive_rate)
+        if self.bloom_filter is not None and not self.bloom_filter.loaded:
+            self.bloom_filter.rebuild(self._read_keys())
+
     # Return a list of the contents with the key
     def find_contents(self, key) -> list:
-        root = self._get_root()
-        contents_id, found = self._deep_search_by_key(root, key)
+        key = IndexKeyHelper.normalize_key(self.node_class, key)
+        contents_id = []
 
-        # If found return the contents
-        if found:
+        if self.bloom_filter is not None and not self.bloom_filter.might_contain(key):
             return contents_id
-        else:  # If not return empty list
-            return []
+
+        with self.tree_lock.read_locked(), self._read_latched(self.btree_info.root_id) as root:
+            self._find_contents_by_key(root, key, contents_id)
+
+        if self.bloom_filter is not None and len(contents_id) == 0:
+            self.bloom_filter.count_false_positive()
+
+        return contents_id
 
     # Return a list of the contents with the key
     def find(self, key) -> list:
@@ -69,17 +127,23 @@ class BTree:
 
     # Return the id of the object with the key and content
     def find_with_key_and_content(self, key, content):
-        root = self._get_root()
-        node, position, found = self._deep_search_by_key_and_content(root, key, content)
+        key, content = self._normalize(key, content)
+
+        if self.bloom_filter is not None and not self.bloom_filter.might_contain(key):
+            return None
+
+        with self.tree_lock.read_locked():
+            node, position, found = self._search_entry(key, content, [])
 
         # If found return the content
         if found:
-            return node.contents[position]
+            return content
         else:  # If not return None
             return None
 
-    def find_n_smallest(self, n):
-        smallest_list = self._find_n_smallest(n)
+    # Return the contents of the n smallest keys, skipping the offset smallest ones
+    def find_n_smallest(self, n, offset=0):
+        smallest_list = self._find_n_smallest(n, offset)
 
         if self.content_class is not None:
             contents_obj = []
@@ -91,8 +155,9 @@ class BTree:
         else:
             return smallest_list
 
-    def find_n_biggest(self, n):
-        biggest_list = self._find_n_biggest(n)
+    # Return the contents of the n biggest keys, skipping the offset biggest ones
+    def find_n_biggest(self, n, offset=0):
+        biggest_list = self._find_n_biggest(n, offset)
 
         if self.content_class is not None:
             contents_obj = []
@@ -106,146 +171,450 @@ class BTree:
 
     # Insert and update a key with it's content
     def insert(self, key, content):
-        # Get the root node
-        root = self._get_root()
+        key, content = self._normalize(key, content)
 
-        # Verify if the tree is empty
-        if len(root.keys) != 0:
-            self._insert_non_empty_node(key, content)
-        else:
-            self._insert_empty_node(root, key, content)
+        with self._writing():
+            self._add_to_bloom_filter([key])
+
+            # Get the root node
+            root = self._get_root()
+
+            # Verify if the tree is empty
+            if len(root.keys) != 0:
+                self._insert_non_empty_node(key, content)
+            else:
+                self._insert_empty_node(root, key, content)
+
+    # Insert a list of (key, content), the pairs are sorted and all pairs of the same leaf are inserted together
+    def insert_many(self, pairs):
+        entries = sorted(self._normalize(key, content) for key, content in pairs)
+
+        with self._writing():
+            self._add_to_bloom_filter([key for key, content in entries])
+
+            position = 0
+            while position < len(entries):
+                position = self._insert_leaf_entries(entries, position)
+
+    # Add the delta to the content of the key, a key that isn't in the tree is inserted with the delta as content
+    # Use for counters, where each key has just one content. The content is changed in the node found by the descent
+    # Return the content before the increment, None if the key was inserted
+    def increment(self, key, delta):
+        key = IndexKeyHelper.normalize_key(self.node_class, key)
+
+        with self._writing():
+            node, position, path = self._search_key(key)
+
+            if position is not None:
+                self._write_latch(node)
+                content = node.contents[position]
+                node.contents[position] = content + delta
+                self._save_node(node)
+
+                return content
+
+            self._add_to_bloom_filter([key])
+
+            if len(node.keys) != 0:
+                self._latch_for_insert(node, path, [key])
+                self._update_path_counts(path, 1)
+                self._insert_leaf_node(node, key, delta, path)
+            else:
+                self._insert_empty_node(node, key, delta)
+
+            return None
+
+    # Change the key of the entry with the old key and the content, like a delete and an insert
+    # When the new entry belongs to the same leaf it's moved inside the leaf, like a count that changes by a few uses
+    # Return True in success and False if the old key and content don't exist
+    def move(self, old_key, new_key, content) -> bool:
+        old_key, content = self._normalize(old_key, content)
+        new_key = IndexKeyHelper.normalize_key(self.node_class, new_key)
+
+        with self._writing():
+            path = []
+            node, position, found = self._search_entry(old_key, content, path)
+
+            if not found:
+                return False
+
+            self._add_to_bloom_filter([new_key])
+
+            lower_bound = self._get_lower_bound(path)
+            upper_bound = self._get_upper_bound(path)
+
+            if self._is_leaf(node) and (lower_bound is None or lower_bound < (new_key, content)) \
+                    and (upper_bound is None or (new_key, content) < upper_bound):
+                keys = node.keys[:position] + node.keys[position + 1:]
+                contents = node.contents[:position] + node.contents[position + 1:]
+                new_position = bisect.bisect_left(list(zip(keys, contents)), (new_key, content))
+                keys.insert(new_position, new_key)
+                contents.insert(new_position, content)
+
+                if node.can_keep(keys):
+                    self._write_latch(node)
+                    node.keys = keys
+                    node.contents = contents
+                    self._save_node(node)
+
+                    return True
+
+            self._delete_key_from_node_by_position(node, position, path)
+            self._release_write_latches()
+
+            root = self._get_root()
+            if len(root.keys) != 0:
+                self._insert_non_empty_node(new_key, content)
+            else:
+                self._insert_empty_node(root, new_key, content)
+
+            return True
 
     # Delete the key and it's content from BTree
     # Return True in success and False if key doesn't exists
     def delete(self, key, content) -> bool:
-        # Get the root node
-        root = self._get_root()
+        key, content = self._normalize(key, content)
 
-        # Verify if the tree is empty
-        if len(root.keys) != 0:
-            return self._delete_by_key_and_content(key, content)
-        else:
-            return False
+        with self._writing():
+            # Get the root node
+            root = self._get_root()
+
+            # Verify if the tree is empty
+            if len(root.keys) != 0:
+                return self._delete_by_key_and_content(key, content)
+            else:
+                return False
 
     # Return the smallest value
     def find_smallest(self):
-        node = self._get_predecessor_child(self._get_root(), 0)
+        with self.tree_lock.read_locked():
+            latch, node = self._read_root()
+
+            try:
+                # Go to the predecessor child of the first root key
+                if len(node.children_ids) == 0:
+                    return None
+
+                latch, node = self._read_child(latch, node.children_ids[0])
+                while not self._is_leaf(node):
+                    latch, node = self._read_child(latch, node.children_ids[len(node.children_ids) - 1])
+
+                if len(node.contents) > 0:
+                    return node.contents[0]
+                else:
+                    return None
+            finally:
+                latch.release_read()
+
+    # Return the number of keys between lo and hi (both included), None means no limit
+    # Only for counted trees
+    def count(self, lo=None, hi=None) -> int:
+        self._verify_counted()
 
-        if node is not None and len(node.contents) > 0:
-            return node.contents[0]
+        with self.tree_lock.read_locked():
+            with self._read_latched(self.btree_info.root_id) as root:
+                total = self._get_subtree_count(root)
+
+            if hi is not None:
+                total = self._count_smaller(hi, True)
+            if lo is not None:
+                total = total - self._count_smaller(lo, False)
+
+        return max(total, 0)
+
+    # Return the number of keys smaller than the key, that is the position of its first occurrence in ascending order
+    # Only for counted trees
+    def rank(self, key) -> int:
+        self._verify_counted()
+
+        with self.tree_lock.read_locked():
+            return self._count_smaller(key, False)
+
+    # Return the content of the key in the position k of the ascending order, starting from zero
+    # Only for counted trees
+    def select(self, k):
+        self._verify_counted()
+
+        with self.tree_lock.read_locked():
+            content = self._select(k)
+
+        if self.content_class is not None:
+            dbm = DBManager(self.content_class)
+            return dbm.find_by_id(content)
         else:
-            return None
+            return content
+
+    # Replace all index data by the (key, content) pairs, building full nodes from the leaves up
+    # The new tree is written in new files that replace the index files at the end
+    def bulk_load(self, pairs):
+        with self.tree_lock.write_locked():
+            self._bulk_load(sorted(pairs))
+
+    # Write the tree again in full nodes, without the space of the deleted nodes
+    # Like bulk_load the tree is locked while the new files are written
+    def vacuum(self):
+        with self.tree_lock.write_locked():
+            self._bulk_load(sorted(BTreeUpgrade.read_entries(self.btree_info_table_manager,
+                                                             self.btree_node_table_manager)))
 
     # Drop all index data
     def drop(self):
-        self.btree_info_table_manager.drop()
+        with self.tree_lock.write_locked():
+            self._clear_cache()
+            self.btree_info_table_manager.drop()
+
+    # Return the file with the tree info, it doesn't exist after the index is dropped
+    def get_info_file(self) -> str:
+        return self.btree_info_table_manager.table_file
+
+    # Return all (key, content) of the tree saved for the index, empty if there isn't one
+    # The other index types start with these entries when an index that was a BTree changes its type
+    # The tree is the one open in the index registry, so the entries aren't read while other user changes it
+    @staticmethod
+    def read_saved_entries(index_name: str, node_class: object, ref_class: object, content_class=None) -> list:
+        # The registry imports the index types, it's imported here to not import this module again
+        import Database.Index.IndexRegistry as IndexRegistry
+
+        index_dir = index_name + FileName.INDEX_SEPARATOR + node_class.get_node_type()
+        info_file = DirHelper.get_index_file(ObjectHelper.get_class_name(ref_class), index_dir, FileName.INDEX_MANAGER)
+
+        if not DirHelper.file_exists(info_file) or FileHandleHelper.get_file_size(info_file) == 0:
+            return []
+
+        btree = IndexRegistry.get_btree(index_name, node_class, ref_class, content_class)
+
+        with btree.tree_lock.read_locked():
+            return BTreeUpgrade.read_entries(btree.btree_info_table_manager, btree.btree_node_table_manager)
+
+    ####################################################################################################################
+    # BTree bulk load aux functions
+
+    # Write the tree of the sorted entries in new files and replace the index files by them
+    def _bulk_load(self, entries):
+        info_manager, node_manager = BTreeUpgrade.create_rewrite_managers(
+            self._get_index_dir(self.index_name), self.node_class, self.ref_class)
+
+        keys = [entry[0] for entry in entries]
+        contents = [entry[1] for entry in entries]
+        children = []
+        counts = []
+
+        # Each level is split in nodes and the keys between them go to the level above, until only the root is left
+        while True:
+            keys, contents, children, counts = self._build_level(node_manager, keys, contents, children, counts)
+            if len(children) == 1:
+                break
+
+        btree_info = BTreeInfo()
+        btree_info.root_id = children[0]
+        info_manager.save(btree_info)
+
+        # The filter has the old and the new keys while the files are replaced, then only the new ones
+        self._add_to_bloom_filter([entry[0] for entry in entries])
+
+        # The new node file has no deleted nodes, the free ids are removed before an id could point to a used node
+        FileHandleHelper.clear_file(self.free_node_table_manager.table_file)
+
+        BTreeUpgrade.replace_index_files(
+            info_manager, node_manager, self.btree_info_table_manager, self.btree_node_table_manager)
+        self.btree_info = btree_info
+        self._clear_cache()
+
+        if self.bloom_filter is not None:
+            self.bloom_filter.rebuild([entry[0] for entry in entries])
+
+    ####################################################################################################################
+    # BTree bloom filter aux functions
+
+    # Add the keys to the bloom filter before they reach the nodes, a reader that would find a key always passes the
+    # filter. A filter without space for the keys is rebuilt bigger
+    def _add_to_bloom_filter(self, keys: list):
+        if self.bloom_filter is not None:
+            if self.bloom_filter.needs_rebuild(len(keys)):
+                self.bloom_filter.rebuild(self._read_keys() + keys)
+            else:
+                self.bloom_filter.add_many(keys)
+
+    # Return the keys of all entries, read from the files
+    def _read_keys(self) -> list:
+        return [key for key, content in BTreeUpgrade.read_entries(
+            self.btree_info_table_manager, self.btree_node_table_manager)]
 
     ####################################################################################################################
     # BTree insert aux functions
+    # The nodes don't know their parents, every function that changes more than one level receives the path used in
+    # the descent: a list of (node, child position) from the root to the parent of the current node
 
     # Insert when the node is not empty
     def _insert_non_empty_node(self, key, content):
-        node, found = self._search(key)
+        node, path = self._search(key, content)
 
-        self._insert_leaf_node(node, key, content)
+        self._latch_for_insert(node, path, [key])
+        self._update_path_counts(path, 1)
+        self._insert_leaf_node(node, key, content, path)
 
-    # Split the node and insert in the right position
-    def _split_node(self, node):
-        parent_node = self._get_node_by_id(node.parent_id)
+    # Insert in the leaf of the entry in the position the next entries that belong to the same leaf
+    # A split changes the path, so it stops after the leaf is split
+    # Return the position of the first entry not inserted
+    def _insert_leaf_entries(self, entries, position) -> int:
+        key, content = entries[position]
+        node, path = self._search(key, content)
+        upper_bound = self._get_upper_bound(path)
 
-        # Get the middle position to split
-        middle = ListHelper.find_middle_position(node.keys)
-
-        # Create a new left node
-        left_node = self.node_class()
-        left_node.keys = node.keys[:middle]
-        left_node.contents = node.contents[:middle]
-        left_node.children_ids = node.children_ids[:middle + 1]
-        # Utilize the node if parent_node exists
-        if parent_node:
-            left_node.id = node.id
-            left_node.saved = node.saved
-            left_node.parent_id = node.parent_id
-            # Remove to add in the right order after
-            parent_node.children_ids.remove(node.id)
-        else:
-            left_node.parent_id = node.id
-        # Save in database
-        self.btree_node_table_manager.save(left_node)
+        # The leaf can get one key more than the size, then it's split
+        addable = node.count_addable([key for key, content in entries[position:position + node.keys_size + 1]])
+        end = position
+        while end < len(entries) and end - position <= addable \
+                and (upper_bound is None or entries[end] <= upper_bound):
+            end = end + 1
 
-        # Update the children
-        self._update_children_id(left_node)
+        self._latch_for_insert(node, path, [key for key, content in entries[position:end]])
 
-        # Create a new right node
-        right_node = self.node_class()
-        right_node.keys = node.keys[middle + 1:]
-        right_node.contents = node.contents[middle + 1:]
-        right_node.children_ids = node.children_ids[middle + 1:]
-        if parent_node:
-            right_node.parent_id = node.parent_id
+        for key, content in entries[position:end]:
+            self._insert_key_in_leaf(node, key, content)
+
+        self._update_path_counts(path, end - position)
+
+        if node.is_overflowing():
+            self._split_node(node, path)
         else:
-            right_node.parent_id = node.id
-        # Save in database
-        self.btree_node_table_manager.save(right_node)
+            self._save_node(node)
+
+        # Readers can see the leaf before the next one is written
+        self._release_write_latches()
+
+        return end
+
+    # Latch for writing the nodes changed when new keys are added to the leaf: the leaf and, when it's split, the
+    # parents that can't add a key and are split too and the parent that gets the last middle key
+    # Each node class tells if it can add a key, front coded nodes count the page
+    # In counted trees the whole path changes
+    def _latch_for_insert(self, node, path, new_keys):
+        nodes = [parent for parent, position in path] + [node]
+        top = len(nodes) - 1
+
+        if self.counted:
+            top = 0
+        elif node.count_addable(new_keys) < len(new_keys):
+            top = top - 1
+            while top > 0 and not nodes[top].can_add_key():
+                top = top - 1
+
+        for latched_node in nodes[max(top, 0):]:
+            self._write_latch(latched_node)
+
+    # Return the biggest (key, content) that can be inserted in the node at the end of the path
+    # It's the entry after the node in the nearest parent, None if the node is the last of the tree
+    @staticmethod
+    def _get_upper_bound(path):
+        for parent, position in reversed(path):
+            if position < len(parent.keys):
+                return parent.keys[position], parent.contents[position]
+
+        return None
+
+    # Return the smallest (key, content) that can be inserted in the node at the end of the path
+    # It's the entry before the node in the nearest parent, None if the node is the first of the tree
+    @staticmethod
+    def _get_lower_bound(path):
+        for parent, position in reversed(path):
+            if position > 0:
+                return parent.keys[position - 1], parent.contents[position - 1]
 
-        # Update the children
-        self._update_children_id(right_node)
+        return None
 
-        # Update the parent node
+    # Split the node and insert the middle key in the parent
+    # The left half stays in the node, so only the node, the new right node and the parent are written
+    def _split_node(self, node, path):
+        # Get the middle position to split
+        middle = node.get_split_position()
         key = node.keys[middle]
         content = node.contents[middle]
 
-        if parent_node:
-            position = self._get_insert_position(parent_node, key)
-            # Add the key and the content in the right position in the node lists
-            parent_node.keys = parent_node.keys[:position] + [key] \
-                               + parent_node.keys[position:]
-            parent_node.contents = parent_node.contents[:position] + [content] \
-                                   + parent_node.contents[position:]
-            parent_node.children_ids = parent_node.children_ids[:position] + [left_node.id, right_node.id] \
-                                       + parent_node.children_ids[position:]
-
-            if len(parent_node.keys) > parent_node.keys_size:
+        # Create a new right node
+        right_node = self._new_node()
+        right_node.keys = node.keys[middle + 1:]
+        right_node.contents = node.contents[middle + 1:]
+        right_node.children_ids = node.children_ids[middle + 1:]
+        if self.counted:
+            right_node.children_counts = node.children_counts[middle + 1:]
+        # Save in database
+        self._save_node(right_node)
+
+        if len(path) > 0:
+            parent_node, position = path.pop()
+
+            # Keep the left half in the node
+            node.keys = node.keys[:middle]
+            node.contents = node.contents[:middle]
+            node.children_ids = node.children_ids[:middle + 1]
+            if self.counted:
+                node.children_counts = node.children_counts[:middle + 1]
+            self._save_node(node)
+
+            # Add the key, the content and the new child in the right position in the parent lists
+            parent_node.keys.insert(position, key)
+            parent_node.contents.insert(position, content)
+            parent_node.children_ids.insert(position + 1, right_node.id)
+            if self.counted:
+                parent_node.children_counts[position] = self._get_subtree_count(node)
+                parent_node.children_counts.insert(position + 1, self._get_subtree_count(right_node))
+
+            if parent_node.is_overflowing():
                 # Continue with the split
-                self._split_node(parent_node)
+                self._split_node(parent_node, path)
             else:
-                self.btree_node_table_manager.save(parent_node)
-        else:  # There no is parent node, it's the root
-            root = self._get_root()
-            root.keys = [key]
-            root.contents = [content]
-            root.children_ids = [left_node.id, right_node.id]
+                self._save_node(parent_node)
+        else:  # There no is parent node, it's the root and it keeps its id
+            # Create a new left node
+            left_node = self._new_node()
+            left_node.keys = node.keys[:middle]
+            left_node.contents = node.contents[:middle]
+            left_node.children_ids = node.children_ids[:middle + 1]
+            if self.counted:
+                left_node.children_counts = node.children_counts[:middle + 1]
+            # Save in database
+            self._save_node(left_node)
+
+            node.keys = [key]
+            node.contents = [content]
+            node.children_ids = [left_node.id, right_node.id]
+            if self.counted:
+                node.children_counts = [self._get_subtree_count(left_node), self._get_subtree_count(right_node)]
             # Update in database
-            self.btree_node_table_manager.save(root)
+            self._save_node(node)
 
     # Insert a new value in a leaf
-    def _insert_leaf_node(self, node, key, content):
+    def _insert_leaf_node(self, node, key, content, path):
         self._insert_key_in_leaf(node, key, content)
         # Verify if the node has more keys than the degree less one
-        if len(node.keys) > node.keys_size:
-            self._split_node(node)
+        if node.is_overflowing():
+            self._split_node(node, path)
         else:
             # Save the updated node
-            self.btree_node_table_manager.save(node)
+            self._save_node(node)
 
     # Insert a key in a leaf node
     def _insert_key_in_leaf(self, node, key, content):
-        position = self._get_insert_position(node, key)
+        position = self._get_insert_position(node, key, content)
 
         # Add the key and the content in the right position in the node lists
         node.keys = node.keys[0:position] + [key] + node.keys[position:len(node.keys)]
         node.contents = node.contents[0:position] + [content] + node.contents[position:len(node.contents)]
 
-    # Update the children's parent_id of a node
-    def _update_children_id(self, node, ex_node=None):
-        parent_node = ex_node or node
-        for child_id in parent_node.children_ids:
-            child_node = self._get_node_by_id(child_id)
-            child_node.parent_id = node.id
-            self.btree_node_table_manager.save(child_node)
+    # Return the position of the (key, content) in the node, the entries are ordered by key and then by content
+    @staticmethod
+    def _get_insert_position(node, key, content) -> int:
+        count = 0
+        while count < len(node.keys) and (key > node.keys[count]
+                                          or (key == node.keys[count] and content > node.contents[count])):
+            count = count + 1
 
+        return count
+
+    # Return the position of the first occurrence of the key in the node, or where it would be
     @staticmethod
-    def _get_insert_position(node, key) -> int:
+    def _get_key_position(node, key) -> int:
         count = 0
         while count < len(node.keys) and key > node.keys[count]:
             count = count + 1
@@ -254,43 +623,10 @@ class BTree:
 
     # Insert in the base case, when the node is empty
     def _insert_empty_node(self, node, key, content):
+        self._write_latch(node)
         node.keys.append(key)
         node.contents.append(content)
-        self.btree_node_table_manager.save(node)
-
-    def _insert_non_full(self, node, key):
-        # Initialize index as index of rightmost element
-        i = len(node.keys) - 1
-
-        # If this is a leaf node
-        if self._is_leaf(node):
-            # The following loop does two things
-            # a) Finds the location of new key to be inserted
-            # b) Moves all greater keys to one place ahead
-            while i >= 0 and node.keys[i] > key:
-                node.keys[i + 1] = node.keys[i]
-                i = i - 1
-
-            # Insert the new key at found location
-            node.keys[i + 1] = key
-        else:  # If this node is not leaf
-            # Find the child which is going to have the new key
-            while i >= 0 and node.keys[i] > key:
-                i = i - 1
-
-            # See if the found child is full
-            child = self._get_node_by_id(node.children[i + 1])
-            if self._is_full(child):
-                # If the child is full, then split it
-                self.split_child(i + 1, node, child)
-
-                # After split, the middle key of children_id[i] goes up and
-                # children_id[i] is splitted into two.  See which of the tw
-                # is going to have the new key
-                if node.keys[i + 1] < key:
-                    i = i + 1
-
-            self._insert_non_full(child, key)
+        self._save_node(node)
 
     ####################################################################################################################
     # BTree delete aux function
@@ -300,281 +636,217 @@ class BTree:
     # Find the node of the key and delete respecting BTree rules
     # Return True if the key exists and False if not
     def _delete_by_key_and_content(self, key, content) -> bool:
-        root = self._get_root()
-        node, position, found = self._deep_search_by_key_and_content(root, key, content)
+        path = []
+        node, position, found = self._search_entry(key, content, path)
 
-        # Just insert not existent keys
+        # Just delete existent keys
         if found:
-            self._delete_key_from_node_by_position(node, position)
+            self._delete_key_from_node_by_position(node, position, path)
             return True
-        else:  # If found update the content value
+        else:
             return False
 
-    # Delete a key and it's content of a node using the given node and position
-    def _delete_key_from_node_by_position(self, node, position):
-        # Case 1: Node is leaf
-        if self._is_leaf(node):
-            if self._is_root(node) or not self._has_minimum_size(node):
-                # Case 1.a: node is a leaf and has more keys than the min
-                # Just remove the element and save
-                self._delete_key_in_node_and_save(node, position)
-            else:
-                parent = self._get_parent(node)
-                # Case 1.b: node is a leaf and has the min numbers of keys
-                if not self._borrow_from_sibling_and_delete(node, position, parent):
-                    self._merge_nodes_and_delete(node, position, parent, True)
-                    # Check if parent has the min. size
-                    while parent is not None and not self._greater_or_equal_than_minimum_size(parent):
-                        grandparent = self._get_parent(parent)
-                        self._merge_nodes_and_delete(parent, 0, grandparent, False)
-                        parent = grandparent
-        else:  # Case 2: Node is intern or root
-            predecessor = self._get_predecessor_child(node, position)
-            if predecessor is not None:
-                # Case 2.a: Has predecessor child, get it's biggest element
-                self._borrow_from_predecessor_and_delete(node, position, predecessor)
-                # Check if parent has the min. size
-                while predecessor is not None and not self._greater_or_equal_than_minimum_size(predecessor):
-                    parent = self._get_parent(predecessor)
-                    self._merge_nodes_and_delete(predecessor, 0, parent, False)
-                    predecessor = parent
-            else:
-                # Case 2.b: Has only a child that precedes, get it's smallest element
-                successor = self._get_successor_child(node, position)
-
-                if successor is not None:
-                    self._borrow_from_successor_and_delete(node, position, successor)
-                else:
-                    # Case 2.c: The nodes that precedes and follow the current target has min. size
-                    self._merge_nodes_borrow_and_delete(node, position, predecessor, successor)
-
-    # Case 2.a: Get the biggest key of a node and put in the parent, deleting the required key
-    def _borrow_from_predecessor_and_delete(self, node, position, predecessor):
-        # Remove the key and insert the predecessor key
-        node.keys[position] = predecessor.keys.pop()
-        node.contents[position] = predecessor.contents.pop()
-
-        # Save the results
-        self.btree_node_table_manager.save(predecessor)
-        self.btree_node_table_manager.save(node)
-
-    # Case 2.b: Get the smallest key of a node and put in the parent, deleting the required key
-    def _borrow_from_successor_and_delete(self, node, position, successor):
-        # Remove the key and insert the predecessor key
-        node.keys[position] = successor.keys.pop()
-        node.contents[position] = successor.contents.pop()
+    # Delete a key and it's content of a node using the given node, position and path
+    def _delete_key_from_node_by_position(self, node, position, path):
+        found_level = len(path)
 
-        # Save the results
-        self.btree_node_table_manager.save(successor)
-        self.btree_node_table_manager.save(node)
-
-    # Case 2.c: Predecessor and node which precedes haven't size to borrow
-    def _merge_nodes_borrow_and_delete(self, node, position, predecessor, successor):
-        # Merge the successor and predecessor
-        predecessor.keys.append(successor.keys)
-        predecessor.contents.append(successor.contents)
+        if self._is_leaf(node):
+            self._latch_for_delete(node, path, found_level)
 
-        # Remove the key in the node
-        del node.keys[position]
-        del node.contents[position]
-        # Delete the children_id of the successor
-        del node.children_ids[position + 1]
+            # Case 1: Node is leaf, just remove the element
+            del node.keys[position]
+            del node.contents[position]
+        else:
+            # Case 2: Node is intern or root, replace the key with the biggest key of the predecessor child
+            predecessor = self._get_predecessor_child(node, position, path)
+            self._latch_for_delete(predecessor, path, found_level)
+
+            node.keys[position] = predecessor.keys.pop()
+            node.contents[position] = predecessor.contents.pop()
+            self._save_node(node)
+
+            node = predecessor
+
+        # A key left the leaf, so every subtree in the path has one key less
+        self._update_path_counts(path, -1)
+
+        # The leaf may be left with less keys than allowed
+        self._fix_node_after_delete(node, path)
+
+    # Latch for writing the nodes changed when a key leaves the leaf: the node where the key was found, the leaf and
+    # the nodes between them, and the parents of the nodes left with less keys than the minimum
+    # The siblings are latched when they are read. In counted trees the whole path changes
+    def _latch_for_delete(self, leaf, path, found_level):
+        nodes = [parent for parent, position in path] + [leaf]
+        top = len(nodes) - 1
+
+        while top > 0 and not self._greater_than_minimum_size(nodes[top]):
+            top = top - 1
+
+        top = min(top, found_level)
+        if self.counted:
+            top = 0
+
+        for latched_node in nodes[top:]:
+            self._write_latch(latched_node)
+
+    # Borrow from or merge with siblings while the node has less keys than the minimum, going up through the path
+    # Nodes with keys of different sizes may not keep the borrowed or merged keys, then the node is left with less keys
+    def _fix_node_after_delete(self, node, path):
+        while len(path) > 0 and not self._greater_or_equal_than_minimum_size(node):
+            parent, position = path.pop()
+
+            # Try left sibling first
+            l_sibling = self._get_left_sibling(parent, position)
+            if l_sibling is not None and self._greater_than_minimum_size(l_sibling) \
+                    and node.can_keep([parent.keys[position - 1]] + node.keys):
+                self._borrow_from_left_sibling(node, parent, position, l_sibling)
+                return
+
+            r_sibling = self._get_right_sibling(parent, position)
+            if r_sibling is not None and self._greater_than_minimum_size(r_sibling) \
+                    and node.can_keep(node.keys + [parent.keys[position]]):
+                self._borrow_from_right_sibling(node, parent, position, r_sibling)
+                return
+
+            # Siblings can't borrow, merge and check the parent that lost a key
+            if l_sibling is not None and l_sibling.can_keep(l_sibling.keys + [parent.keys[position - 1]] + node.keys):
+                self._merge_with_left_sibling(node, parent, position, l_sibling)
+            elif r_sibling is not None and node.can_keep(node.keys + [parent.keys[position]] + r_sibling.keys):
+                self._merge_with_right_sibling(node, parent, position, r_sibling)
+            else:
+                break
 
-        # Delete the successor
-        self.btree_node_table_manager.delete(successor)
+            node = parent
 
-        # Save the results
-        self.btree_node_table_manager.save(predecessor)
-        self.btree_node_table_manager.save(node)
-
-    # Case 1.b.b: Merge the node and a sibling to remove the element
-    def _merge_nodes_and_delete(self, node, position, parent, delete):
-        # Verify if the node is root
-        if self._is_root(node):
-            # Transfer the child data for the root
+        # An empty root with a single child gets the child data, the root id never changes
+        if len(path) == 0 and len(node.keys) == 0 and not self._is_leaf(node):
             child = self._get_node_by_id(node.children_ids[0])
+            self._write_latch(child)
             node.keys = child.keys
             node.contents = child.contents
             node.children_ids = child.children_ids
+            if self.counted:
+                node.children_counts = child.children_counts
 
-            self._update_children_id(node, child)
-
-            self.btree_node_table_manager.save(node)
-            self.btree_node_table_manager.delete(child)
-
-            return
-
-        # Try left sibling first
-        if not self._merge_with_left_sibling_and_delete(node, position, parent, delete):
-            self._merge_with_right_sibling_and_delete(node, position, parent, delete)
-
-    # Try merge node with left sibling and delete the key
-    # Return True if the left node exists and everything was done or False if the left node not exists
-    def _merge_with_left_sibling_and_delete(self, node, position, parent, delete) -> bool:
-        # Get left sibling
-        sibling = self._get_left_sibling(node, parent)
+            self._delete_node(child)
 
-        # If not exists return False
-        if sibling is None:
-            return False
-        # Else continue with the merge process
-
-        # Get the position of the sibling node in the parent
-        sibling_position = parent.children_ids.index(sibling.id)
-
-        if delete:
-            # Remove the key from node
-            del node.keys[position]
-            del node.contents[position]
+        self._save_node(node)
 
+    # Merge the node in the left sibling with the parent key between them
+    def _merge_with_left_sibling(self, node, parent, position, sibling):
         # Get the key from parent and insert in the left sibling
-        sibling.keys.append(parent.keys.pop(sibling_position))
-        sibling.contents.append(parent.contents.pop(sibling_position))
+        sibling.keys.append(parent.keys.pop(position - 1))
+        sibling.contents.append(parent.contents.pop(position - 1))
 
         # Merge nodes
         sibling.keys.extend(node.keys)
         sibling.contents.extend(node.contents)
         sibling.children_ids.extend(node.children_ids)
 
-        self._update_children_id(sibling, node)
-
         # Remove the id of the node in the parent children_ids
-        del parent.children_ids[sibling_position + 1]
-
-        # Remove node from database
-        self.btree_node_table_manager.delete(node)
+        del parent.children_ids[position]
 
-        # Save sibling and parent
-        self.btree_node_table_manager.save(sibling)
-        self.btree_node_table_manager.save(parent)
+        if self.counted:
+            sibling.children_counts.extend(node.children_counts)
+            del parent.children_counts[position]
+            parent.children_counts[position - 1] = self._get_subtree_count(sibling)
 
-        return True
-
-    # Try merge node with right sibling and delete the key
-    # Return True if the right node exists and everything was done or False if the right node not exists
-    def _merge_with_right_sibling_and_delete(self, node, position, parent, delete) -> bool:
-        # Get left sibling
-        sibling = self._get_right_sibling(node, parent)
-
-        # If not exists return False
-        if sibling is None:
-            return False
-        # Else continue with the merge process
-
-        # Get the position of the sibling node in the parent
-        node_position = parent.children_ids.index(node.id)
-
-        if delete:
-            # Remove the key from node
-            del node.keys[position]
-            del node.contents[position]
+        # Remove node from database and save the sibling, the parent is saved by the caller
+        self._delete_node(node)
+        self._save_node(sibling)
 
+    # Merge the right sibling in the node with the parent key between them
+    def _merge_with_right_sibling(self, node, parent, position, sibling):
         # Get the key from parent and insert in the node
-        node.keys.append(parent.keys.pop(node_position))
-        node.contents.append(parent.contents.pop(node_position))
+        node.keys.append(parent.keys.pop(position))
+        node.contents.append(parent.contents.pop(position))
 
         # Merge nodes
         node.keys.extend(sibling.keys)
         node.contents.extend(sibling.contents)
         node.children_ids.extend(sibling.children_ids)
-        self._update_children_id(node, sibling)
 
         # Remove the id of the sibling in the parent children_ids
-        del parent.children_ids[node_position + 1]
-
-        # Remove sibling from database
-        self.btree_node_table_manager.delete(sibling)
-
-        # Save node and parent
-        self.btree_node_table_manager.save(node)
-        self.btree_node_table_manager.save(parent)
-
-    # Case 1.b.a: Try to borrow from a sibling to delete a value respecting the BTree rules
-    # Return True if success and False if siblings can't borrow
-    def _borrow_from_sibling_and_delete(self, node, position, parent) -> bool:
-        # Try left sibling first
-        l_sibling = self._get_left_sibling(node, parent)
+        del parent.children_ids[position + 1]
 
-        if l_sibling is not None and not self._has_minimum_size(l_sibling):
-            self._borrow_from_left_sibling_and_delete(node, position, parent, l_sibling)
-        else:
-            r_sibling = self._get_right_sibling(node, parent)
-
-            if r_sibling is not None and not self._has_minimum_size(r_sibling):
-                self._borrow_from_right_sibling_and_delete(node, position, parent, r_sibling)
-            else:
-                return False
+        if self.counted:
+            node.children_counts.extend(sibling.children_counts)
+            del parent.children_counts[position + 1]
+            parent.children_counts[position] = self._get_subtree_count(node)
 
-        return True
+        # Remove sibling from database and save the node, the parent is saved by the caller
+        self._delete_node(sibling)
+        self._save_node(node)
 
     # Borrow and rotate with left sibling
-    def _borrow_from_left_sibling_and_delete(self, node, position, parent, sibling):
-        parent_position = parent.children_ids.index(node.id)
-
-        # Remove the key and insert parent values
-        del node.keys[position]
-        del node.contents[position]
-        node.keys.insert(0, parent.keys[parent_position - 1])
-        node.contents.insert(0, parent.contents[parent_position - 1])
+    def _borrow_from_left_sibling(self, node, parent, position, sibling):
+        # Insert parent values in the node
+        node.keys.insert(0, parent.keys[position - 1])
+        node.contents.insert(0, parent.contents[position - 1])
 
         # Remove value from sibling and put in parent
-        parent.keys[parent_position - 1] = sibling.keys.pop()
-        parent.contents[parent_position - 1] = sibling.contents.pop()
+        parent.keys[position - 1] = sibling.keys.pop()
+        parent.contents[position - 1] = sibling.contents.pop()
+
+        # The biggest child of the sibling follows the key
+        if not self._is_leaf(sibling):
+            node.children_ids.insert(0, sibling.children_ids.pop())
+            if self.counted:
+                node.children_counts.insert(0, sibling.children_counts.pop())
+
+        if self.counted:
+            parent.children_counts[position - 1] = self._get_subtree_count(sibling)
+            parent.children_counts[position] = self._get_subtree_count(node)
 
         # Save everything
-        self.btree_node_table_manager.save(sibling)
-        self.btree_node_table_manager.save(parent)
-        self.btree_node_table_manager.save(node)
+        self._save_node(sibling)
+        self._save_node(parent)
+        self._save_node(node)
 
     # Borrow and rotate with right sibling
-    def _borrow_from_right_sibling_and_delete(self, node, position, parent, sibling):
-        parent_position = parent.children_ids.index(node.id)
-
-        # Remove the key and insert parent values
-        del node.keys[position]
-        del node.contents[position]
-        node.keys.append(parent.keys[parent_position])
-        node.contents.append(parent.contents[parent_position])
+    def _borrow_from_right_sibling(self, node, parent, position, sibling):
+        # Insert parent values in the node
+        node.keys.append(parent.keys[position])
+        node.contents.append(parent.contents[position])
 
         # Remove value from sibling and put in parent
-        parent.keys[parent_position] = sibling.keys.pop(0)
-        parent.contents[parent_position] = sibling.contents.pop(0)
+        parent.keys[position] = sibling.keys.pop(0)
+        parent.contents[position] = sibling.contents.pop(0)
 
-        # Save everything
-        self.btree_node_table_manager.save(sibling)
-        self.btree_node_table_manager.save(parent)
-        self.btree_node_table_manager.save(node)
-
-    # Only remove the key and it's content and save
-    def _delete_key_in_node_and_save(self, node, position):
-        del node.keys[position]
-        del node.contents[position]
-        self.btree_node_table_manager.save(node)
+        # The smallest child of the sibling follows the key
+        if not self._is_leaf(sibling):
+            node.children_ids.append(sibling.children_ids.pop(0))
+            if self.counted:
+                node.children_counts.append(sibling.children_counts.pop(0))
 
-    # Only insert the key and it's content in a position and save
-    def _insert_key_in_node_and_save(self, node, position, key, content):
-        node.keys = node.keys[:position] + [key] + node.content[position:]
-        node.contents = node.contents[:position] + [content] + node.contents[position:]
-        self.btree_node_table_manager.save(node)
+        if self.counted:
+            parent.children_counts[position] = self._get_subtree_count(node)
+            parent.children_counts[position + 1] = self._get_subtree_count(sibling)
 
-    # Return the immediate right sibling of a node
-    def _get_right_sibling(self, node, parent):
-        position = parent.children_ids.index(node.id)
+        # Save everything
+        self._save_node(sibling)
+        self._save_node(parent)
+        self._save_node(node)
 
+    # Return the immediate right sibling of the child in the position of the parent, latched for writing
+    def _get_right_sibling(self, parent, position):
         # Return if exists
         if len(parent.children_ids) > position + 1:
-            return self._get_node_by_id(parent.children_ids[position + 1])
+            sibling = self._get_node_by_id(parent.children_ids[position + 1])
+            self._write_latch(sibling)
+            return sibling
 
         # Return None if not exists
         return None
 
-    # Return the immediate left sibling of a node
-    def _get_left_sibling(self, node, parent):
-        position = parent.children_ids.index(node.id)
-
+    # Return the immediate left sibling of the child in the position of the parent, latched for writing
+    def _get_left_sibling(self, parent, position):
         # Return if exists
         if position - 1 >= 0:
-            return self._get_node_by_id(parent.children_ids[position - 1])
+            sibling = self._get_node_by_id(parent.children_ids[position - 1])
+            self._write_latch(sibling)
+            return sibling
 
         # Return None if not exists
         return None
@@ -601,9 +873,9 @@ class BTree:
 
         return smaller
 
-
     # Return the child before a node item using it's position
-    def _get_predecessor_child(self, node, position):
+    # If a path is given the nodes of the descent are added to it
+    def _get_predecessor_child(self, node, position, path=None):
         if len(node.children_ids) > position >= 0:
             predecessor = self._get_node_by_id(node.children_ids[position])
         else:
@@ -612,9 +884,14 @@ class BTree:
         if predecessor is None:
             return None
 
+        if path is not None:
+            path.append((node, position))
+
         while not self._is_leaf(predecessor):
-            biggest_child_id = predecessor.children_ids[len(predecessor.children_ids) - 1]
-            predecessor = self._get_node_by_id(biggest_child_id)
+            biggest_position = len(predecessor.children_ids) - 1
+            if path is not None:
+                path.append((predecessor, biggest_position))
+            predecessor = self._get_node_by_id(predecessor.children_ids[biggest_position])
 
         return predecessor
 
@@ -634,257 +911,290 @@ class BTree:
 
         return successor
 
-    # Return the parent of a node
-    def _get_parent(self, node):
-        return self._get_node_by_id(node.parent_id)
-
     ####################################################################################################################
     # BTree internal functions
 
-    # Search for the key
-    # If find_contents: return the node with the leftest occurrence, the position of the content and true
-    # If not: return the last node, none and false
-    def _search(self, key) -> (object, bool):
+    # Search for the leaf where the (key, content) must be inserted
+    # Return the leaf and the path from the root to its parent
+    # Only used by the writer, the only thread that changes nodes, so it reads them without latches
+    def _search(self, key, content) -> (object, list):
         node = self._get_root()
-        # Try to find_contents the key in the BTree using the nodes
-        # If key found return the id referenced by the key
-        # Else return None
-        while True:
-            go_out = False
-            position = 0
+        path = []
 
-            # Find the first key smaller or equal than key
-            while position < len(node.keys) and key > node.keys[position]:
-                position = position + 1
+        while not self._is_leaf(node):
+            # Find the first entry bigger or equal and continue in the child before it
+            position = self._get_insert_position(node, key, content)
+            path.append((node, position))
+            node = self._get_node_by_id(node.children_ids[position])
+
+        return node, path
+
+    # Find the first node with the key, going down by the key only, and return the node, the key position and the path
+    # from the root to the parent of the node. The position is None if the key isn't in the tree, then the node is the
+    # leaf where the key is inserted
+    def _search_key(self, key) -> (object, int, list):
+        node = self._get_root()
+        path = []
+
+        while True:
+            position = self._get_key_position(node, key)
 
-            # If key found
             if position < len(node.keys) and node.keys[position] == key:
-                # Search for the last occurrence
-                while position < len(node.keys) and key > node.keys[position]:
-                    position = position + 1
+                return node, position, path
 
-                if not self._is_leaf(node):
-                    temp_node = self._get_node_by_id(node.children_ids[position])
+            if self._is_leaf(node):
+                return node, None, path
 
-                    if not self._is_leaf(temp_node):
-                        node = temp_node
-                        go_out = True
-                    else:
-                        return temp_node, True
-                else:
-                    return node, True
+            path.append((node, position))
+            node = self._get_node_by_id(node.children_ids[position])
 
-            if not go_out:
-                # Verify if the node is a leaf, if true the find_contents ends without find_contents the key
-                if self._is_leaf(node):
-                    return node, False
+    # Find the node with the key and content and return the node and the key position
+    # The entries are ordered by (key, content), so a single descent finds it
+    # The path from the root to the parent of the found node is left in the path param
+    def _search_entry(self, key, content, path) -> (object, int, bool):
+        latch, node = self._read_root()
 
-                # Continue the find_contents in the child
-                node = self._get_node_by_id(node.children_ids[position])
+        try:
+            while True:
+                position = self._get_insert_position(node, key, content)
 
-    # Find a node with the key and content and return the node and the key position
-    def _deep_search_by_key_and_content(self, node, key, content) -> (object, int, bool):
-        positions = []
-        position = 0
-        # Find the first occurrences
-        while True and node is not None:
+                if position < len(node.keys) and node.keys[position] == key and node.contents[position] == content:
+                    return node, position, True
 
-            # Find all occurrences of the key in node
-            while position < len(node.keys) and key >= node.keys[position]:
-                # If found the key stop
-                if key == node.keys[position]:
-                    if node.contents[position] == content:
-                        return node, position, True
+                # Leaf haven't child to search
+                if self._is_leaf(node):
+                    return node, None, False
 
-                    # Leaf haven't child to search
-                    if not self._is_leaf(node):
-                        positions.append(position)
+                path.append((node, position))
+                latch, node = self._read_child(latch, node.children_ids[position])
+        finally:
+            latch.release_read()
 
-                position = position + 1
+    # Add to the results the contents of the key in the subtree of the node, in content order
+    # The occurrences of a key are together, so only the children around them are read
+    def _find_contents_by_key(self, node, key, results):
+        position = self._get_key_position(node, key)
 
-            # Verify if the node is a leaf
-            if self._is_leaf(node):
-                return node, None, False
-            elif len(positions) == 0:
-                # Continue the find_contents in the child
-                node = self._get_node_by_id(node.children_ids[position])
-                position = 0
+        while True:
+            if not self._is_leaf(node):
+                with self._read_latched(node.children_ids[position]) as child:
+                    self._find_contents_by_key(child, key, results)
+
+            if position < len(node.keys) and node.keys[position] == key:
+                results.append(node.contents[position])
+                position = position + 1
             else:
-                break
+                return
 
-        # Any occurrence of the key
-        if len(positions) == 0:
-            return node, None, False
+    # Return the contents of the n biggest keys after skipping the offset biggest
+    def _find_n_biggest(self, n, offset=0):
+        n_biggest = []
 
-        if not self._is_leaf(node):
-            # Add the most right position for the last possible valid child
-            positions.append(positions[len(positions) - 1] + 1)
+        if n > 0:
+            with self.tree_lock.read_locked(), closing(self._iterate_with_offset(self._iterate_descending, offset)) \
+                    as contents:
+                for content in contents:
+                    n_biggest.append(content)
+                    if len(n_biggest) >= n:
+                        break
 
-            # Try to find_contents valid children to search in all positions found
-            for position in positions:
-                child = self._get_node_by_id(node.children_ids[position])
-                # Verify if the key is in this node
-                temp_node, temp_position, found = self._deep_search_by_key_and_content(child, key, content)
+        return n_biggest
 
-                if found:
-                    return temp_node, temp_position, found
+    # Return the contents of the n smallest keys after skipping the offset smallest
+    def _find_n_smallest(self, n, offset=0):
+        n_smallest = []
 
-        return node, None, False
+        if n > 0:
+            with self.tree_lock.read_locked(), closing(self._iterate_with_offset(self._iterate_ascending, offset)) \
+                    as contents:
+                for content in contents:
+                    n_smallest.append(content)
+                    if len(n_smallest) >= n:
+                        break
+
+        return n_smallest
+
+    # Start an iteration from the root after the offset first contents
+    # Counted trees jump straight to the offset, the others walk over the skipped contents
+    # The walk holds the latches of the nodes from the root to the current one, close it to release them
+    def _iterate_with_offset(self, iterate_function, offset):
+        with self._read_latched(self.btree_info.root_id) as root:
+            if self.counted:
+                iterator = iterate_function(root, offset)
+                offset = 0
+            else:
+                iterator = iterate_function(root)
 
-    # Find all nodes with the key
-    def _deep_search_by_key(self, node, key) -> (list, bool):
-        positions = []
-        results = []
-        position = 0
-        # Find the first occurrences
-        while True and node is not None:
-
-            # Find all occurrences of the key in node
-            while position < len(node.keys) and key >= node.keys[position]:
-                # If found the key stop
-                if key == node.keys[position]:
-                    positions.append(position)
-                    results.append(node.contents[position])
-                position = position + 1
+            try:
+                yield from itertools.islice(iterator, offset, None)
+            finally:
+                iterator.close()
 
-            # Verify if the node is a leaf
-            if self._is_leaf(node):
-                if len(positions) == 0:
-                    return results, False
+    # Walk the subtree of the node returning the contents in ascending key order
+    # Nodes are only read when the walk reaches them, the skip (counted trees only) jumps over whole subtrees
+    def _iterate_ascending(self, node, skip=0):
+        if self._is_leaf(node):
+            yield from node.contents[skip:]
+        else:
+            for position in range(0, len(node.children_ids)):
+                if skip > 0 and skip >= node.children_counts[position]:
+                    skip = skip - node.children_counts[position]
                 else:
-                    break
-            elif len(results) == 0:
-                # Continue the find_contents in the child
-                node = self._get_node_by_id(node.children_ids[position])
-                position = 0
-            else:
-                break
+                    with self._read_latched(node.children_ids[position]) as child:
+                        yield from self._iterate_ascending(child, skip)
+                    skip = 0
 
-        # Any occurrence of the key
-        if len(positions) == 0:
-            return results, False
-
-        # Try to find_contents valid children to search in all positions found
-        if not self._is_leaf(node):
-            positions.append(positions[len(positions) - 1] + 1)
-            for position in positions:
-                child = self._get_node_by_id(node.children_ids[position])
-                # Verify if the key is in this node
-                new_results, found = self._deep_search_by_key(child, key)
-
-                if found:
-                    results.extend(new_results)
-
-        return results, True
-
-    # Return the n biggest keys
-    def _find_n_biggest(self, n, node=None, parent=False):
-        last = False
-
-        if node is None:
-            node = self._get_biggest_child()
-            if len(node.contents) < n:
-                n_biggest = node.contents
-                n_biggest.reverse()
-                init = len(node.children_ids) - 1
-            else:
-                n_biggest = node.contents[n * (-1):]
-                n_biggest.reverse()
-                return n_biggest
-
-            last = True
-        elif self._is_leaf(node):
-            init = len(node.children_ids) - 1
-            if len(node.contents) < n:
-                n_biggest = node.contents
-                n_biggest.reverse()
-            else:
-                n_biggest = node.contents[n * (-1):]
-                n_biggest.reverse()
-                return n_biggest
-        elif parent:
-            init = len(node.children_ids) - 2
-            n_biggest = [node.contents[len(node.contents) - 1]]
-            n_biggest.reverse()
-        else:
-            init = len(node.children_ids) - 1
-            n_biggest = []
+                if position < len(node.contents):
+                    if skip > 0:
+                        skip = skip - 1
+                    else:
+                        yield node.contents[position]
 
-        if len(node.contents) > 0 and len(n_biggest) < n:
-            if not self._is_leaf(node):
-                for child_pos in range(init, -1, -1):
-                    child_node = self._get_node_by_id(node.children_ids[child_pos])
-                    n_biggest.extend(self._find_n_biggest(n - len(n_biggest), child_node))
-                    if len(n_biggest) >= n:
-                        return n_biggest
-                    if (child_pos - 1) >= 0:
-                        n_biggest.append(node.contents[child_pos - 1])
-                if len(n_biggest) < n and parent:
-                    n_biggest.extend(self._find_n_biggest(n - len(n_biggest),
-                                                            self._get_node_by_id(node.parent_id), True))
-
-                    return n_biggest
+    # Walk the subtree of the node returning the contents in descending key order
+    def _iterate_descending(self, node, skip=0):
+        if self._is_leaf(node):
+            yield from list(reversed(node.contents))[skip:]
+        else:
+            for position in range(len(node.children_ids) - 1, -1, -1):
+                if skip > 0 and skip >= node.children_counts[position]:
+                    skip = skip - node.children_counts[position]
                 else:
-                    return n_biggest
-            elif not self._is_root(node) and last:
-                n_biggest.extend(self._find_n_biggest(n - len(n_biggest),
-                                                        self._get_node_by_id(node.parent_id), True))
+                    with self._read_latched(node.children_ids[position]) as child:
+                        yield from self._iterate_descending(child, skip)
+                    skip = 0
 
-                return n_biggest
-            else:
-                return n_biggest
-        else:
-            return []
+                if position > 0:
+                    if skip > 0:
+                        skip = skip - 1
+                    else:
+                        yield node.contents[position - 1]
 
-    # Return the n smallest keys
-    def _find_n_smallest(self, n, node=None, parent=False):
-        init = 0
-        first = False
+    # Return the number of keys smaller (or equal) than the key using the subtree counts
+    def _count_smaller(self, key, or_equal) -> int:
+        total = 0
+        latch, node = self._read_root()
 
-        if node is None:
-            node = self._get_smallest_child()
-            if len(node.contents) < n:
-                n_smallest = node.contents
-            else:
-                return node.contents[0:n]
+        try:
+            while True:
+                position = 0
+                while position < len(node.keys) and (key > node.keys[position]
+                                                     or (or_equal and key == node.keys[position])):
+                    position = position + 1
 
-            first = True
-        elif self._is_leaf(node):
-            if len(node.contents) < n:
-                n_smallest = node.contents
-            else:
-                return node.contents[0:n]
-        elif parent:
-            n_smallest = [node.contents[0]]
-            init = 1
-        else:
-            n_smallest = []
+                # Keys before the position and all their subtrees are smaller
+                total = total + position
+                if self._is_leaf(node):
+                    return total
 
-        if len(node.contents) > 0 and len(n_smallest) < n:
-            if not self._is_leaf(node):
-                for child_pos in range(init, len(node.children_ids)):
-                    child_node = self._get_node_by_id(node.children_ids[child_pos])
-                    n_smallest.extend(self._find_n_smallest(n - len(n_smallest), child_node))
-                    if len(n_smallest) >= n:
-                        return n_smallest
-                    if child_pos < len(node.contents):
-                        n_smallest.append(node.contents[child_pos])
-                if len(n_smallest) < n and parent:
-                    n_smallest.extend(self._find_n_smallest(n - len(n_smallest),
-                                      self._get_node_by_id(node.parent_id), True))
-
-                    return n_smallest
-                else:
-                    return n_smallest
-            elif not self._is_root(node) and first:
-                n_smallest.extend(self._find_n_smallest(n - len(n_smallest),
-                                  self._get_node_by_id(node.parent_id), True))
+                total = total + sum(node.children_counts[:position])
+                latch, node = self._read_child(latch, node.children_ids[position])
+        finally:
+            latch.release_read()
 
-                return n_smallest
-            else:
-                return n_smallest
-        else:
-            return []
+    # Return the content in the position k of the ascending order using the subtree counts
+    def _select(self, k):
+        latch, node = self._read_root()
+
+        try:
+            if k < 0 or k >= self._get_subtree_count(node):
+                raise BTreeError.PositionOutOfRange('There is no key in the position ' + str(k) + '!')
+
+            while not self._is_leaf(node):
+                position = 0
+                while k >= node.children_counts[position]:
+                    k = k - node.children_counts[position]
+
+                    # The key after the child
+                    if k == 0:
+                        return node.contents[position]
+
+                    k = k - 1
+                    position = position + 1
+
+                latch, node = self._read_child(latch, node.children_ids[position])
+
+            return node.contents[k]
+        finally:
+            latch.release_read()
+
+    # Add the value to the count of each child in the path and save the nodes, only for counted trees
+    def _update_path_counts(self, path, value):
+        if self.counted:
+            for node, position in path:
+                node.children_counts[position] = node.children_counts[position] + value
+                self._save_node(node)
+
+    # Return the number of keys saved in the subtree of the node
+    @staticmethod
+    def _get_subtree_count(node) -> int:
+        return len(node.keys) + sum(node.children_counts)
+
+    # Return the key and content as they are saved in the nodes
+    def _normalize(self, key, content) -> tuple:
+        key = IndexKeyHelper.normalize_key(self.node_class, key)
+        content = IndexKeyHelper.normalize_content(self.node_class, content)
+
+        return key, content
+
+    # Raise an error if the tree doesn't keep subtree counts
+    def _verify_counted(self):
+        if not self.counted:
+            raise BTreeError.TreeWithoutCounts('The index ' + self.index_name + ' was created without counts!')
+
+    # Split the entries of a level in full nodes, the children are the nodes of the level below
+    # Return the entries between the nodes and the created nodes, that are the entries and children of the level above
+    def _build_level(self, node_manager, keys, contents, children, counts) -> (list, list, list, list):
+        # Number of nodes to save all entries, less one entry for each separator between nodes
+        keys_size = self.node_class.get_max_keys(len(children) == 0)
+        n_nodes = max(math.ceil((len(keys) + 1) / (keys_size + 1)), 1)
+
+        # Nodes with keys of different sizes may need more nodes than the keys size says
+        nodes, separators = self._split_level(keys, contents, children, counts, n_nodes)
+        while any(node.is_overflowing() for node in nodes):
+            n_nodes = min(n_nodes + max(n_nodes // 16, 1), len(keys) + 1)
+            nodes, separators = self._split_level(keys, contents, children, counts, n_nodes)
+
+        up_children = []
+        up_counts = []
+
+        for node in nodes:
+            node_manager.save(node)
+            up_children.append(node.id)
+            up_counts.append(self._get_subtree_count(node) if self.counted else 0)
+
+        return [keys[position] for position in separators], [contents[position] for position in separators], \
+            up_children, up_counts
+
+    # Share the entries of a level between the number of nodes
+    # Return the nodes, not saved, and the positions of the entries between them
+    def _split_level(self, keys, contents, children, counts, n_nodes) -> (list, list):
+        n_node_keys = len(keys) - (n_nodes - 1)
+
+        nodes = []
+        separators = []
+        position = 0
+
+        for node_number in range(0, n_nodes):
+            # Share the keys between the nodes, the first ones get one more key if the division isn't exact
+            size = n_node_keys // n_nodes + (1 if node_number < n_node_keys % n_nodes else 0)
+
+            node = self.node_class()
+            node.keys = keys[position:position + size]
+            node.contents = contents[position:position + size]
+            if len(children) > 0:
+                node.children_ids = children[position:position + size + 1]
+                if self.counted:
+                    node.children_counts = counts[position:position + size + 1]
+
+            nodes.append(node)
+            position = position + size
+
+            # The next entry separates this node from the next one
+            if node_number < n_nodes - 1:
+                separators.append(position)
+                position = position + 1
+
+        return nodes, separators
 
     # Get the saved root id in the database if exists
     # Return TRUE for success and FALSE if root is None
@@ -894,6 +1204,7 @@ class BTree:
         if not btree_info:
             return False
         else:
+            self.btree_info = btree_info
             return True
 
     # Add a root if not exists
@@ -901,39 +1212,180 @@ class BTree:
         # Create a instance with proper type
         new_root = self.node_class()
         # Save in database
-        self.btree_node_table_manager.save(new_root)
+        self._save_node(new_root)
         # Update the class data with database info
         self.btree_info = BTreeInfo()
         self.btree_info.root_id = new_root.id
         # Save main in the database
         self.btree_info_table_manager.save(self.btree_info)
 
+    # Return the node from the cache or read it from the file
     def _get_node_by_id(self, node_id: int) -> object:
-        return self.btree_node_table_manager.find_by_id(node_id)
+        with self.cache_lock:
+            node = self.node_cache.get(node_id)
+            if node is not None:
+                self.node_cache.move_to_end(node_id)
+                return node
+
+        node = self.btree_node_table_manager.find_by_id(node_id)
+        if node is not None:
+            self._add_to_cache(node)
+
+        return node
+
+    # Save the node in the file and keep it in the cache
+    def _save_node(self, node):
+        self.btree_node_table_manager.save(node)
+        self._add_to_cache(node)
+
+    # Delete the node from the file and the cache, its id is kept to be used again
+    def _delete_node(self, node):
+        self.btree_node_table_manager.delete(node)
+
+        with self.cache_lock:
+            self.node_cache.pop(node.id, None)
+
+        free_node = BTreeFreeNode()
+        free_node.node_id = node.id
+        self.free_node_table_manager.save(free_node)
+        self.freed_node_ids.add(node.id)
+
+    # Return a new node, it gets the id of the last deleted node when there is one
+    def _new_node(self):
+        node = self.node_class()
+        node_id = self._pop_free_node_id()
+
+        if node_id is not None:
+            node.id = node_id
+            node.saved = True
+            # The id is used again, it keeps its latch
+            self.freed_node_ids.discard(node_id)
+
+        return node
+
+    # Remove the last free id from the file and return it, None if there isn't one
+    def _pop_free_node_id(self):
+        free_file = self.free_node_table_manager.table_file
+        free_nodes = FileHandleHelper.get_file_size(free_file) // ObjectHelper.get_class_size(BTreeFreeNode)
+
+        if free_nodes == 0:
+            return None
+
+        free_node = self.free_node_table_manager.find_by_id(free_nodes - 1)
+        FileHandleHelper.truncate_file(free_file, (free_nodes - 1) * ObjectHelper.get_class_size(BTreeFreeNode))
+
+        return free_node.node_id
+
+    # Add the node as the last used, removing the least used node when the cache is full
+    def _add_to_cache(self, node):
+        with self.cache_lock:
+            self.node_cache[node.id] = node
+            self.node_cache.move_to_end(node.id)
+
+            if len(self.node_cache) > BTreeCons.NODE_CACHE_SIZE:
+                self.node_cache.popitem(last=False)
+
+    # Remove all nodes from the cache and their latches, the tree must be locked for writing
+    def _clear_cache(self):
+        with self.cache_lock:
+            self.node_cache.clear()
+
+        with self.latches_lock:
+            self.node_latches.clear()
+
+    ####################################################################################################################
+    # Latches
+
+    # Return the latch of the node, creating it in the first use
+    def _get_latch(self, node_id: int) -> ReadWriteLock:
+        with self.latches_lock:
+            latch = self.node_latches.get(node_id)
+
+            if latch is None:
+                latch = ReadWriteLock()
+                self.node_latches[node_id] = latch
+
+        return latch
+
+    # Latch the root for reading and return the latch and the root
+    def _read_root(self) -> (ReadWriteLock, object):
+        latch = self._get_latch(self.btree_info.root_id)
+        latch.acquire_read()
+
+        return latch, self._get_root()
+
+    # Latch the child for reading and then release the latch of the parent
+    # Return the latch and the child
+    def _read_child(self, parent_latch: ReadWriteLock, child_id: int) -> (ReadWriteLock, object):
+        latch = self._get_latch(child_id)
+        latch.acquire_read()
+        parent_latch.release_read()
+
+        return latch, self._get_node_by_id(child_id)
+
+    # Hold the read latch of the node while the "with" block runs
+    @contextmanager
+    def _read_latched(self, node_id: int):
+        latch = self._get_latch(node_id)
+        latch.acquire_read()
+
+        try:
+            yield self._get_node_by_id(node_id)
+        finally:
+            latch.release_read()
+
+    # Latch the node for writing until the writer releases all its latches
+    def _write_latch(self, node):
+        if node.id not in self.write_latches:
+            latch = self._get_latch(node.id)
+            latch.acquire_write()
+            self.write_latches[node.id] = latch
+
+    # Release the latches of the writer, the last latched first
+    # The latches of the deleted nodes are dropped, no parent points to them anymore
+    def _release_write_latches(self):
+        for latch in reversed(list(self.write_latches.values())):
+            latch.release_write()
+
+        self.write_latches.clear()
+
+        with self.latches_lock:
+            for node_id in self.freed_node_ids:
+                self.node_latches.pop(node_id, None)
+
+        self.freed_node_ids.clear()
+
+    # Hold the tree for an insert or delete while the "with" block runs, releasing the node latches at the end
+    @contextmanager
+    def _writing(self):
+        with self.tree_lock.read_locked(), self.writer_lock:
+            try:
+                yield
+            finally:
+                self._release_write_latches()
 
     @staticmethod
     def _is_leaf(node):
         return len(node.children_ids) == 0
 
     # Return True if the node is the root
-    @staticmethod
-    def _is_root(node) -> bool:
-        return node.parent_id == -1
-
-    # Return True if a node is full
-    @staticmethod
-    def _is_full(node) -> bool:
-        return len(node.keys) == node.keys_size
+    def _is_root(self, node) -> bool:
+        return node.id == self.btree_info.root_id
 
     # Return True if a node has the minimum size allowed
     @staticmethod
     def _has_minimum_size(node) -> bool:
-        return len(node.keys) == math.floor(node.keys_size / 2)
+        return len(node.keys) == math.floor(node.get_keys_size() / 2)
 
     # Return True if a node has a size equal or greater than the minimum allower
     @staticmethod
     def _greater_or_equal_than_minimum_size(node) -> bool:
-        return len(node.keys) >= math.floor(node.keys_size / 2)
+        return len(node.keys) >= math.floor(node.get_keys_size() / 2)
+
+    # Return True if a node can lend a key and keep the minimum size
+    @staticmethod
+    def _greater_than_minimum_size(node) -> bool:
+        return len(node.keys) > math.floor(node.get_keys_size() / 2)
 
     ####################################################################################################################
     # Dir internal manager
@@ -954,6 +1406,6 @@ class BTree:
 
     # Return the root
     def _get_root(self):
-        return self.btree_node_table_manager.find_by_id(self.btree_info.root_id)
+        return self._get_node_by_id(self.btree_info.root_id)
 
     ####################################################################################################################
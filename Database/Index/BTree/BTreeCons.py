@@ -3,3 +3,37 @@ FLOAT_BTREE_DEGREE = 170
 STRING50_BREE_DEGREE = 60
 STRING280_BREE_DEGREE = 13
 INT_STRING50_BREE_DEGREE = 60
+
+# NODES WITH FRONT CODED STRING KEYS: MAXIMUM KEYS OF A LEAF AND CHARS OF THE PAGE WHERE THE KEYS ARE SAVED
+PREFIX_STRING50_BTREE_DEGREE = 400
+PREFIX_STRING50_PAGE_SIZE = 4096
+PREFIX_STRING280_BTREE_DEGREE = 192
+PREFIX_STRING280_PAGE_SIZE = 16384
+
+# CHARS SAVED BEFORE EACH FRONT CODED KEY: THE PREFIX SIZE AND THE SUFFIX SIZE, TWO CHARS EACH
+PREFIX_KEY_HEADER_SIZE = 4
+
+# FORMAT VERSION OF THE INDEX FILES
+# 1: nodes with parent_id
+# 2: nodes without parent_id, the parent is kept in the descent path
+# 3: entries ordered by key and then by content
+LEGACY_BTREE_VERSION = 1
+BTREE_VERSION = 3
+
+# END OF THE NODE TYPE OF TREES WITH SUBTREE COUNTS
+COUNTED_NODE_TYPE = '_counted'
+
+# END OF THE NODE TYPE OF NODES WITH FRONT CODED KEYS
+PREFIX_NODE_TYPE = '_prefix'
+
+# PAGE SIZES IN BYTES OF THE NODES WITH PAGE SIZE, THE NODE TYPE ENDS WITH THE PAGE SIZE
+PAGE_SIZE_4K = 4096
+PAGE_SIZE_16K = 16384
+PAGE_SIZE_64K = 65536
+PAGED_NODE_TYPE = '_page'
+
+# MINIMUM DEGREE OF A NODE WITH PAGE SIZE
+MIN_PAGED_BTREE_DEGREE = 3
+
+# NUMBER OF NODES KEPT IN MEMORY BY EACH TREE
+NODE_CACHE_SIZE = 512
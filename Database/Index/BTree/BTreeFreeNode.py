@@ -0,0 +1,6 @@
+from Database.DBData import DBData
+
+
+# Id of a deleted node, used again by the next new node
+class BTreeFreeNode(DBData):
+    node_id = 0
@@ -1,6 +1,10 @@
+import Database.Index.BTree.BTreeCons as BTreeCons
 from Database.DBData import DBData
 
 
 class BTreeInfo(DBData):
     # Id of the root
     root_id = 0
+
+    # Format version of the index files
+    version = BTreeCons.BTREE_VERSION
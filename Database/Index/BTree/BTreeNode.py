@@ -1,5 +1,10 @@
+import os
+
+import Database.Helpers.ListHelper as ListHelper
+import Database.Helpers.ObjectHelper as ObjectHelper
 import Database.Index.BTree.BTreeCons as BTreeCons
 from Database.Cons import SupportedTypes
+from Database.Error import BTreeError
 from Database.DBData import DBData
 
 
@@ -9,9 +14,6 @@ class BTreeNode(DBData):
     children_ids = []
     children_ids_type = SupportedTypes.INT_NAME
 
-    # If of the parent node
-    parent_id = -1
-
     # Keys saved in the tree
     # The keys type depends of each tree objective
     keys = []
@@ -21,6 +23,35 @@ class BTreeNode(DBData):
     # Each content refer to a key of the same position in the array
     contents = []
 
+    # Return the maximum number of keys of a leaf or of an intern node, the same for both in the default nodes
+    @classmethod
+    def get_max_keys(cls, leaf: bool) -> int:
+        return cls.keys_size
+
+    # Return the maximum number of keys of the node
+    def get_keys_size(self) -> int:
+        return self.get_max_keys(len(self.children_ids) == 0)
+
+    # Return True if the node has more keys than its record can save, then it must be split
+    def is_overflowing(self) -> bool:
+        return len(self.keys) > self.get_keys_size()
+
+    # Return True if the keys fit in the record of the node, checked before moving keys between nodes
+    def can_keep(self, keys: list) -> bool:
+        return len(keys) <= self.get_keys_size()
+
+    # Return how many of the sorted keys can be added before the node is full
+    def count_addable(self, keys: list) -> int:
+        return min(len(keys), max(self.get_keys_size() - len(self.keys), 0))
+
+    # Return True if any key can be added without splitting the node, like the middle key of a child split
+    def can_add_key(self) -> bool:
+        return len(self.keys) < self.get_keys_size()
+
+    # Return the position of the key that goes to the parent when the node is split
+    def get_split_position(self) -> int:
+        return ListHelper.find_middle_position(self.keys)
+
 
 # Node with integer keys
 class BTreeNodeInt(BTreeNode):
@@ -134,3 +165,254 @@ class BTreeNode50IntString(BTreeNode):
     @staticmethod
     def get_node_type():
         return SupportedTypes.FLOAT_NAME
+
+
+# Node with front coded string keys, saved together in a page of chars instead of one fixed size string for each key
+# Each key keeps only the suffix after the prefix it shares with the key before it, sorted keys share long prefixes
+# Leaves are full when the page or the contents are full
+# Intern nodes keep at most the keys that fit in the page without shared prefixes, so replacing one of their keys in a
+# delete never passes the page
+# Hash and LSM indexes of these nodes save each key whole
+class BTreePrefixNode(BTreeNode):
+    # Defines the key type of BTreeNode
+    keys_type = SupportedTypes.STRING_NAME
+    contents_type = SupportedTypes.INT_NAME
+
+    # Front coded keys: for each key the shared prefix size, the suffix size and the suffix
+    keys_data = ''
+
+    def __init__(self):
+        self.children_ids = []
+        self._keys = []
+        self.contents = []
+        self.keys_data = ''
+
+    # The keys are decoded from the page when the node is read and coded when it's saved
+    @property
+    def keys(self) -> list:
+        return self._keys
+
+    @keys.setter
+    def keys(self, keys: list):
+        self._keys = keys
+
+    def initialize(self):
+        self._keys = _decode_keys(self.keys_data)
+
+    def prepare_save(self):
+        self.keys_data = _encode_keys(self._keys)
+
+    @classmethod
+    def get_max_keys(cls, leaf: bool) -> int:
+        return cls.keys_size if leaf else cls.intern_keys_size
+
+    def is_overflowing(self) -> bool:
+        return super().is_overflowing() or _get_page_size(self._keys) > self.keys_data_size
+
+    def can_keep(self, keys: list) -> bool:
+        return super().can_keep(keys) and _get_page_size(keys) <= self.keys_data_size
+
+    # Each new key is counted whole: a key added between two others never makes the prefix of the next one smaller
+    def count_addable(self, keys: list) -> int:
+        count = super().count_addable(keys)
+        free_space = self.keys_data_size - _get_page_size(self._keys)
+
+        addable = 0
+        while addable < count and free_space >= BTreeCons.PREFIX_KEY_HEADER_SIZE + len(keys[addable]):
+            free_space = free_space - BTreeCons.PREFIX_KEY_HEADER_SIZE - len(keys[addable])
+            addable = addable + 1
+
+        return addable
+
+    # The key is counted with the biggest size, the keys of the page can't share a prefix with it
+    def can_add_key(self) -> bool:
+        return super().can_add_key() and self.keys_data_size - _get_page_size(self._keys) \
+            >= BTreeCons.PREFIX_KEY_HEADER_SIZE + self.keys_size_string
+
+    # Leaves are split in halves of about the same page size, intern nodes in halves with the same number of keys
+    def get_split_position(self) -> int:
+        if len(self.children_ids) > 0:
+            return super().get_split_position()
+
+        sizes = _get_keys_sizes(self._keys)
+        half = sum(sizes) / 2
+        left_size = 0
+        position = 0
+
+        while position < len(sizes) - 2 and left_size + sizes[position] < half:
+            left_size = left_size + sizes[position]
+            position = position + 1
+
+        return max(position, 1)
+
+    # Function to get the node type
+    @staticmethod
+    def get_node_type():
+        return SupportedTypes.STRING_NAME + BTreeCons.PREFIX_NODE_TYPE
+
+
+# Node with front coded string keys of up to 50 chars
+class BTreeNodePrefix50String(BTreePrefixNode):
+    keys_size_string = 50
+    keys_data_size = BTreeCons.PREFIX_STRING50_PAGE_SIZE
+
+    # Defines the sized based in the degree of the leaves and in the keys that always fit in the page
+    keys_size = BTreeCons.PREFIX_STRING50_BTREE_DEGREE - 1
+    intern_keys_size = BTreeCons.PREFIX_STRING50_PAGE_SIZE // (BTreeCons.PREFIX_KEY_HEADER_SIZE + 50)
+    children_ids_size = intern_keys_size + 1
+    contents_size = BTreeCons.PREFIX_STRING50_BTREE_DEGREE - 1
+
+
+# Node with front coded string keys of up to 280 chars
+class BTreeNodePrefix280String(BTreePrefixNode):
+    keys_size_string = 280
+    keys_data_size = BTreeCons.PREFIX_STRING280_PAGE_SIZE
+
+    # Defines the sized based in the degree of the leaves and in the keys that always fit in the page
+    keys_size = BTreeCons.PREFIX_STRING280_BTREE_DEGREE - 1
+    intern_keys_size = BTreeCons.PREFIX_STRING280_PAGE_SIZE // (BTreeCons.PREFIX_KEY_HEADER_SIZE + 280)
+    children_ids_size = intern_keys_size + 1
+    contents_size = BTreeCons.PREFIX_STRING280_BTREE_DEGREE - 1
+
+
+# Return the page of the sorted keys
+def _encode_keys(keys: list) -> str:
+    parts = []
+    previous = ''
+
+    for key in keys:
+        prefix_size = len(os.path.commonprefix([previous, key]))
+        parts.append(_encode_size(prefix_size) + _encode_size(len(key) - prefix_size) + key[prefix_size:])
+        previous = key
+
+    return ''.join(parts)
+
+
+# Return the keys of the page
+def _decode_keys(keys_data: str) -> list:
+    keys = []
+    previous = ''
+    position = 0
+
+    while position < len(keys_data):
+        prefix_size = _decode_size(keys_data, position)
+        suffix_size = _decode_size(keys_data, position + 2)
+        position = position + BTreeCons.PREFIX_KEY_HEADER_SIZE
+
+        previous = previous[:prefix_size] + keys_data[position:position + suffix_size]
+        keys.append(previous)
+        position = position + suffix_size
+
+    return keys
+
+
+# Return the chars used by each sorted key in the page
+def _get_keys_sizes(keys: list) -> list:
+    sizes = []
+    previous = ''
+
+    for key in keys:
+        sizes.append(BTreeCons.PREFIX_KEY_HEADER_SIZE + len(key) - len(os.path.commonprefix([previous, key])))
+        previous = key
+
+    return sizes
+
+
+# Return the chars used by the sorted keys in the page
+def _get_page_size(keys: list) -> int:
+    return sum(_get_keys_sizes(keys))
+
+
+# Sizes are saved in two chars of base 127, the chars start in 1 because the string end char is 0
+def _encode_size(size: int) -> str:
+    return chr(1 + size // 127) + chr(1 + size % 127)
+
+
+def _decode_size(keys_data: str, position: int) -> int:
+    return (ord(keys_data[position]) - 1) * 127 + ord(keys_data[position + 1]) - 1
+
+
+# Counted versions of the node classes, created once for each node class
+_counted_node_classes = {}
+
+
+# Return a node class that also keeps the number of keys in the subtree of each child
+# The node type changes, so counted and not counted indexes use different files
+def get_counted_node_class(node_class: type) -> type:
+    if node_class not in _counted_node_classes:
+        class BTreeCountedNode(node_class):
+            # Number of keys saved in the subtree of each child, only intern nodes have counts
+            children_counts = []
+            children_counts_type = SupportedTypes.INT_NAME
+            children_counts_size = node_class.children_ids_size
+
+            def __init__(self):
+                super().__init__()
+                self.children_counts = []
+
+            # Function to get the node type
+            @staticmethod
+            def get_node_type():
+                return node_class.get_node_type() + BTreeCons.COUNTED_NODE_TYPE
+
+        BTreeCountedNode.__name__ = node_class.__name__ + 'Counted'
+        _counted_node_classes[node_class] = BTreeCountedNode
+
+    return _counted_node_classes[node_class]
+
+
+# Paged versions of the node classes, created once for each node class and page size
+_paged_node_classes = {}
+
+
+# Return a node class whose records fill pages of the size in bytes, so each node read or write is one whole page
+# The degree is the biggest one of a node that fits the page, front coded nodes keep their degrees and get the rest of
+# the page for the keys. The node type ends with the page size, so each page size uses different files
+def get_paged_node_class(node_class: type, page_size: int) -> type:
+    if (node_class, page_size) not in _paged_node_classes:
+        if hasattr(node_class, 'keys_data_size'):
+            attributes = {'keys_data_size': node_class.keys_data_size + page_size
+                          - ObjectHelper.get_class_size(node_class)}
+            if attributes['keys_data_size'] < node_class.keys_data_size:
+                raise BTreeError.PageTooSmallForNode('A node of ' + node_class.__name__ + ' needs more than '
+                                                     + str(page_size) + ' bytes!')
+        else:
+            attributes = _get_degree_attributes(node_class, _get_page_degree(node_class, page_size))
+
+        attributes[SupportedTypes.RECORD_PAGE_SIZE_VARIABLE] = page_size
+        attributes['get_node_type'] = staticmethod(
+            lambda: node_class.get_node_type() + BTreeCons.PAGED_NODE_TYPE + str(page_size))
+
+        _paged_node_classes[(node_class, page_size)] = type(
+            node_class.__name__ + 'Page' + str(page_size), (node_class,), attributes)
+
+    return _paged_node_classes[(node_class, page_size)]
+
+
+# Return the biggest degree of a node of the class that fits the page
+# The node size grows the same for each degree, so it's found with the sizes of two degrees
+def _get_page_degree(node_class: type, page_size: int) -> int:
+    size = ObjectHelper.get_class_size(_get_degree_class(node_class, BTreeCons.MIN_PAGED_BTREE_DEGREE))
+    degree_size = ObjectHelper.get_class_size(_get_degree_class(node_class, BTreeCons.MIN_PAGED_BTREE_DEGREE + 1)) \
+        - size
+
+    if size > page_size:
+        raise BTreeError.PageTooSmallForNode('A node of ' + node_class.__name__ + ' needs more than '
+                                             + str(page_size) + ' bytes!')
+
+    return BTreeCons.MIN_PAGED_BTREE_DEGREE + (page_size - size) // degree_size
+
+
+# Return a class of the node with the degree, used to measure its size
+def _get_degree_class(node_class: type, degree: int) -> type:
+    return type(node_class.__name__, (node_class,), _get_degree_attributes(node_class, degree))
+
+
+# Return the sizes of the lists of a node with the degree
+def _get_degree_attributes(node_class: type, degree: int) -> dict:
+    attributes = {'children_ids_size': degree, 'keys_size': degree - 1, 'contents_size': degree - 1}
+
+    if hasattr(node_class, 'children_counts_size'):
+        attributes['children_counts_size'] = degree
+
+    return attributes
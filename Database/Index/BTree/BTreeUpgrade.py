@@ -0,0 +1,102 @@
+import Database.Helpers.DirHelper as DirHelper
+import Database.Helpers.FileHandleHelper as FileHandleHelper
+import Database.Helpers.ObjectHelper as ObjectHelper
+import Database.Index.BTree.BTreeCons as BTreeCons
+from Database.Cons import FileName
+from Database.DBData import DBData
+from Database.DBManager import DBManager
+from Database.Index.BTree.BTreeInfo import BTreeInfo
+
+# Files written during a rewrite end with this suffix, they replace the index files at the end
+_REWRITE_SUFFIX = '_rewrite'
+
+
+# BTreeInfo saved before the version attribute exists
+class LegacyBTreeInfo(DBData):
+    root_id = 0
+
+
+# Return the version 1 layout of a node class: the same node with the parent_id attribute
+def get_legacy_node_class(node_class: type) -> type:
+    return type(node_class.__name__, (node_class,), {'parent_id': -1})
+
+
+# Verify the format of the index files and rebuild them in the current format if they are old
+def upgrade_if_needed(btree, index_dir: str, ref_class: type):
+    info_manager = btree.btree_info_table_manager
+    node_manager = btree.btree_node_table_manager
+
+    finish_interrupted_rewrite(index_dir, ref_class, info_manager)
+
+    version = _get_version(info_manager)
+
+    if version is not None and version < BTreeCons.BTREE_VERSION:
+        if version == BTreeCons.LEGACY_BTREE_VERSION:
+            old_info_manager = DBManager(LegacyBTreeInfo, index_dir, FileName.INDEX_MANAGER, ref_class)
+            old_node_manager = DBManager(
+                get_legacy_node_class(btree.node_class), index_dir, FileName.INDEX_DATA, ref_class)
+        else:
+            old_info_manager = info_manager
+            old_node_manager = node_manager
+
+        # The old trees can have the contents of a key in any order, so the tree is built again
+        btree.bulk_load(read_entries(old_info_manager, old_node_manager))
+
+
+# Return the table managers of the files used to write a new version of the index
+# The files start empty, an interrupted rewrite may have left some records
+def create_rewrite_managers(index_dir: str, node_class: type, ref_class: type) -> (DBManager, DBManager):
+    rewrite_info_manager = DBManager(BTreeInfo, index_dir, FileName.INDEX_MANAGER + _REWRITE_SUFFIX, ref_class)
+    rewrite_node_manager = DBManager(node_class, index_dir, FileName.INDEX_DATA + _REWRITE_SUFFIX, ref_class)
+
+    FileHandleHelper.clear_file(rewrite_info_manager.table_file)
+    FileHandleHelper.clear_file(rewrite_node_manager.table_file)
+
+    return rewrite_info_manager, rewrite_node_manager
+
+
+# Replace the index files by the rewritten ones
+# The info file is replaced last: while it isn't replaced the old index still works
+def replace_index_files(rewrite_info_manager: DBManager, rewrite_node_manager: DBManager, info_manager: DBManager,
+                        node_manager: DBManager):
+    DirHelper.replace_file(rewrite_node_manager.table_file, node_manager.table_file)
+    DirHelper.replace_file(rewrite_info_manager.table_file, info_manager.table_file)
+
+
+# Finish a rewrite stopped after replacing the node file, only the info file is missing
+def finish_interrupted_rewrite(index_dir: str, ref_class: type, info_manager: DBManager):
+    ref_class_name = ObjectHelper.get_class_name(ref_class)
+    rewrite_info_file = DirHelper.get_index_file(ref_class_name, index_dir, FileName.INDEX_MANAGER + _REWRITE_SUFFIX)
+    rewrite_node_file = DirHelper.get_index_file(ref_class_name, index_dir, FileName.INDEX_DATA + _REWRITE_SUFFIX)
+
+    if DirHelper.file_exists(rewrite_info_file) and FileHandleHelper.get_file_size(rewrite_info_file) > 0 \
+            and (not DirHelper.file_exists(rewrite_node_file)
+                 or FileHandleHelper.get_file_size(rewrite_node_file) == 0):
+        DirHelper.replace_file(rewrite_info_file, info_manager.table_file)
+
+
+# Return the format version of the index files or None for a new index
+def _get_version(info_manager: DBManager):
+    info_size = FileHandleHelper.get_file_size(info_manager.table_file)
+
+    if info_size == 0:
+        return None
+
+    # The legacy BTreeInfo has its own size because it hasn't the version attribute
+    if info_size == ObjectHelper.get_class_size(LegacyBTreeInfo):
+        return BTreeCons.LEGACY_BTREE_VERSION
+
+    return info_manager.find_by_id(0).version
+
+
+# Return all (key, content) saved in the nodes reachable from the root
+def read_entries(info_manager: DBManager, node_manager: DBManager) -> list:
+    entries = []
+    nodes_id = [info_manager.find_by_id(0).root_id]
+
+    while len(nodes_id) > 0:
+        node = node_manager.find_by_id(nodes_id.pop())
+        entries.extend(zip(node.keys, node.contents))
+        nodes_id.extend(node.children_ids)
+
+    return entries
@@ -0,0 +1,8 @@
+# FALSE POSITIVE RATE OF THE FILTERS WHEN THE INDEX DOESN'T GIVE ONE
+FALSE_POSITIVE_RATE = 0.01
+
+# NUMBER OF KEYS OF A NEW FILTER
+INITIAL_CAPACITY = 1024
+
+# A FULL FILTER IS REBUILT WITH THIS TIMES THE KEYS OF THE INDEX
+GROWTH_FACTOR = 2
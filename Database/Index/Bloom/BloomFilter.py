@@ -0,0 +1,183 @@
+import hashlib
+import math
+import threading
+
+import Database.Helpers.DirHelper as DirHelper
+import Database.Helpers.FileHandleHelper as FileHandleHelper
+import Database.Helpers.IndexKeyHelper as IndexKeyHelper
+import Database.Helpers.ObjectHelper as ObjectHelper
+import Database.Index.Bloom.BloomCons as BloomCons
+from Database.Cons import FileName
+from Database.DBManager import DBManager
+from Database.Index.Bloom.BloomInfo import BloomInfo
+
+
+# Return the bloom filter of the index dir
+# An index with a saved filter always opens it, so every insert reaches the filter even when it isn't requested
+# Return None if the filter isn't requested and the index hasn't one
+def open_bloom_filter(index_dir: str, ref_class: type, false_positive_rate=None):
+    info_file = DirHelper.get_index_file(ObjectHelper.get_class_name(ref_class), index_dir,
+                                         FileName.INDEX_BLOOM_MANAGER)
+
+    if false_positive_rate is None and (not DirHelper.file_exists(info_file)
+                                        or FileHandleHelper.get_file_size(info_file) == 0):
+        return None
+
+    return BloomFilter(index_dir, ref_class, false_positive_rate)
+
+
+# Probabilistic set of the keys of an index, it may answer that a missing key is there but never the opposite
+# The index asks the filter before reading its files, so most lookups of missing keys don't read the disk
+# Deleted keys stay in the filter until it's rebuilt
+class BloomFilter:
+
+    def __init__(self, index_dir: str, ref_class: type, false_positive_rate=None):
+        self.bloom_info_table_manager = DBManager(BloomInfo, index_dir, FileName.INDEX_BLOOM_MANAGER, ref_class)
+        self.bits_file = DirHelper.get_index_file(ObjectHelper.get_class_name(ref_class), index_dir,
+                                                  FileName.INDEX_BLOOM_DATA)
+        DirHelper.create_file(self.bits_file)
+        # The saved rate is used when the index doesn't give one
+        self.false_positive_rate = false_positive_rate
+        # Info and bits are replaced together by a rebuild, so readers never mix two filters
+        self.filter_data = (BloomInfo(), bytearray())
+        # Keys added, estimated from the bits when the filter is loaded
+        self.entries = 0
+        # Lookups answered by the filter: missing keys, keys that may be there and the ones that weren't
+        self.negative_count = 0
+        self.positive_count = 0
+        self.false_positive_count = 0
+        self.counters_lock = threading.Lock()
+
+        # A filter not loaded must be rebuilt with the keys of the index before it's used
+        self.loaded = self._load()
+
+    # Return False if the key isn't in the index, True if it may be
+    def might_contain(self, key) -> bool:
+        bloom_info, bits = self.filter_data
+        found = all(bits[position >> 3] & (1 << (position & 7)) for position in self._get_positions(key, bloom_info))
+
+        with self.counters_lock:
+            if found:
+                self.positive_count = self.positive_count + 1
+            else:
+                self.negative_count = self.negative_count + 1
+
+        return found
+
+    # Count a lookup that passed the filter and didn't find the key in the index
+    def count_false_positive(self):
+        with self.counters_lock:
+            self.false_positive_count = self.false_positive_count + 1
+
+    # Return the part of the lookups that passed the filter and didn't find the key
+    def get_false_positive_rate(self) -> float:
+        with self.counters_lock:
+            if self.positive_count == 0:
+                return 0.0
+            return self.false_positive_count / self.positive_count
+
+    # Return True if adding the number of keys passes the capacity of the filter
+    def needs_rebuild(self, new_keys: int) -> bool:
+        return not self.loaded or self.entries + new_keys > self.filter_data[0].capacity
+
+    # Add the keys, only the bytes that change are written
+    def add_many(self, keys):
+        bloom_info, bits = self.filter_data
+        changed = set()
+
+        for key in keys:
+            for position in self._get_positions(key, bloom_info):
+                if not bits[position >> 3] & (1 << (position & 7)):
+                    bits[position >> 3] = bits[position >> 3] | (1 << (position & 7))
+                    changed.add(position >> 3)
+            self.entries = self.entries + 1
+
+        bits_file = FileHandleHelper.get_file(self.bits_file)
+        with FileHandleHelper.get_file_lock(self.bits_file):
+            for byte_position in sorted(changed):
+                bits_file.write_at(byte_position, bits[byte_position:byte_position + 1])
+
+    # Build the filter again with all keys of the index, sized for them to grow
+    # The bits are written before the info, an interrupted rebuild leaves files of different sizes
+    def rebuild(self, keys: list):
+        bloom_info = self._create_info(len(keys) * BloomCons.GROWTH_FACTOR, self.false_positive_rate)
+        bits = bytearray(bloom_info.bits_count // 8)
+
+        for key in keys:
+            for position in self._get_positions(key, bloom_info):
+                bits[position >> 3] = bits[position >> 3] | (1 << (position & 7))
+
+        bits_file = FileHandleHelper.get_file(self.bits_file)
+        with FileHandleHelper.get_file_lock(self.bits_file):
+            bits_file.write_at(0, bits)
+            bits_file.truncate(len(bits))
+
+        self.bloom_info_table_manager.save(bloom_info)
+        self.filter_data = (bloom_info, bits)
+        self.entries = len(keys)
+        self.loaded = True
+
+    ####################################################################################################################
+    # Filter internal functions
+
+    # Return the bits of the key, k positions by double hashing one digest
+    @staticmethod
+    def _get_positions(key, bloom_info: BloomInfo) -> list:
+        digest = hashlib.blake2b(IndexKeyHelper.get_key_bytes(key), digest_size=16).digest()
+        first_hash = int.from_bytes(digest[:8], 'little')
+        # The step is never zero, that would give the same position k times
+        second_hash = int.from_bytes(digest[8:], 'little') | 1
+
+        return [(first_hash + i * second_hash) % bloom_info.bits_count for i in range(0, bloom_info.hashes_count)]
+
+    # Return the info of a filter for the number of keys, with the optimal bits and hashes for the false positive rate
+    @staticmethod
+    def _create_info(capacity: int, false_positive_rate) -> BloomInfo:
+        # The info is always the first record, a rebuild updates it
+        bloom_info = BloomInfo()
+        bloom_info.id = 0
+        bloom_info.saved = True
+        bloom_info.capacity = max(capacity, BloomCons.INITIAL_CAPACITY)
+        bloom_info.false_positive_rate = false_positive_rate if false_positive_rate is not None \
+            else BloomCons.FALSE_POSITIVE_RATE
+
+        bits_count = -bloom_info.capacity * math.log(bloom_info.false_positive_rate) / (math.log(2) ** 2)
+        bloom_info.bits_count = int(math.ceil(bits_count / 8)) * 8
+        bloom_info.hashes_count = max(1, round(bloom_info.bits_count / bloom_info.capacity * math.log(2)))
+
+        return bloom_info
+
+    # Load the saved filter, the false positive rate of the index replaces the saved one
+    # Return False if there isn't a filter saved with this rate or its files don't agree, then it must be rebuilt
+    def _load(self) -> bool:
+        bloom_info = self.bloom_info_table_manager.find_by_id(0)
+
+        if not bloom_info:
+            return False
+
+        if self.false_positive_rate is None:
+            self.false_positive_rate = bloom_info.false_positive_rate
+        elif self.false_positive_rate != bloom_info.false_positive_rate:
+            return False
+
+        bits_file = FileHandleHelper.get_file(self.bits_file)
+        with FileHandleHelper.get_file_lock(self.bits_file):
+            bits = bytearray(bits_file.read_at(0))
+
+        self.filter_data = (bloom_info, bits)
+        if len(bits) * 8 != bloom_info.bits_count:
+            return False
+
+        self.entries = self._estimate_entries(bloom_info, bits)
+        return True
+
+    # Return the number of keys that set the bits: n = -m / k * ln(1 - X / m), X bits set of m
+    @staticmethod
+    def _estimate_entries(bloom_info: BloomInfo, bits: bytearray) -> int:
+        bits_set = bin(int.from_bytes(bits, 'little')).count('1')
+
+        if bits_set >= bloom_info.bits_count:
+            return bloom_info.capacity + 1
+
+        return int(round(-bloom_info.bits_count / bloom_info.hashes_count
+                         * math.log(1 - bits_set / bloom_info.bits_count)))
@@ -0,0 +1,15 @@
+from Database.DBData import DBData
+
+
+class BloomInfo(DBData):
+    # Number of keys the filter holds with the false positive rate
+    capacity = 0
+
+    # Size of the bit array, always a multiple of 8
+    bits_count = 0
+
+    # Number of bits set by each key
+    hashes_count = 0
+
+    # False positive rate used to size the filter
+    false_positive_rate = 0.0
@@ -0,0 +1,40 @@
+from Database.Cons import Values
+from Database.DBData import DBData
+
+
+# Default properties of any bucket
+class HashBucket(DBData):
+    # Keys saved in the bucket
+    # The keys type depends of each index objective
+    keys = []
+
+    # Content save the id of the content referenced by the key of the same position
+    contents = []
+
+    # Id of the next bucket of the chain in the overflow file, used when the bucket is full
+    overflow_id = Values.INT_EMPTY
+
+    def __init__(self):
+        self.keys = []
+        self.contents = []
+        self.overflow_id = Values.INT_EMPTY
+
+
+# Bucket classes, created once for each node class
+_bucket_classes = {}
+
+# Attributes of the node classes that define the keys and contents of the bucket
+_BUCKET_ATTRIBUTES = ['keys_type', 'keys_size', 'keys_size_string', 'contents_type', 'contents_size',
+                      'contents_size_string']
+
+
+# Return a bucket class with the same keys, contents and sizes of the BTree node class
+# So an index can be a BTree or a hash index using the same node class
+def get_bucket_class(node_class: type) -> type:
+    if node_class not in _bucket_classes:
+        attributes = {attribute: getattr(node_class, attribute) for attribute in _BUCKET_ATTRIBUTES
+                      if hasattr(node_class, attribute)}
+
+        _bucket_classes[node_class] = type(node_class.__name__ + 'Bucket', (HashBucket,), attributes)
+
+    return _bucket_classes[node_class]
@@ -0,0 +1,11 @@
+# NUMBER OF BUCKETS OF A NEW INDEX
+INITIAL_BUCKETS = 4
+
+# A BUCKET IS SPLIT WHEN THE ENTRIES FILL MORE THAN THIS PART OF THE BUCKETS
+MAX_LOAD_FACTOR = 0.75
+
+# FORMAT VERSION OF THE INDEX FILES
+HASH_VERSION = 1
+
+# END OF THE NODE TYPE OF HASH INDEXES
+HASH_NODE_TYPE = '_hash'
@@ -0,0 +1,6 @@
+from Database.DBData import DBData
+
+
+# Id of an emptied overflow bucket, used again by the next overflow bucket
+class HashFreeBucket(DBData):
+    bucket_id = 0
@@ -0,0 +1,392 @@
+import zlib
+
+import Database.Helpers.FileHandleHelper as FileHandleHelper
+import Database.Helpers.IndexKeyHelper as IndexKeyHelper
+import Database.Helpers.ObjectHelper as ObjectHelper
+import Database.Index.Hash.HashCons as HashCons
+from Database.Cons import FileName, Values
+from Database.DBManager import DBManager
+from Database.Index.BTree.BTree import BTree
+from Database.Index.Bloom.BloomFilter import open_bloom_filter
+from Database.Index.Hash.HashBucket import get_bucket_class
+from Database.Index.Hash.HashFreeBucket import HashFreeBucket
+from Database.Index.Hash.HashInfo import HashInfo
+from Database.ReadWriteLock import ReadWriteLock
+
+
+# Index for equality lookups with linear hashing
+# The primary buckets are saved in the data file with the bucket number as id, full buckets continue in buckets of the
+# overflow file. When the entries fill the buckets a bucket is split in two, one at a time and in order, so the
+# number of buckets grows with the index and a lookup usually reads one bucket
+class HashIndex:
+    # The node class is the BTree node class of the index, the buckets have the same keys and contents
+    # With a bloom false positive rate lookups of missing keys usually stop in a bloom filter, like in the BTree
+    def __init__(self, index_name: str, node_class: object, ref_class: object, content_class=None,
+                 bloom_false_positive_rate=None):
+        self.content_class = content_class
+        self.node_class = node_class
+        self.bucket_class = get_bucket_class(node_class)
+        self.ref_class = ref_class
+        self.index_name = index_name
+        self.hash_info = HashInfo()
+        # Readers run together, inserts and deletes run alone
+        self.index_lock = ReadWriteLock()
+        self.bloom_filter = None
+        self.hash_info_table_manager = DBManager(
+            HashInfo, self._get_index_dir(), FileName.INDEX_MANAGER, ref_class)
+        self.bucket_table_manager = DBManager(
+            self.bucket_class, self._get_index_dir(), FileName.INDEX_DATA, ref_class)
+        self.overflow_table_manager = DBManager(
+            self.bucket_class, self._get_index_dir(), FileName.INDEX_OVERFLOW, ref_class)
+        # Ids of the emptied overflow buckets, the new overflow buckets take them before growing the overflow file
+        self.free_bucket_table_manager = DBManager(
+            HashFreeBucket, self._get_index_dir(), FileName.INDEX_FREE, ref_class)
+
+        # Load the index info if exists, if not create the first buckets
+        if not self._get_hash_info():
+            self._create_buckets()
+            self._load_btree_entries()
+
+        self.bloom_filter = open_bloom_filter(self._get_index_dir(), ref_class, bloom_false_positive_rate)
+        if self.bloom_filter is not None and not self.bloom_filter.loaded:
+            self.bloom_filter.rebuild(self._read_keys())
+
+    # Return a list of the contents with the key, in content order like the BTree
+    def find_contents(self, key) -> list:
+        key = IndexKeyHelper.normalize_key(self.node_class, key)
+
+        if self.bloom_filter is not None and not self.bloom_filter.might_contain(key):
+            return []
+
+        with self.index_lock.read_locked():
+            contents_id = [content for bucket in self._get_chain(self._get_bucket_number(key))
+                           for bucket_key, content in zip(bucket.keys, bucket.contents) if bucket_key == key]
+
+        if self.bloom_filter is not None and len(contents_id) == 0:
+            self.bloom_filter.count_false_positive()
+
+        return sorted(contents_id)
+
+    # Return a list of the contents with the key
+    def find(self, key) -> list:
+        if self.content_class is not None:
+            contents_obj = []
+            for content_id in self.find_contents(key):
+                dbm = DBManager(self.content_class)
+                contents_obj.append(dbm.find_by_id(content_id))
+
+            return contents_obj
+        else:
+            return self.find_contents(key)
+
+    # Return the first found, use when each key has just one content
+    def find_first_or_default(self, key) -> object:
+        contents_id = self.find_contents(key)
+
+        # If not found return None
+        if len(contents_id) == 0:
+            return None
+
+        if self.content_class is not None:
+            dbm = DBManager(self.content_class)
+            return dbm.find_by_id(contents_id[0])
+        else:
+            return contents_id[0]
+
+    # Return the id of the object with the key and content
+    def find_with_key_and_content(self, key, content):
+        key, content = self._normalize(key, content)
+
+        if self.bloom_filter is not None and not self.bloom_filter.might_contain(key):
+            return None
+
+        with self.index_lock.read_locked():
+            for bucket in self._get_chain(self._get_bucket_number(key)):
+                if self._get_entry_position(bucket, key, content) is not None:
+                    return content
+
+        return None
+
+    # Insert a key with it's content
+    def insert(self, key, content):
+        self.insert_many([(key, content)])
+
+    # Insert a list of (key, content), the index info is saved once at the end
+    def insert_many(self, pairs):
+        entries = [self._normalize(key, content) for key, content in pairs]
+
+        with self.index_lock.write_locked():
+            self._add_to_bloom_filter([key for key, content in entries])
+
+            for key, content in entries:
+                self._insert_in_chain(self._get_bucket_number(key), key, content)
+                self.hash_info.entries = self.hash_info.entries + 1
+
+                if self._is_overloaded():
+                    self._split_next_bucket()
+
+            self.hash_info_table_manager.save(self.hash_info)
+
+    # Add the delta to the content of the key, a key that isn't in the index is inserted with the delta as content
+    # Use for counters, where each key has just one content. The content is changed in the bucket where it's found
+    # Return the content before the increment, None if the key was inserted
+    def increment(self, key, delta):
+        key = IndexKeyHelper.normalize_key(self.node_class, key)
+
+        with self.index_lock.write_locked():
+            chain = self._get_chain(self._get_bucket_number(key))
+
+            for chain_position, bucket in enumerate(chain):
+                if key in bucket.keys:
+                    position = bucket.keys.index(key)
+                    content = bucket.contents[position]
+                    bucket.contents[position] = content + delta
+                    self._save_bucket(bucket, chain_position == 0)
+
+                    return content
+
+            self._add_to_bloom_filter([key])
+            self._insert_in_chain(self._get_bucket_number(key), key, delta)
+            self.hash_info.entries = self.hash_info.entries + 1
+
+            if self._is_overloaded():
+                self._split_next_bucket()
+
+            self.hash_info_table_manager.save(self.hash_info)
+            return None
+
+    # Delete the key and it's content from the index
+    # Return True in success and False if key doesn't exists
+    def delete(self, key, content) -> bool:
+        key, content = self._normalize(key, content)
+
+        with self.index_lock.write_locked():
+            chain = self._get_chain(self._get_bucket_number(key))
+
+            for chain_position, bucket in enumerate(chain):
+                position = self._get_entry_position(bucket, key, content)
+
+                if position is not None:
+                    del bucket.keys[position]
+                    del bucket.contents[position]
+
+                    # An empty overflow bucket leaves the chain
+                    if chain_position > 0 and len(bucket.keys) == 0:
+                        previous = chain[chain_position - 1]
+                        previous.overflow_id = bucket.overflow_id
+                        self._save_bucket(previous, chain_position - 1 == 0)
+                        self._delete_overflow(bucket)
+                    else:
+                        self._save_bucket(bucket, chain_position == 0)
+
+                    self.hash_info.entries = self.hash_info.entries - 1
+                    self.hash_info_table_manager.save(self.hash_info)
+                    return True
+
+        return False
+
+    # Drop all index data
+    def drop(self):
+        with self.index_lock.write_locked():
+            self.hash_info_table_manager.drop()
+
+    # Return the file with the index info, it doesn't exist after the index is dropped
+    def get_info_file(self) -> str:
+        return self.hash_info_table_manager.table_file
+
+    ####################################################################################################################
+    # Buckets
+
+    # Return the number of the primary bucket of the key
+    # The buckets before the split position are already split, so they use the hash of the next level
+    def _get_bucket_number(self, key) -> int:
+        key_hash = self._hash(key)
+        level_buckets = self._get_level_buckets()
+
+        bucket_number = key_hash % level_buckets
+        if bucket_number < self.hash_info.split_position:
+            bucket_number = key_hash % (level_buckets * 2)
+
+        return bucket_number
+
+    # Return the primary bucket and its overflow buckets
+    def _get_chain(self, bucket_number: int) -> list:
+        chain = [self.bucket_table_manager.find_by_id(bucket_number)]
+
+        while chain[-1].overflow_id != Values.INT_EMPTY:
+            chain.append(self.overflow_table_manager.find_by_id(chain[-1].overflow_id))
+
+        return chain
+
+    # Insert in the first bucket of the chain with space, adding an overflow bucket if all are full
+    def _insert_in_chain(self, bucket_number: int, key, content):
+        chain = self._get_chain(bucket_number)
+
+        for bucket in chain:
+            if len(bucket.keys) < bucket.keys_size:
+                bucket.keys.append(key)
+                bucket.contents.append(content)
+                self._save_bucket(bucket, bucket is chain[0])
+                return
+
+        overflow = self._new_overflow()
+        overflow.keys.append(key)
+        overflow.contents.append(content)
+        self.overflow_table_manager.save(overflow)
+
+        chain[-1].overflow_id = overflow.id
+        self._save_bucket(chain[-1], len(chain) == 1)
+
+    # Split the bucket in the split position, the entries whose hash in the next level is different go to a new bucket
+    def _split_next_bucket(self):
+        level_buckets = self._get_level_buckets()
+        bucket_number = self.hash_info.split_position
+        chain = self._get_chain(bucket_number)
+
+        entries = [(key, content) for bucket in chain for key, content in zip(bucket.keys, bucket.contents)]
+        kept = [entry for entry in entries if self._hash(entry[0]) % (level_buckets * 2) == bucket_number]
+        moved = [entry for entry in entries if self._hash(entry[0]) % (level_buckets * 2) != bucket_number]
+
+        # The overflow buckets of the old chain are used again by both chains
+        free_overflows = chain[1:]
+        self._write_chain(chain[0], kept, free_overflows)
+
+        # The new bucket is saved at the end of the data file, its id is the number of the new bucket
+        self._write_chain(self.bucket_class(), moved, free_overflows)
+
+        for overflow in free_overflows:
+            self._delete_overflow(overflow)
+
+        self.hash_info.split_position = self.hash_info.split_position + 1
+        if self.hash_info.split_position == level_buckets:
+            self.hash_info.level = self.hash_info.level + 1
+            self.hash_info.split_position = 0
+
+    # Write the entries in the primary bucket and in overflow buckets taken from the free ones or new
+    def _write_chain(self, primary, entries, free_overflows):
+        size = self.bucket_class.keys_size
+        buckets = [primary]
+
+        for _ in range(size, len(entries), size):
+            buckets.append(free_overflows.pop(0) if len(free_overflows) > 0 else self._new_overflow())
+
+        for position, bucket in enumerate(buckets):
+            bucket.keys = [key for key, content in entries[position * size:(position + 1) * size]]
+            bucket.contents = [content for key, content in entries[position * size:(position + 1) * size]]
+
+        # Save from the last to the first, so each bucket knows the id of the next one
+        next_id = Values.INT_EMPTY
+        for bucket in reversed(buckets):
+            bucket.overflow_id = next_id
+            self._save_bucket(bucket, bucket is primary)
+            next_id = bucket.id
+
+    # Save a primary bucket in the data file or an overflow bucket in the overflow file
+    def _save_bucket(self, bucket, primary: bool):
+        if primary:
+            self.bucket_table_manager.save(bucket)
+        else:
+            self.overflow_table_manager.save(bucket)
+
+    # Delete the overflow bucket from the file, its id is kept to be used again
+    def _delete_overflow(self, bucket):
+        self.overflow_table_manager.delete(bucket)
+
+        free_bucket = HashFreeBucket()
+        free_bucket.bucket_id = bucket.id
+        self.free_bucket_table_manager.save(free_bucket)
+
+    # Return a new overflow bucket, it gets the id of the last emptied bucket when there is one
+    def _new_overflow(self):
+        bucket = self.bucket_class()
+        free_file = self.free_bucket_table_manager.table_file
+        free_buckets = FileHandleHelper.get_file_size(free_file) // ObjectHelper.get_class_size(HashFreeBucket)
+
+        if free_buckets > 0:
+            free_bucket = self.free_bucket_table_manager.find_by_id(free_buckets - 1)
+            FileHandleHelper.truncate_file(free_file, (free_buckets - 1) * ObjectHelper.get_class_size(HashFreeBucket))
+
+            bucket.id = free_bucket.bucket_id
+            bucket.saved = True
+
+        return bucket
+
+    # Return the number of buckets at the start of the level
+    def _get_level_buckets(self) -> int:
+        return HashCons.INITIAL_BUCKETS * 2 ** self.hash_info.level
+
+    # Return True if the entries fill more buckets than the maximum allowed
+    def _is_overloaded(self) -> bool:
+        buckets = self._get_level_buckets() + self.hash_info.split_position
+
+        return self.hash_info.entries > buckets * self.bucket_class.keys_size * HashCons.MAX_LOAD_FACTOR
+
+    # Return the position of the (key, content) in the bucket, None if it isn't there
+    @staticmethod
+    def _get_entry_position(bucket, key, content):
+        for position in range(0, len(bucket.keys)):
+            if bucket.keys[position] == key and bucket.contents[position] == content:
+                return position
+
+        return None
+
+    ####################################################################################################################
+    # Bloom filter
+
+    # Add the keys to the bloom filter before they reach the buckets, a full filter is rebuilt bigger
+    def _add_to_bloom_filter(self, keys: list):
+        if self.bloom_filter is not None:
+            if self.bloom_filter.needs_rebuild(len(keys)):
+                self.bloom_filter.rebuild(self._read_keys() + keys)
+            else:
+                self.bloom_filter.add_many(keys)
+
+    # Return the keys of all entries
+    def _read_keys(self) -> list:
+        buckets = self._get_level_buckets() + self.hash_info.split_position
+
+        return [key for bucket_number in range(0, buckets) for bucket in self._get_chain(bucket_number)
+                for key in bucket.keys]
+
+    ####################################################################################################################
+    # Index internal functions
+
+    # Return a hash of the key that is the same in every execution, the python hash of strings isn't
+    @staticmethod
+    def _hash(key) -> int:
+        return zlib.crc32(IndexKeyHelper.get_key_bytes(key))
+
+    # Return the key and content as they are saved in the buckets
+    def _normalize(self, key, content) -> tuple:
+        key = IndexKeyHelper.normalize_key(self.node_class, key)
+        content = IndexKeyHelper.normalize_content(self.node_class, content)
+
+        return key, content
+
+    # Load the saved index info
+    # Return TRUE for success and FALSE if the index is new
+    def _get_hash_info(self) -> bool:
+        hash_info = self.hash_info_table_manager.find_by_id(0)
+
+        if not hash_info:
+            return False
+        else:
+            self.hash_info = hash_info
+            return True
+
+    # Create the empty buckets of a new index
+    def _create_buckets(self):
+        for bucket_number in range(0, HashCons.INITIAL_BUCKETS):
+            self.bucket_table_manager.save(self.bucket_class())
+
+        self.hash_info = HashInfo()
+        self.hash_info_table_manager.save(self.hash_info)
+
+    # An index that was a BTree starts with the entries of the tree
+    def _load_btree_entries(self):
+        self.insert_many(BTree.read_saved_entries(self.index_name, self.node_class, self.ref_class,
+                                                  self.content_class))
+
+    # Return the dir of the index
+    def _get_index_dir(self) -> str:
+        return self.index_name + FileName.INDEX_SEPARATOR + self.node_class.get_node_type() + HashCons.HASH_NODE_TYPE
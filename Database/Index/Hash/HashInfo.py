@@ -0,0 +1,16 @@
+import Database.Index.Hash.HashCons as HashCons
+from Database.DBData import DBData
+
+
+class HashInfo(DBData):
+    # Each level doubles the number of buckets
+    level = 0
+
+    # Next bucket to be split in the level, the buckets before it are already split
+    split_position = 0
+
+    # Number of saved entries
+    entries = 0
+
+    # Format version of the index files
+    version = HashCons.HASH_VERSION
@@ -0,0 +1,79 @@
+import threading
+
+import Database.Helpers.DirHelper as DirHelper
+from Database.Error import IndexRegistryError
+from Database.Index.BTree.BTree import BTree
+from Database.Index.Hash.HashIndex import HashIndex
+from Database.Index.Lsm.LsmIndex import LsmIndex
+
+# Open indexes by (index class, index name, node class, ref class, counted, page size), all users of an index share its
+# files
+_open_indexes = {}
+
+# Number of dropped dirs when the open indexes were verified
+_verified_drop_count = 0
+
+# Two threads opening the same index get the same index
+# An index that was a BTree opens the tree while it's opened, so the lock is taken again by the same thread
+_registry_lock = threading.RLock()
+
+
+# Return the open tree of the index, opening it in the first use
+# A bloom false positive rate adds a bloom filter to the index, use for indexes where most lookups miss
+# A page size saves each node in one page of that size
+def get_btree(index_name: str, node_class: object, ref_class: object, content_class=None, counted=False,
+              bloom_false_positive_rate=None, page_size=None) -> BTree:
+    return _get_index((BTree, index_name, node_class, ref_class, counted, page_size), content_class,
+                      bloom_false_positive_rate,
+                      lambda: BTree(index_name, node_class, ref_class, content_class, counted,
+                                    bloom_false_positive_rate, page_size))
+
+
+# Return the open hash index, opening it in the first use
+# Use for indexes searched only by equality, the node class gives the keys and contents of the buckets
+def get_hash_index(index_name: str, node_class: object, ref_class: object, content_class=None,
+                   bloom_false_positive_rate=None) -> HashIndex:
+    return _get_index((HashIndex, index_name, node_class, ref_class), content_class, bloom_false_positive_rate,
+                      lambda: HashIndex(index_name, node_class, ref_class, content_class, bloom_false_positive_rate))
+
+
+# Return the open LSM index, opening it in the first use
+# Use for indexes with many inserts and deletes, the node class gives the keys and contents of the runs
+def get_lsm_index(index_name: str, node_class: object, ref_class: object, content_class=None) -> LsmIndex:
+    return _get_index((LsmIndex, index_name, node_class, ref_class), content_class, None,
+                      lambda: LsmIndex(index_name, node_class, ref_class, content_class))
+
+
+# Close all open indexes, the next use opens them again from the files
+def clear():
+    with _registry_lock:
+        _open_indexes.clear()
+
+
+# Return the open index of the key or the index created by open_index
+def _get_index(key: tuple, content_class, bloom_false_positive_rate, open_index):
+    with _registry_lock:
+        _forget_dropped_indexes()
+
+        index = _open_indexes.get(key)
+
+        if index is None:
+            index = open_index()
+            _open_indexes[key] = index
+        elif index.content_class != content_class:
+            raise IndexRegistryError.IndexOpenedWithOtherContentClass
+        elif bloom_false_positive_rate is not None and index.bloom_filter is None:
+            raise IndexRegistryError.IndexOpenedWithoutBloomFilter
+
+    return index
+
+
+# Forget the indexes whose files were removed by a drop, they are created again in the next use
+def _forget_dropped_indexes():
+    global _verified_drop_count
+
+    if _verified_drop_count != DirHelper.get_drop_count():
+        _verified_drop_count = DirHelper.get_drop_count()
+
+        for key in [key for key, index in _open_indexes.items() if not DirHelper.file_exists(index.get_info_file())]:
+            del _open_indexes[key]
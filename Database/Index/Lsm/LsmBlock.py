@@ -0,0 +1,42 @@
+from Database.Cons import SupportedTypes
+from Database.DBData import DBData
+
+
+# Entries of a run or of the log, sorted by (key, content) in the runs
+class LsmBlock(DBData):
+    # Keys saved in the block
+    # The keys type depends of each index objective
+    keys = []
+
+    # Content save the id of the content referenced by the key of the same position
+    contents = []
+
+    # True if the entry of the same position was deleted, it hides the entry in the older runs
+    deleted = []
+    deleted_type = SupportedTypes.BOOL_NAME
+
+    def __init__(self):
+        self.keys = []
+        self.contents = []
+        self.deleted = []
+
+
+# Block classes, created once for each node class
+_block_classes = {}
+
+# Attributes of the node classes that define the keys and contents of the block
+_BLOCK_ATTRIBUTES = ['keys_type', 'keys_size', 'keys_size_string', 'contents_type', 'contents_size',
+                     'contents_size_string']
+
+
+# Return a block class with the same keys, contents and sizes of the BTree node class
+# So an index can be a BTree or a LSM index using the same node class
+def get_block_class(node_class: type) -> type:
+    if node_class not in _block_classes:
+        attributes = {attribute: getattr(node_class, attribute) for attribute in _BLOCK_ATTRIBUTES
+                      if hasattr(node_class, attribute)}
+        attributes['deleted_size'] = node_class.keys_size
+
+        _block_classes[node_class] = type(node_class.__name__ + 'Block', (LsmBlock,), attributes)
+
+    return _block_classes[node_class]
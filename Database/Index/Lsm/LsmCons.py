@@ -0,0 +1,14 @@
+# NUMBER OF ENTRIES OF THE MEMTABLE THAT FLUSH IT TO A NEW RUN
+MEMTABLE_SIZE = 2048
+
+# NUMBER OF RUNS OF THE SAME SIZE THAT ARE MERGED IN ONE
+COMPACTION_RUNS = 4
+
+# MAXIMUM NUMBER OF RUNS, THE MEMTABLE ISN'T FLUSHED WHILE THERE ARE MORE WAITING FOR A COMPACTION
+MAX_RUNS = 64
+
+# FORMAT VERSION OF THE INDEX FILES
+LSM_VERSION = 1
+
+# END OF THE NODE TYPE OF LSM INDEXES
+LSM_NODE_TYPE = '_lsm'
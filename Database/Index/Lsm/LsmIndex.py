@@ -0,0 +1,424 @@
+import bisect
+import heapq
+import itertools
+import math
+import threading
+
+import Database.Helpers.FileHandleHelper as FileHandleHelper
+import Database.Helpers.IndexKeyHelper as IndexKeyHelper
+import Database.Index.Lsm.LsmCons as LsmCons
+from Database.Cons import FileName
+from Database.DBManager import DBManager
+from Database.Index.BTree.BTree import BTree
+from Database.Index.Lsm.LsmBlock import get_block_class
+from Database.Index.Lsm.LsmInfo import LsmInfo
+from Database.Index.Lsm.LsmRun import LsmRun
+from Database.ReadWriteLock import ReadWriteLock
+
+
+# Index for many writes, like a log-structured merge tree
+# Inserts and deletes go to a sorted memtable in memory and to the end of the log file, when the memtable is full it's
+# written in a new sorted run file. A thread merges the runs of the same size in the background, so reads look at
+# the memtable and a few runs, from the newest to the oldest
+# A delete writes a deleted entry that hides the older ones, each (key, content) is saved once
+class LsmIndex:
+    # The node class is the BTree node class of the index, the blocks of the runs have the same keys and contents
+    def __init__(self, index_name: str, node_class: object, ref_class: object, content_class=None):
+        self.content_class = content_class
+        self.node_class = node_class
+        self.block_class = get_block_class(node_class)
+        self.ref_class = ref_class
+        self.index_name = index_name
+        self.lsm_info = LsmInfo()
+        # Readers run together, writers and the change of the runs after a compaction run alone
+        self.index_lock = ReadWriteLock()
+        # Only one compaction at a time
+        self.compaction_lock = threading.Lock()
+        self.compaction_thread = None
+        # Entries not written in a run sorted by (key, content) and the deleted flag of each one
+        self.memtable = []
+        self.memtable_deleted = {}
+        # Runs from the newest to the oldest
+        self.runs = []
+        self.lsm_info_table_manager = DBManager(LsmInfo, self._get_index_dir(), FileName.INDEX_MANAGER, ref_class)
+        self.log_table_manager = DBManager(self.block_class, self._get_index_dir(), FileName.INDEX_LOG, ref_class)
+
+        # Load the runs and the entries of the log if the index exists, if not start with the entries of the BTree
+        if self._get_lsm_info():
+            self.runs = [self._open_run(run_id) for run_id in self.lsm_info.runs_ids]
+            self._load_log()
+        else:
+            self.lsm_info_table_manager.save(self.lsm_info)
+            self._load_btree_entries()
+
+    # Return a list of the contents with the key, in content order like the BTree
+    def find_contents(self, key) -> list:
+        key = IndexKeyHelper.normalize_key(self.node_class, key)
+
+        with self.index_lock.read_locked():
+            return self._find_contents(key)
+
+    # Return a list of the contents with the key
+    def find(self, key) -> list:
+        return self._load_contents(self.find_contents(key))
+
+    # Return the first found, use when each key has just one content
+    def find_first_or_default(self, key) -> object:
+        contents_id = self.find_contents(key)
+
+        # If not found return None
+        if len(contents_id) == 0:
+            return None
+
+        if self.content_class is not None:
+            dbm = DBManager(self.content_class)
+            return dbm.find_by_id(contents_id[0])
+        else:
+            return contents_id[0]
+
+    # Return the id of the object with the key and content
+    def find_with_key_and_content(self, key, content):
+        key, content = self._normalize(key, content)
+
+        with self.index_lock.read_locked():
+            if self._is_saved(key, content):
+                return content
+
+        return None
+
+    # Return the contents of the n smallest keys, skipping the offset smallest ones
+    def find_n_smallest(self, n, offset=0):
+        with self.index_lock.read_locked():
+            entries = self._merge_sources(self._get_sources(False), True, False)
+            contents = [content for key, content, deleted in itertools.islice(entries, offset, offset + n)]
+
+        return self._load_contents(contents)
+
+    # Return the contents of the n biggest keys, skipping the offset biggest ones
+    def find_n_biggest(self, n, offset=0):
+        with self.index_lock.read_locked():
+            entries = self._merge_sources(self._get_sources(True), True, True)
+            contents = [content for key, content, deleted in itertools.islice(entries, offset, offset + n)]
+
+        return self._load_contents(contents)
+
+    # Return the content of the smallest key
+    def find_smallest(self):
+        smallest = self.find_n_smallest(1)
+
+        if len(smallest) > 0:
+            return smallest[0]
+        else:
+            return None
+
+    # Insert a key with it's content
+    def insert(self, key, content):
+        self.insert_many([(key, content)])
+
+    # Insert a list of (key, content), the log is written in full blocks
+    def insert_many(self, pairs):
+        entries = [self._normalize(key, content) + (False,) for key, content in pairs]
+
+        with self.index_lock.write_locked():
+            self._write_entries(entries)
+
+    # Add the delta to the content of the key, a key that isn't in the index is inserted with the delta as content
+    # Use for counters, where each key has just one content. The old entry is deleted and the new one inserted together
+    # Return the content before the increment, None if the key was inserted
+    def increment(self, key, delta):
+        key = IndexKeyHelper.normalize_key(self.node_class, key)
+
+        with self.index_lock.write_locked():
+            contents = self._find_contents(key)
+
+            if len(contents) == 0:
+                self._write_entries([(key, delta, False)])
+                return None
+
+            self._write_entries([(key, contents[0], True), (key, contents[0] + delta, False)])
+            return contents[0]
+
+    # Change the key of the entry with the old key and the content, the deleted and the new entries are written together
+    # Return True in success and False if the old key and content don't exist
+    def move(self, old_key, new_key, content) -> bool:
+        old_key, content = self._normalize(old_key, content)
+        new_key = IndexKeyHelper.normalize_key(self.node_class, new_key)
+
+        with self.index_lock.write_locked():
+            if not self._is_saved(old_key, content):
+                return False
+
+            self._write_entries([(old_key, content, True), (new_key, content, False)])
+            return True
+
+    # Delete the key and it's content from the index
+    # Return True in success and False if key doesn't exists
+    def delete(self, key, content) -> bool:
+        key, content = self._normalize(key, content)
+
+        with self.index_lock.write_locked():
+            if not self._is_saved(key, content):
+                return False
+
+            self._write_entries([(key, content, True)])
+            return True
+
+    # Write the memtable in a new run
+    def flush(self):
+        with self.index_lock.write_locked():
+            self._flush()
+
+    # Merge all runs in one, waiting the compaction running in the background
+    def compact(self):
+        self._compact(True)
+
+    # Drop all index data
+    def drop(self):
+        with self.compaction_lock, self.index_lock.write_locked():
+            self.memtable = []
+            self.memtable_deleted = {}
+            self.runs = []
+            self.lsm_info_table_manager.drop()
+
+    # Return the file with the index info, it doesn't exist after the index is dropped
+    def get_info_file(self) -> str:
+        return self.lsm_info_table_manager.table_file
+
+    ####################################################################################################################
+    # Writes
+
+    # Write the entries in the log and in the memtable, flushing it when full
+    def _write_entries(self, entries):
+        self._write_log(entries)
+
+        for key, content, deleted in entries:
+            if (key, content) not in self.memtable_deleted:
+                bisect.insort(self.memtable, (key, content))
+            self.memtable_deleted[(key, content)] = deleted
+
+        # With too many runs the memtable waits the compaction
+        if len(self.memtable) >= LsmCons.MEMTABLE_SIZE and len(self.runs) < LsmCons.MAX_RUNS:
+            self._flush()
+
+    # Append the entries to the log in full blocks
+    def _write_log(self, entries):
+        size = self.block_class.keys_size
+
+        for start in range(0, len(entries), size):
+            block = self.block_class()
+            block.keys = [key for key, content, deleted in entries[start:start + size]]
+            block.contents = [content for key, content, deleted in entries[start:start + size]]
+            block.deleted = [deleted for key, content, deleted in entries[start:start + size]]
+            self.log_table_manager.save(block)
+
+    # Write the memtable in a new run, the log is cleared after the run is saved in the info
+    def _flush(self):
+        if len(self.memtable) == 0:
+            return
+
+        run = self._new_run()
+        run.write((key, content, self.memtable_deleted[(key, content)]) for key, content in self.memtable)
+
+        self.runs.insert(0, run)
+        self._save_runs()
+
+        FileHandleHelper.clear_file(self.log_table_manager.table_file)
+        self.memtable = []
+        self.memtable_deleted = {}
+
+        if len(self._get_runs_to_merge()) > 0:
+            self._start_compaction()
+
+    # Load the entries written after the last flush
+    def _load_log(self):
+        block_id = 0
+        block = self.log_table_manager.find_by_id(block_id)
+
+        while block:
+            for key, content, deleted in zip(block.keys, block.contents, block.deleted):
+                if (key, content) not in self.memtable_deleted:
+                    bisect.insort(self.memtable, (key, content))
+                self.memtable_deleted[(key, content)] = deleted
+
+            block_id = block_id + 1
+            block = self.log_table_manager.find_by_id(block_id)
+
+    # An index that was a BTree starts with a run of the entries of the tree
+    def _load_btree_entries(self):
+        entries = sorted(set(BTree.read_saved_entries(self.index_name, self.node_class, self.ref_class,
+                                                     self.content_class)))
+
+        if len(entries) > 0:
+            run = self._new_run()
+            run.write((key, content, False) for key, content in entries)
+            self.runs.insert(0, run)
+            self._save_runs()
+
+    ####################################################################################################################
+    # Compaction
+
+    # Start the compaction thread if it isn't running
+    def _start_compaction(self):
+        if self.compaction_thread is None or not self.compaction_thread.is_alive():
+            self.compaction_thread = threading.Thread(target=self._compact, daemon=True)
+            self.compaction_thread.start()
+
+    # Merge runs while there are runs to merge, with merge_all all runs are merged in one
+    # The merge reads the runs without the index lock, they don't change, only the change of the runs locks the index
+    def _compact(self, merge_all=False):
+        with self.compaction_lock:
+            while True:
+                with self.index_lock.read_locked():
+                    runs = list(self.runs) if merge_all and len(self.runs) > 1 else self._get_runs_to_merge()
+                    # The oldest run is the last one while the compaction runs, flushes add runs at the start
+                    with_oldest = len(runs) > 0 and runs[-1] is self.runs[-1]
+
+                if len(runs) == 0:
+                    return
+
+                with self.index_lock.write_locked():
+                    merged_run = self._new_run()
+
+                # Deleted entries are only needed while older runs can have the entry
+                merged_run.write(self._merge_sources([run.iterate() for run in runs], with_oldest, False))
+
+                with self.index_lock.write_locked():
+                    position = self.runs.index(runs[0])
+                    self.runs[position:position + len(runs)] = [merged_run] if merged_run.blocks_count > 0 else []
+                    self._save_runs()
+
+                for run in runs:
+                    run.remove()
+                if merged_run.blocks_count == 0:
+                    merged_run.remove()
+
+    # Return the newest runs of the same tier if there are enough of them, an empty list if not
+    # The tier grows with the log of the size, so each entry is merged a few times
+    def _get_runs_to_merge(self) -> list:
+        if len(self.runs) == 0:
+            return []
+
+        tier = self._get_tier(self.runs[0])
+        runs = list(itertools.takewhile(lambda run: self._get_tier(run) == tier, self.runs))
+
+        # Many runs are merged even if they have different sizes
+        if len(runs) < LsmCons.COMPACTION_RUNS and len(self.runs) >= LsmCons.MAX_RUNS:
+            return list(self.runs)
+
+        return runs if len(runs) >= LsmCons.COMPACTION_RUNS else []
+
+    # Return the tier of the run: the runs of one memtable are in the tier 0, merging them gives the tier 1...
+    def _get_tier(self, run: LsmRun) -> int:
+        memtable_blocks = math.ceil(LsmCons.MEMTABLE_SIZE / self.block_class.keys_size)
+
+        return int(math.log(max(run.blocks_count / memtable_blocks, 1), LsmCons.COMPACTION_RUNS))
+
+    ####################################################################################################################
+    # Reads
+
+    # Return the contents of the key whose newest entry isn't deleted, in content order
+    def _find_contents(self, key) -> list:
+        # The newest state of each content
+        deleted_contents = {}
+
+        position = bisect.bisect_left(self.memtable, (key,))
+        while position < len(self.memtable) and self.memtable[position][0] == key:
+            deleted_contents[self.memtable[position][1]] = self.memtable_deleted[self.memtable[position]]
+            position = position + 1
+
+        for run in self.runs:
+            for content, deleted in run.find_entries(key):
+                deleted_contents.setdefault(content, deleted)
+
+        return sorted(content for content, deleted in deleted_contents.items() if not deleted)
+
+    # Return True if the newest entry of the (key, content) exists and isn't deleted
+    def _is_saved(self, key, content) -> bool:
+        if (key, content) in self.memtable_deleted:
+            return not self.memtable_deleted[(key, content)]
+
+        for run in self.runs:
+            deleted = run.find_entry(key, content)
+            if deleted is not None:
+                return not deleted
+
+        return False
+
+    # Return the entries of the memtable and of each run in order, from the newest to the oldest source
+    def _get_sources(self, descending: bool) -> list:
+        memtable = [(key, content, self.memtable_deleted[(key, content)]) for key, content in self.memtable]
+
+        if descending:
+            return [reversed(memtable)] + [run.iterate_descending() for run in self.runs]
+        else:
+            return [memtable] + [run.iterate() for run in self.runs]
+
+    # Merge the sorted entries of the sources, the first source is the newest
+    # Return the newest entry of each (key, content), without the deleted ones if drop_deleted
+    @staticmethod
+    def _merge_sources(sources: list, drop_deleted: bool, descending: bool):
+        # The age of the source comes after the (key, content), so the newest entry is the first of the merge
+        aged_sources = [LsmIndex._add_age(source, -age if descending else age) for age, source in enumerate(sources)]
+        last_entry = None
+
+        for key, content, age, deleted in heapq.merge(*aged_sources, reverse=descending):
+            if (key, content) != last_entry:
+                last_entry = (key, content)
+
+                if not (deleted and drop_deleted):
+                    yield key, content, deleted
+
+    # Return the entries of the source with the age after the (key, content)
+    @staticmethod
+    def _add_age(source, age: int):
+        for key, content, deleted in source:
+            yield key, content, age, deleted
+
+    ####################################################################################################################
+    # Index internal functions
+
+    # Return the objects of the contents if the index has a content class
+    def _load_contents(self, contents_id: list) -> list:
+        if self.content_class is not None:
+            dbm = DBManager(self.content_class)
+            return [dbm.find_by_id(content_id) for content_id in contents_id]
+        else:
+            return contents_id
+
+    # Return the key and content as they are saved in the runs
+    def _normalize(self, key, content) -> tuple:
+        key = IndexKeyHelper.normalize_key(self.node_class, key)
+        content = IndexKeyHelper.normalize_content(self.node_class, content)
+
+        return key, content
+
+    # Return a new run with the next run id
+    def _new_run(self) -> LsmRun:
+        run = self._open_run(self.lsm_info.next_run_id)
+        self.lsm_info.next_run_id = self.lsm_info.next_run_id + 1
+
+        return run
+
+    # Return the run of the id
+    def _open_run(self, run_id: int) -> LsmRun:
+        return LsmRun(run_id, self.block_class, self._get_index_dir(), self.ref_class)
+
+    # Save the ids of the runs in the index info
+    def _save_runs(self):
+        self.lsm_info.runs_ids = [run.run_id for run in self.runs]
+        self.lsm_info_table_manager.save(self.lsm_info)
+
+    # Load the saved index info
+    # Return TRUE for success and FALSE if the index is new
+    def _get_lsm_info(self) -> bool:
+        lsm_info = self.lsm_info_table_manager.find_by_id(0)
+
+        if not lsm_info:
+            return False
+        else:
+            self.lsm_info = lsm_info
+            return True
+
+    # Return the dir of the index
+    def _get_index_dir(self) -> str:
+        return self.index_name + FileName.INDEX_SEPARATOR + self.node_class.get_node_type() + LsmCons.LSM_NODE_TYPE
@@ -0,0 +1,19 @@
+import Database.Index.Lsm.LsmCons as LsmCons
+from Database.Cons import SupportedTypes
+from Database.DBData import DBData
+
+
+class LsmInfo(DBData):
+    # Ids of the runs, from the newest to the oldest
+    runs_ids = []
+    runs_ids_type = SupportedTypes.INT_NAME
+    runs_ids_size = LsmCons.MAX_RUNS
+
+    # Id of the next run file
+    next_run_id = 0
+
+    # Format version of the index files
+    version = LsmCons.LSM_VERSION
+
+    def __init__(self):
+        self.runs_ids = []
@@ -0,0 +1,107 @@
+import bisect
+
+import Database.Helpers.DirHelper as DirHelper
+import Database.Helpers.FileHandleHelper as FileHandleHelper
+import Database.Helpers.ObjectHelper as ObjectHelper
+from Database.Cons import FileName
+from Database.DBManager import DBManager
+
+
+# Immutable file of (key, content, deleted) entries sorted by (key, content), saved in full blocks
+# The blocks are found by binary search, so a lookup reads a few blocks of each run
+class LsmRun:
+
+    def __init__(self, run_id: int, block_class: type, index_dir: str, ref_class: type):
+        self.run_id = run_id
+        self.block_class = block_class
+        self.block_table_manager = DBManager(block_class, index_dir, FileName.INDEX_RUN + str(run_id), ref_class)
+        self.blocks_count = self._get_blocks_count()
+
+    # Write the sorted entries, replacing what an interrupted write left in the file
+    def write(self, entries):
+        FileHandleHelper.clear_file(self.block_table_manager.table_file)
+        block = self.block_class()
+
+        for key, content, deleted in entries:
+            block.keys.append(key)
+            block.contents.append(content)
+            block.deleted.append(deleted)
+
+            if len(block.keys) == self.block_class.keys_size:
+                self.block_table_manager.save(block)
+                block = self.block_class()
+
+        if len(block.keys) > 0:
+            self.block_table_manager.save(block)
+
+        self.blocks_count = self._get_blocks_count()
+
+    # Return the (content, deleted) of the entries with the key
+    def find_entries(self, key) -> list:
+        entries = []
+        block_id = self._find_first_block(key)
+
+        while block_id < self.blocks_count:
+            block = self.block_table_manager.find_by_id(block_id)
+
+            for block_key, content, deleted in zip(block.keys, block.contents, block.deleted):
+                if block_key == key:
+                    entries.append((content, deleted))
+                elif block_key > key:
+                    return entries
+
+            block_id = block_id + 1
+
+        return entries
+
+    # Return the deleted flag of the entry or None if the run hasn't it
+    def find_entry(self, key, content):
+        block_id = self._find_first_block(key, content)
+
+        if block_id < self.blocks_count:
+            block = self.block_table_manager.find_by_id(block_id)
+            entries = list(zip(block.keys, block.contents))
+            position = bisect.bisect_left(entries, (key, content))
+
+            if position < len(entries) and entries[position] == (key, content):
+                return block.deleted[position]
+
+        return None
+
+    # Walk the entries in ascending order, reading one block at a time
+    def iterate(self):
+        for block_id in range(0, self.blocks_count):
+            block = self.block_table_manager.find_by_id(block_id)
+            yield from zip(block.keys, block.contents, block.deleted)
+
+    # Walk the entries in descending order, reading one block at a time
+    def iterate_descending(self):
+        for block_id in range(self.blocks_count - 1, -1, -1):
+            block = self.block_table_manager.find_by_id(block_id)
+            yield from reversed(list(zip(block.keys, block.contents, block.deleted)))
+
+    # Delete the run file
+    def remove(self):
+        DirHelper.delete_file(self.block_table_manager.table_file)
+
+    # Return the first block whose last entry isn't smaller than the key, or than the (key, content) if given
+    def _find_first_block(self, key, content=None) -> int:
+        low = 0
+        high = self.blocks_count
+
+        while low < high:
+            middle = (low + high) // 2
+            block = self.block_table_manager.find_by_id(middle)
+            last_entry = (block.keys[-1], block.contents[-1])
+
+            if last_entry[0] < key or (content is not None and last_entry < (key, content)):
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    # Return the number of blocks saved in the file
+    def _get_blocks_count(self) -> int:
+        return FileHandleHelper.get_file_size(self.block_table_manager.table_file) \
+            // ObjectHelper.get_class_size(self.block_class)
@@ -0,0 +1,56 @@
+import threading
+from contextlib import contextmanager
+
+
+# Lock that allows many readers or one writer
+# A waiting writer stops new readers, so a stream of readers can't keep the writer waiting forever
+class ReadWriteLock:
+
+    def __init__(self):
+        self.condition = threading.Condition(threading.Lock())
+        self.readers = 0
+        self.writer = False
+        self.waiting_writers = 0
+
+    def acquire_read(self):
+        with self.condition:
+            while self.writer or self.waiting_writers > 0:
+                self.condition.wait()
+            self.readers = self.readers + 1
+
+    def release_read(self):
+        with self.condition:
+            self.readers = self.readers - 1
+            if self.readers == 0:
+                self.condition.notify_all()
+
+    def acquire_write(self):
+        with self.condition:
+            self.waiting_writers = self.waiting_writers + 1
+            while self.writer or self.readers > 0:
+                self.condition.wait()
+            self.waiting_writers = self.waiting_writers - 1
+            self.writer = True
+
+    def release_write(self):
+        with self.condition:
+            self.writer = False
+            self.condition.notify_all()
+
+    # Use with the "with" statement to hold the lock for reading
+    @contextmanager
+    def read_locked(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    # Use with the "with" statement to hold the lock for writing
+    @contextmanager
+    def write_locked(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
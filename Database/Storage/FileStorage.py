@@ -0,0 +1,75 @@
+import mmap
+import os
+import shutil
+
+import Database.Cons.File as File
+from Database.Storage.Storage import Storage
+
+
+# Storage in a disk file, opened without buffer so every manager of the file reads what the others wrote
+class FileStorage(Storage):
+
+    def __init__(self, file_name: str):
+        try:
+            self.buffer = open(file_name, 'r+b', buffering=0)
+        except FileNotFoundError:
+            # The file was replaced or removed after its creation
+            self.buffer = open(file_name, 'w+b', buffering=0)
+
+    def read_at(self, position: int, size=-1) -> bytes:
+        self.buffer.seek(position, File.ABSOLUTE_FILE_POSITION)
+        return self.buffer.read(size)
+
+    def write_at(self, position: int, data: bytes):
+        self.buffer.seek(position, File.ABSOLUTE_FILE_POSITION)
+        self.buffer.write(data)
+
+    def size(self) -> int:
+        return os.fstat(self.buffer.fileno()).st_size
+
+    def truncate(self, size: int):
+        self.buffer.truncate(size)
+
+    def sync(self):
+        os.fsync(self.buffer.fileno())
+
+    def close(self):
+        self.buffer.close()
+
+    @staticmethod
+    def map(file_name: str):
+        with open(file_name, 'rb') as buffer:
+            # An empty file can't be mapped
+            if os.fstat(buffer.fileno()).st_size == 0:
+                return b''
+
+            return mmap.mmap(buffer.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def exists(file_name: str) -> bool:
+        return os.path.exists(file_name)
+
+    @staticmethod
+    def create(file_name: str):
+        if not os.path.exists(file_name):
+            buffer = open(file_name, 'w')
+            buffer.close()
+
+    @staticmethod
+    def remove(file_name: str):
+        if os.path.exists(file_name):
+            os.remove(file_name)
+
+    @staticmethod
+    def replace(source_name: str, destination_name: str):
+        os.replace(source_name, destination_name)
+
+    @staticmethod
+    def create_dir(dir_name: str):
+        # The parent dirs may be in other storage
+        os.makedirs(dir_name, exist_ok=True)
+
+    @staticmethod
+    def remove_dir(dir_name: str):
+        if os.path.exists(dir_name):
+            shutil.rmtree(dir_name)
@@ -0,0 +1,72 @@
+import os
+
+from Database.Storage.Storage import Storage
+
+# Bytes of each file kept in memory, they are lost when the process ends
+_files = {}
+
+
+# Storage in the memory of the process, used by tests and benchmarks to skip the disk
+# The dirs aren't kept, a file is inside a dir when its name starts with the dir name
+class MemoryStorage(Storage):
+
+    def __init__(self, file_name: str):
+        # A file removed after its creation starts empty again, as in the disk
+        self.data = _files.setdefault(file_name, bytearray())
+
+    def read_at(self, position: int, size=-1) -> bytes:
+        end = len(self.data) if size < 0 else position + size
+        return bytes(self.data[position:end])
+
+    def write_at(self, position: int, data: bytes):
+        if position > len(self.data):
+            self.data.extend(bytes(position - len(self.data)))
+
+        self.data[position:position + len(data)] = data
+
+    def size(self) -> int:
+        return len(self.data)
+
+    def truncate(self, size: int):
+        if size < len(self.data):
+            del self.data[size:]
+        else:
+            self.data.extend(bytes(size - len(self.data)))
+
+    def sync(self):
+        return None
+
+    def close(self):
+        self.data = None
+
+    @staticmethod
+    def map(file_name: str):
+        if file_name not in _files:
+            raise FileNotFoundError(file_name)
+
+        return bytes(_files[file_name])
+
+    @staticmethod
+    def exists(file_name: str) -> bool:
+        return file_name in _files
+
+    @staticmethod
+    def create(file_name: str):
+        _files.setdefault(file_name, bytearray())
+
+    @staticmethod
+    def remove(file_name: str):
+        _files.pop(file_name, None)
+
+    @staticmethod
+    def replace(source_name: str, destination_name: str):
+        _files[destination_name] = _files.pop(source_name)
+
+    @staticmethod
+    def create_dir(dir_name: str):
+        return None
+
+    @staticmethod
+    def remove_dir(dir_name: str):
+        for file_name in [file_name for file_name in list(_files) if file_name.startswith(dir_name + os.sep)]:
+            del _files[file_name]
@@ -0,0 +1,82 @@
+import mmap
+import os
+
+from Database.Storage.FileStorage import FileStorage
+
+# Smallest size of the map after the first write, the map doubles when a write passes it
+_MIN_MAPPED_SIZE = 64 * 1024
+
+
+# Storage in a disk file mapped in memory, reads and writes are copies without system calls
+# A write after the end of the map grows the file and the map at least to the double of their size, so appends don't map
+# the file again every time. The bytes after the end of the data are removed from the file when it's synced or closed,
+# the open files are closed when the process exits
+# An empty file can't be mapped, it has no map until the first write
+class MmapStorage(FileStorage):
+
+    def __init__(self, file_name: str):
+        super().__init__(file_name)
+        self.mapped = None
+        # Size of the data, the mapped file can be bigger
+        self.data_size = os.fstat(self.buffer.fileno()).st_size
+        self._map_file(self.data_size)
+
+    def read_at(self, position: int, size=-1) -> bytes:
+        if self.mapped is None:
+            return b''
+
+        end = self.data_size if size < 0 else min(position + size, self.data_size)
+        return self.mapped[position:end]
+
+    def write_at(self, position: int, data: bytes):
+        end = position + len(data)
+
+        if end > self._get_mapped_size():
+            self._remap(max(end, self._get_mapped_size() * 2, _MIN_MAPPED_SIZE))
+
+        self.mapped[position:end] = data
+        self.data_size = max(self.data_size, end)
+
+    def size(self) -> int:
+        return self.data_size
+
+    # The file is cut in the size, so the bytes after it are zeros when the file grows again
+    def truncate(self, size: int):
+        if size != self.data_size:
+            self.data_size = size
+            self._remap(size)
+
+    def sync(self):
+        if self.mapped is not None:
+            self.mapped.flush()
+
+        if self._get_mapped_size() != self.data_size:
+            self._remap(self.data_size)
+
+        super().sync()
+
+    def close(self):
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+
+        self.buffer.truncate(self.data_size)
+        super().close()
+
+    # Return the size of the map, the same of the file
+    def _get_mapped_size(self) -> int:
+        return 0 if self.mapped is None else len(self.mapped)
+
+    # Change the size of the file and map it again, the map can't be resized in every system
+    def _remap(self, size: int):
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+
+        self.buffer.truncate(size)
+        self._map_file(size)
+
+    # Map the whole file, if it isn't empty
+    def _map_file(self, size: int):
+        if size > 0:
+            self.mapped = mmap.mmap(self.buffer.fileno(), size)
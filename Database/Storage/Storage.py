@@ -0,0 +1,87 @@
+from abc import ABC, abstractmethod
+
+
+# Bytes of one database file, read and written by position
+# The table managers hold the lock of the file while they use it, so the storages don't have their own locks
+# The functions on paths are static, each storage keeps its files and dirs in its own place
+class Storage(ABC):
+
+    # Return the bytes starting in the position, all bytes until the end if the size isn't given
+    @abstractmethod
+    def read_at(self, position: int, size=-1) -> bytes:
+        pass
+
+    # Write the bytes in the position, the file grows when they pass its end
+    @abstractmethod
+    def write_at(self, position: int, data: bytes):
+        pass
+
+    # Write the bytes in the end of the file and return their position
+    def append(self, data: bytes) -> int:
+        position = self.size()
+        self.write_at(position, data)
+
+        return position
+
+    # Return the size of the file in bytes
+    @abstractmethod
+    def size(self) -> int:
+        pass
+
+    # Keep only the bytes before the size
+    @abstractmethod
+    def truncate(self, size: int):
+        pass
+
+    # Make the written bytes durable
+    @abstractmethod
+    def sync(self):
+        pass
+
+    # Release the file, its bytes stay in the storage
+    @abstractmethod
+    def close(self):
+        pass
+
+    # Return the bytes of the whole file to be only read, the storages on disk map the file instead of copying it
+    # The returned buffer keeps the bytes of the file even after it's replaced
+    @staticmethod
+    @abstractmethod
+    def map(file_name: str):
+        pass
+
+    # Return if the file exists
+    @staticmethod
+    @abstractmethod
+    def exists(file_name: str) -> bool:
+        pass
+
+    # Create the file empty if it doesn't exist
+    @staticmethod
+    @abstractmethod
+    def create(file_name: str):
+        pass
+
+    # Delete the file if it exists, it must be closed
+    @staticmethod
+    @abstractmethod
+    def remove(file_name: str):
+        pass
+
+    # Replace the destination file by the source one, both must be closed
+    @staticmethod
+    @abstractmethod
+    def replace(source_name: str, destination_name: str):
+        pass
+
+    # Create the dir if it doesn't exist
+    @staticmethod
+    @abstractmethod
+    def create_dir(dir_name: str):
+        pass
+
+    # Delete the dir and all files inside it if it exists, the files must be closed
+    @staticmethod
+    @abstractmethod
+    def remove_dir(dir_name: str):
+        pass
@@ -1,24 +1,26 @@
 from Data.Twitter import Tweet
-from Database.Index.BTree.BTree import BTree
+from Database.Index import IndexRegistry
 from Database.Index.BTree.BTreeNode import BTreeNode50String, BTreeNode50IntString, BTreeNodeFloat
 from Twitter.TwitterCore import TwitterCore
 from Core.Train import Train
+from Core import ScoreMigration
 
 
-def start_twitter_stream(key_word):
+def start_twitter_stream(key_word, workers=1):
     twitter_core = TwitterCore()
 
     twitter_core.start_with(key_word)
 
-    twitter_core.stream(key_word, 'en')
+    twitter_core.stream(key_word, 'en', workers)
 
 
 def start_train(file_name, n_columns, emotion_position, text_position, init_line, negative_emotion_value,
                 consider_only_negative=False):
     train = Train()
 
-    train.read_train_data(file_name, "utf-8", n_columns, emotion_position, text_position, init_line,
-                          negative_emotion_value, consider_only_negative)
+    # Each core counts a shard of the dataset
+    train.read_train_data_sharded(file_name, "utf-8", n_columns, emotion_position, text_position, init_line,
+                                  negative_emotion_value, consider_only_negative)
 
 
 def line_separator():
@@ -31,7 +33,9 @@ def load_dataset():
     print("Iremos fazer algumas perguntas sobre o padrão do dataset.")
     print("Ele deve ser um CSV contendo uma coluna classificando o texto como ruim ou bom e uma outra coluna com o "
           "texto completo.")
-    print("Assim que a leitura começar você poderá pressionar \"C\" para finaliza-lá a qualquer momento.")
+    print("Assim que a leitura começar você poderá pressionar Ctrl+C (ou \"C\" no Windows) para finaliza-lá a qualquer "
+          "momento.")
+    print("Uma leitura finalizada continua da última linha salva quando o mesmo arquivo for carregado de novo.")
     line_separator()
     class_column = int(input("Digite o número da coluna com a classificação: "))
     text_column = int(input("Digite o número da coluna com o texto: "))
@@ -41,15 +45,16 @@ def load_dataset():
     file_name = input("Digite o nome do arquivo (sem o .csv): ") + ".csv"
     line_separator()
     print("Iremos começar o treinamento agora...")
-    print("Lembre-se: para finalizar aperte enter!")
     start_train(file_name, columns, class_column, text_column, init, negative_value)
 
 
 def search_tweets():
     line_separator()
     key = input("Digite uma palavra para fazer a pesquisa por tweets: ")
+    workers = int(input("Digite o número de processos que filtram os tweets (com 1 cada tweet é salvo assim que "
+                        "chega): "))
 
-    start_twitter_stream(key)
+    start_twitter_stream(key, workers)
 
     analize_data(key)
 
@@ -95,7 +100,7 @@ def start_analize_action(key, input):
 
 
 def load_number_of_positive_and_negative_tweets(key):
-    bt_data_name = BTree('twitter_core_data_name', BTreeNode50String, TwitterCore, TwitterCore)
+    bt_data_name = IndexRegistry.get_btree('twitter_core_data_name', BTreeNode50String, TwitterCore, TwitterCore)
     core = bt_data_name.find_first_or_default(key)
 
     line_separator()
@@ -113,7 +118,8 @@ def load_most_negative_tweets(key):
     if n > 50:
         n = 50
 
-    bt_core_most_negative = BTree('twitter_core_most_negative_' + key, BTreeNodeFloat, TwitterCore, Tweet)
+    bt_core_most_negative = IndexRegistry.get_btree('twitter_core_most_negative_' + key,
+                                                    BTreeNodeFloat, TwitterCore, Tweet)
     tweets = bt_core_most_negative.find_n_biggest(n)
 
     line_separator()
@@ -130,7 +136,8 @@ def load_most_positive_tweets(key):
     if n > 50:
         n = 50
 
-    bt_core_most_positive = BTree('twitter_core_most_positive_' + key, BTreeNodeFloat, TwitterCore, Tweet)
+    bt_core_most_positive = IndexRegistry.get_btree('twitter_core_most_positive_' + key,
+                                                    BTreeNodeFloat, TwitterCore, Tweet)
     tweets = bt_core_most_positive.find_n_biggest(n)
 
     line_separator()
@@ -147,8 +154,10 @@ def load_most_used_negative_words(key):
     if n > 50:
         n = 50
 
-    bt_core_most_negative_words = BTree('bt_core_most_negative_words' + key, BTreeNode50IntString, TwitterCore)
-    bt_core_most_negative_words_main = BTree('bt_core_most_negative_words_main_' + key, BTreeNode50String, TwitterCore)
+    bt_core_most_negative_words = IndexRegistry.get_lsm_index('bt_core_most_negative_words' + key,
+                                                              BTreeNode50IntString, TwitterCore)
+    bt_core_most_negative_words_main = IndexRegistry.get_lsm_index('bt_core_most_negative_words_main_' + key,
+                                                                   BTreeNode50String, TwitterCore)
     words = bt_core_most_negative_words.find_n_biggest(n)
 
     line_separator()
@@ -166,8 +175,10 @@ def load_most_used_positive_words(key):
     if n > 50:
         n = 50
 
-    bt_core_most_positive_words = BTree('bt_core_most_positive_words' + key, BTreeNode50IntString, TwitterCore)
-    bt_core_most_positive_words_main = BTree('bt_core_most_positive_words_main_' + key, BTreeNode50String, TwitterCore)
+    bt_core_most_positive_words = IndexRegistry.get_lsm_index('bt_core_most_positive_words' + key,
+                                                              BTreeNode50IntString, TwitterCore)
+    bt_core_most_positive_words_main = IndexRegistry.get_lsm_index('bt_core_most_positive_words_main_' + key,
+                                                                   BTreeNode50String, TwitterCore)
     words = bt_core_most_positive_words.find_n_biggest(n)
 
     line_separator()
@@ -216,7 +227,14 @@ def main():
     # start_twitter_stream('Trump')
 
     # start_train("KazAnove_dataset.csv", 6, 0, 5, 810004, "0")
+
+    # A training stopped while its counts were saved finishes saving them before they're used
+    Train.recover()
+    # The saved tweets must have the same scores of the new ones
+    ScoreMigration.migrate_if_needed()
     menu()
 
 
-main()
+# The preprocessing workers import this module again in some systems, they must not start the menu
+if __name__ == '__main__':
+    main()
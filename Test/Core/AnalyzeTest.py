@@ -0,0 +1,167 @@
+import math
+import unittest
+from unittest import mock
+
+import Core.Cons.ScoreTypes as ScoreTypes
+from Core import Analyze
+from Core.Error import AnalyzeError
+from Data.Dataset import WordDS, WorldDS
+from Database.DBManager import DBManager
+
+# (text, n_positive, n_negative) of the trained words
+_TEST_WORDS = [('good', 3, 1), ('bad', 1, 2), ('only', 2, 0)]
+
+
+# Tweet with its filtered words
+class TestTweet:
+
+    def __init__(self, words: list):
+        self.words = words
+
+    def get_filtered_words(self) -> list:
+        return self.words
+
+
+# Save a training of four positive and two negative tweets with the words
+def _save_training(words: list):
+    world_ds = WorldDS()
+    world_ds.total_positive = 4
+    world_ds.total_negative = 2
+    world_ds.db_save()
+
+    words_ds = []
+    for text, n_positive, n_negative in words:
+        word_ds = WordDS(text)
+        word_ds.n_positive = n_positive
+        word_ds.n_negative = n_negative
+        words_ds.append(word_ds)
+
+    WordDS.db_save_many(words_ds)
+
+
+def _drop_training():
+    DBManager(WorldDS).drop()
+    DBManager(WordDS).drop()
+
+
+class AnalyzeTest(unittest.TestCase):
+
+    def test_model_with_linear_scores(self):
+        _save_training(_TEST_WORDS)
+
+        model = Analyze.NaiveBayesModel(ScoreTypes.LINEAR, use_snapshot=False)
+        positive = model.infer(['good', 'only', 'unknown'])
+        negative = model.infer(['bad'])
+        empty = model.infer([])
+
+        _drop_training()
+
+        self.assertFalse(positive[0])
+        self.assertAlmostEqual(3 / 4 * 4 / 6, positive[1])
+        self.assertAlmostEqual(1 / 2 * 2 / 6, positive[2])
+        self.assertTrue(negative[0])
+        self.assertAlmostEqual(1 / 4 * 4 / 6, negative[1])
+        self.assertAlmostEqual(2 / 6, negative[2])
+        self.assertAlmostEqual(4 / 6, empty[1])
+        self.assertAlmostEqual(2 / 6, empty[2])
+        # Without smoothing a word of only one class isn't used
+        self.assertNotIn('only', model.word_probabilities)
+
+    def test_model_reads_the_new_training_in_reload(self):
+        _save_training(_TEST_WORDS[:1])
+
+        model = Analyze.NaiveBayesModel(ScoreTypes.LINEAR, use_snapshot=False)
+        before = model.infer(['bad'])
+
+        _save_training(_TEST_WORDS[1:2])
+        model.reload()
+        after = model.infer(['bad'])
+
+        _drop_training()
+
+        self.assertAlmostEqual(4 / 6, before[1])
+        self.assertAlmostEqual(1 / 4 * 4 / 6, after[1])
+
+    def test_log_scores_are_the_logs_of_the_linear_scores(self):
+        _save_training(_TEST_WORDS)
+
+        linear_model = Analyze.NaiveBayesModel(ScoreTypes.LINEAR, use_snapshot=False)
+        log_model = Analyze.NaiveBayesModel(ScoreTypes.LOG, use_snapshot=False)
+        texts = [['good', 'only', 'unknown'], ['bad'], ['good', 'bad', 'good'], []]
+        linear_emotions = [linear_model.infer(words) for words in texts]
+        log_emotions = [log_model.infer(words) for words in texts]
+
+        _drop_training()
+
+        for linear_emotion, log_emotion in zip(linear_emotions, log_emotions):
+            self.assertEqual(linear_emotion[0], log_emotion[0])
+            self.assertAlmostEqual(math.log(linear_emotion[1]), log_emotion[1])
+            self.assertAlmostEqual(math.log(linear_emotion[2]), log_emotion[2])
+
+    def test_log_scores_of_long_texts(self):
+        _save_training(_TEST_WORDS + [('sad', 1, 1)])
+
+        linear_emotion = Analyze.NaiveBayesModel(ScoreTypes.LINEAR, use_snapshot=False).infer(['sad'] * 3000)
+        log_emotion = Analyze.NaiveBayesModel(ScoreTypes.LOG, use_snapshot=False).infer(['sad'] * 3000)
+
+        _drop_training()
+
+        # The linear scores become zero and the text looks positive
+        self.assertEqual((False, 0, 0), linear_emotion)
+        self.assertTrue(log_emotion[0])
+        self.assertAlmostEqual(3000 * math.log(1 / 4) + math.log(4 / 6), log_emotion[1])
+        self.assertAlmostEqual(3000 * math.log(1 / 2) + math.log(2 / 6), log_emotion[2])
+
+    def test_model_with_smoothing(self):
+        _save_training(_TEST_WORDS)
+
+        emotion = Analyze.NaiveBayesModel(ScoreTypes.LINEAR, 1, use_snapshot=False).infer(['only'])
+
+        _drop_training()
+
+        self.assertAlmostEqual(3 / 6 * 4 / 6, emotion[1])
+        self.assertAlmostEqual(1 / 4 * 2 / 6, emotion[2])
+
+    def test_infer_emotion_batch_gives_the_scores_of_infer_emotion(self):
+        _save_training(_TEST_WORDS + [('sad', 1, 1)])
+
+        words = ['good', 'bad', 'only', 'sad', 'unknown']
+        # Small batches are scored in Python, big ones with NumPy if it's installed
+        tweets = [TestTweet([words[(x + y) % 5] for y in range(0, x % 7)]) for x in range(0, 100)]
+        results = []
+
+        for score_type in (ScoreTypes.LOG, ScoreTypes.LINEAR):
+            model = Analyze.NaiveBayesModel(score_type, use_snapshot=False)
+
+            with mock.patch.object(Analyze, '_model', model):
+                emotions = [Analyze.infer_emotion(tweet) for tweet in tweets]
+                results.append((emotions, Analyze.infer_emotion_batch(tweets),
+                                Analyze.infer_emotion_batch(tweets[:10])))
+
+                with mock.patch.object(Analyze, 'numpy', None):
+                    results.append((emotions, Analyze.infer_emotion_batch(tweets), []))
+
+        _drop_training()
+
+        for emotions, batch_emotions, small_batch_emotions in results:
+            self.assertEqual(len(emotions), len(batch_emotions))
+            self.assertEqual(emotions[:len(small_batch_emotions)], small_batch_emotions)
+
+            for emotion, batch_emotion in zip(emotions, batch_emotions):
+                self.assertEqual(emotion[0], batch_emotion[0])
+                self.assertAlmostEqual(emotion[1], batch_emotion[1])
+                self.assertAlmostEqual(emotion[2], batch_emotion[2])
+
+    def test_unknown_score_type(self):
+        with self.assertRaises(AnalyzeError.UnknownScoreType):
+            Analyze.set_scoring('square')
+
+    def test_model_without_training(self):
+        model = Analyze.NaiveBayesModel(ScoreTypes.LINEAR, use_snapshot=False)
+
+        with self.assertRaises(AnalyzeError.TryingToInferWithoutWorldData):
+            model.infer(['good'])
+
+        _drop_training()
+
+        self.assertFalse(model.trained)
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+from Core.DatasetReader import DatasetReader
+from Core.Error import TrainError
+
+# Rows with quoted commas, line breaks and quotes, a blank line and a row without the text
+_TEST_DATASET = '0,"hello, world"\n4,"line one\nline two"\n\n0,plain\n4,"say ""hi"""\n0\n4,last\n'
+_TEST_ROWS = [('0', 'hello, world'), ('4', 'line one\nline two'), ('0', 'plain'), ('4', 'say "hi"'), ('4', 'last')]
+
+
+class DatasetReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def _write_dataset(self, text: str) -> str:
+        file_name = os.path.join(self.dir.name, 'dataset.csv')
+
+        with open(file_name, 'w', encoding='utf-8', newline='') as file:
+            file.write(text)
+
+        return file_name
+
+    def test_read_batches_of_quoted_rows(self):
+        file_name = self._write_dataset(_TEST_DATASET)
+
+        with DatasetReader(file_name, 'utf-8', 0, 1) as dataset:
+            batches = list(dataset.read_batches(2))
+            skipped_rows = dataset.skipped_rows
+
+        self.assertEqual([_TEST_ROWS[0:2], _TEST_ROWS[2:4], _TEST_ROWS[4:]], batches)
+        self.assertEqual(2, skipped_rows)
+
+    def test_read_batches_after_the_init_row(self):
+        file_name = self._write_dataset(_TEST_DATASET)
+
+        with DatasetReader(file_name, 'utf-8', 0, 1, init_row=3) as dataset:
+            rows = [row for batch in dataset.read_batches() for row in batch]
+
+        self.assertEqual(_TEST_ROWS[2:], rows)
+
+    def test_read_batches_with_header_names(self):
+        file_name = self._write_dataset('text,id,emotion\nfirst,1,0\n"second, with comma",2,4\n')
+
+        with DatasetReader(file_name, 'utf-8', 'emotion', 'text') as dataset:
+            rows = [row for batch in dataset.read_batches() for row in batch]
+
+        with self.assertRaises(TrainError.ColumnNotInDatasetHeader):
+            DatasetReader(file_name, 'utf-8', 'sentiment', 'text')
+
+        self.assertEqual([('0', 'first'), ('4', 'second, with comma')], rows)
+
+    def test_read_batches_with_commas_in_the_last_column(self):
+        file_name = self._write_dataset('0,1,text, with, commas\n4,2,text\n')
+
+        with DatasetReader(file_name, 'utf-8', 0, 2, n_columns=3) as dataset:
+            rows = [row for batch in dataset.read_batches() for row in batch]
+
+        self.assertEqual([('0', 'text, with, commas'), ('4', 'text')], rows)
+
+    def test_read_batches_with_format_params(self):
+        file_name = self._write_dataset("0;'a;b'\n4;c\n")
+
+        with DatasetReader(file_name, 'utf-8', 0, 1, delimiter=';', quotechar="'") as dataset:
+            rows = [row for batch in dataset.read_batches() for row in batch]
+
+        self.assertEqual([('0', 'a;b'), ('4', 'c')], rows)
+
+    def test_read_shards_of_whole_rows(self):
+        file_name = self._write_dataset(_TEST_DATASET)
+        file_size = os.path.getsize(file_name)
+        results = []
+
+        for shard_size in (1, 10, 25, 1000):
+            with DatasetReader(file_name, 'utf-8', 0, 1) as dataset:
+                shards = list(dataset.read_shards(shard_size))
+
+            rows = []
+            for shard in shards:
+                with DatasetReader(file_name, 'utf-8', 0, 1, shard=shard) as shard_dataset:
+                    rows.extend(row for batch in shard_dataset.read_batches() for row in batch)
+
+            results.append((shards[0][0], shards[-1][1], [end for _, end in shards[:-1]],
+                            [start for start, _ in shards[1:]], rows))
+
+        for first_start, last_end, ends, starts, rows in results:
+            self.assertEqual((0, file_size), (first_start, last_end))
+            self.assertEqual(ends, starts)
+            self.assertEqual(_TEST_ROWS, rows)
+
+        # A shard of one byte has one row, the quoted line break doesn't end the second row
+        self.assertEqual(6, len(results[0][2]))
+
+    def test_read_shards_after_the_header_and_the_init_row(self):
+        file_name = self._write_dataset('emotion,text\n' + _TEST_DATASET)
+
+        with DatasetReader(file_name, 'utf-8', 'emotion', 'text', init_row=2) as dataset:
+            shards = list(dataset.read_shards(10))
+            start_shards = list(dataset.read_shards(10, shards[1][0]))
+
+        rows = []
+        for shard in shards:
+            with DatasetReader(file_name, 'utf-8', 0, 1, shard=shard) as shard_dataset:
+                rows.extend(row for batch in shard_dataset.read_batches() for row in batch)
+
+        self.assertEqual(_TEST_ROWS[2:], rows)
+        self.assertEqual(shards[1:], start_shards)
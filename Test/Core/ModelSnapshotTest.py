@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+
+import Core.Cons.ScoreTypes as ScoreTypes
+import Database.Helpers.DirHelper as DirHelper
+import Database.Helpers.FileHandleHelper as FileHandleHelper
+from Core import Analyze
+from Core import ModelSnapshot
+from Data.Dataset import WordDS, WorldDS
+from Database.DBManager import DBManager
+
+_TEST_PROBABILITIES = {'good': (-0.25, -1.5), 'bad': (-2.0, -0.5), 'ação': (-1.0, -1.0), 'a': (-3.0, -3.5)}
+
+
+def _write_test_snapshot():
+    ModelSnapshot.write_snapshot(ScoreTypes.LOG, 0.0, -0.4, -1.1, 4, 2, _TEST_PROBABILITIES)
+
+
+class ModelSnapshotTest(unittest.TestCase):
+
+    def tearDown(self):
+        DirHelper.delete_table_directory(ModelSnapshot._SNAPSHOT_DIR)
+
+    def test_snapshot_written_and_opened(self):
+        _write_test_snapshot()
+
+        snapshot = ModelSnapshot.open_snapshot()
+        found = {word: snapshot.get(word) for word in _TEST_PROBABILITIES}
+        not_found = [snapshot.get(word) for word in ('', 'b', 'zzz', 'goo')]
+        header = (snapshot.score_type, snapshot.smoothing, snapshot.positive_prior, snapshot.negative_prior,
+                  snapshot.total_positive, snapshot.total_negative, snapshot.words_count)
+        snapshot.close()
+
+        self.assertEqual(_TEST_PROBABILITIES, found)
+        self.assertEqual([None] * 4, not_found)
+        self.assertEqual((ScoreTypes.LOG, 0.0, -0.4, -1.1, 4, 2, 4), header)
+
+    def test_cut_snapshot_is_not_opened(self):
+        _write_test_snapshot()
+        snapshot_file = ModelSnapshot.get_snapshot_file()
+        FileHandleHelper.truncate_file(snapshot_file, FileHandleHelper.get_file_size(snapshot_file) - 1)
+        FileHandleHelper.close_file(snapshot_file)
+
+        self.assertIsNone(ModelSnapshot.open_snapshot())
+
+    def test_snapshot_of_other_version_is_not_opened(self):
+        with mock.patch.object(ModelSnapshot, 'SNAPSHOT_VERSION', ModelSnapshot.SNAPSHOT_VERSION + 1):
+            _write_test_snapshot()
+
+        self.assertIsNone(ModelSnapshot.open_snapshot())
+
+    def test_model_uses_the_exported_snapshot(self):
+        world_ds = WorldDS()
+        world_ds.total_positive = 4
+        world_ds.total_negative = 2
+        world_ds.db_save()
+
+        words_ds = []
+        for text, n_positive, n_negative in [('good', 3, 1), ('bad', 1, 2)]:
+            word_ds = WordDS(text)
+            word_ds.n_positive = n_positive
+            word_ds.n_negative = n_negative
+            words_ds.append(word_ds)
+        WordDS.db_save_many(words_ds)
+
+        with mock.patch.object(Analyze, '_model', None):
+            Analyze.export_model()
+            Analyze.get_model().close()
+
+        table_model = Analyze.NaiveBayesModel(ScoreTypes.LOG, use_snapshot=False)
+        snapshot_model = Analyze.NaiveBayesModel(ScoreTypes.LOG)
+        texts = [['good', 'bad', 'unknown'], ['bad', 'bad'], []]
+        emotions = [(table_model.infer(words), snapshot_model.infer(words)) for words in texts]
+        uses_snapshot = isinstance(snapshot_model.word_probabilities, ModelSnapshot.ModelSnapshot)
+        snapshot_model.close()
+
+        # A snapshot of other scores isn't used
+        linear_model = Analyze.NaiveBayesModel(ScoreTypes.LINEAR)
+        linear_uses_snapshot = isinstance(linear_model.word_probabilities, ModelSnapshot.ModelSnapshot)
+
+        DBManager(WorldDS).drop()
+        DBManager(WordDS).drop()
+
+        self.assertTrue(uses_snapshot)
+        self.assertFalse(linear_uses_snapshot)
+
+        for table_emotion, snapshot_emotion in emotions:
+            self.assertEqual(table_emotion, snapshot_emotion)
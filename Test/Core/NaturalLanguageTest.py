@@ -0,0 +1,85 @@
+import re
+import unittest
+from unittest import mock
+
+from nltk.stem.lancaster import LancasterStemmer
+
+from Core import NaturalLanguage
+
+_TEST_STOPWORDS = ['the', 'a', 'is', 'and', 'not', 'of']
+
+
+# Tagger with the tags given by the size of the words, the same tags in any order of the texts
+class TestTagger:
+
+    def tag(self, words: list) -> list:
+        return [(word, ('NN', 'DT', 'VBZ', 'JJR ', 'JJ')[len(word) % 5]) for word in words]
+
+    def tag_sents(self, sentences: list) -> list:
+        return [self.tag(words) for words in sentences]
+
+
+# filter_text before TextNormalizer, with the stopwords and the tagger of the tests
+def _old_filter_text(text: str) -> str:
+    text = re.sub('[^a-z0-9- ]+', '', text.lower().rstrip())
+
+    sw = set(_TEST_STOPWORDS)
+    result = ''
+    words = list(filter(lambda x: x != '', text.split(' ')))
+
+    st = LancasterStemmer()
+
+    for token in TestTagger().tag(words):
+        if token[1] in NaturalLanguage._TAG_LIST and token[0] not in sw:
+            if result == '':
+                result = st.stem(token[0])
+            else:
+                result = result + ' ' + st.stem(token[0])
+
+    return result
+
+
+class NaturalLanguageTest(unittest.TestCase):
+
+    def setUp(self):
+        # The nltk corpora aren't needed by the tests
+        test_stopwords = mock.Mock(**{'words.return_value': _TEST_STOPWORDS})
+        patches = [mock.patch.object(NaturalLanguage, 'stopwords', test_stopwords),
+                   mock.patch.object(NaturalLanguage, 'PerceptronTagger', TestTagger)]
+
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_text_normalizer_filters_like_the_old_filter_text(self):
+        texts = ['The movie is not GOOD at all!!!', '  running runners ran   quickly  ', '', '!!!',
+                 'Happy-go-lucky days of 2010 and the 90s', 'a b c dd eee ffff ggggg hhhhhh',
+                 'Café naïve résumé loving it', 'the the the']
+        normalizer = NaturalLanguage.TextNormalizer()
+
+        filtered_texts = [normalizer.filter_text(text) for text in texts]
+        batch_filtered_texts = normalizer.filter_texts(texts)
+
+        self.assertEqual([_old_filter_text(text) for text in texts], filtered_texts)
+        self.assertEqual(filtered_texts, batch_filtered_texts)
+
+    def test_text_normalizer_remembers_the_stems(self):
+        normalizer = NaturalLanguage.TextNormalizer()
+
+        first = normalizer.filter_text('running runners running')
+        second = normalizer.filter_text('runners running again')
+        cache_info = normalizer.stem.cache_info()
+
+        self.assertEqual('run run run', first)
+        self.assertEqual('run run again', second)
+        self.assertEqual(3, cache_info.misses)
+        self.assertEqual(3, cache_info.hits)
+
+    def test_filter_text_uses_the_shared_normalizer(self):
+        with mock.patch.object(NaturalLanguage, '_normalizer', None):
+            filtered_text = NaturalLanguage.filter_text('Loving the sunny days')
+            normalizer = NaturalLanguage.get_normalizer()
+
+            self.assertIs(normalizer, NaturalLanguage.get_normalizer())
+
+        self.assertEqual(_old_filter_text('Loving the sunny days'), filtered_text)
@@ -0,0 +1,83 @@
+import time
+import unittest
+from unittest import mock
+
+from Core import NaturalLanguage
+from Core import Preprocessing
+from Core.Preprocessing import TextPreprocessor
+
+
+# Normalizer that only changes the case, the workers started in the tests create it instead of the nltk one
+class TestNormalizer:
+
+    def filter_text(self, text: str) -> str:
+        return text.upper()
+
+    def filter_texts(self, texts) -> list:
+        return [self.filter_text(text) for text in texts]
+
+
+# Stop request already asked
+class TestStopRequest:
+
+    def is_requested(self) -> bool:
+        return True
+
+
+def _get_filtered_size(text: str) -> int:
+    return len(Preprocessing.get_normalizer().filter_text(text))
+
+
+def _wait(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+class PreprocessingTest(unittest.TestCase):
+
+    def setUp(self):
+        # The workers are forked with the test normalizer
+        patches = [mock.patch.object(NaturalLanguage, 'TextNormalizer', TestNormalizer),
+                   mock.patch.object(NaturalLanguage, '_normalizer', None)]
+
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_filter_texts_in_order(self):
+        texts = ['text ' + str(x) for x in range(0, 1000)]
+        results = []
+
+        for workers in (1, 3):
+            with TextPreprocessor(workers, chunk_size=7) as preprocessor:
+                results.append(list(preprocessor.filter_texts(iter(texts))))
+
+        self.assertEqual([[text.upper() for text in texts]] * 2, results)
+
+    def test_filter_batches_with_their_items(self):
+        batches = [[(x, 'text ' + str(x)) for x in range(start, start + 10)] for start in range(0, 100, 10)]
+        results = []
+
+        for workers in (1, 2):
+            with TextPreprocessor(workers) as preprocessor:
+                results.append(list(preprocessor.filter_batches(iter(batches), lambda item: item[1])))
+
+        expected = [(batch, [text.upper() for _, text in batch]) for batch in batches]
+        self.assertEqual([expected] * 2, results)
+
+    def test_map_in_the_workers(self):
+        texts = ['a' * x for x in range(0, 50)]
+
+        with TextPreprocessor(2) as preprocessor:
+            sizes = list(preprocessor.map(_get_filtered_size, texts))
+
+        self.assertEqual(list(range(0, 50)), sizes)
+
+    def test_map_stops_when_the_stop_is_asked(self):
+        start_time = time.time()
+
+        with TextPreprocessor(2, stop_request=TestStopRequest()) as preprocessor:
+            results = list(preprocessor.map(_wait, [1] * 20))
+
+        self.assertEqual([], results)
+        self.assertLess(time.time() - start_time, 5)
@@ -0,0 +1,100 @@
+import unittest
+from unittest import mock
+
+import Core.Cons.ScoreTypes as ScoreTypes
+from Core import Analyze
+from Core import ScoreMigration
+from Data.Dataset import ScoresInfo, WordDS, WorldDS
+from Data.Twitter import Tweet
+from Database.DBManager import DBManager
+from Database.Index import IndexRegistry
+from Database.Index.BTree.BTree import BTree
+from Database.Index.BTree.BTreeNode import BTreeNodeFloat, BTreeNodeInt, BTreeNode50String
+from Twitter.TwitterCore import TwitterCore
+
+
+# Save a training where good is a positive word and bad a negative one
+def _save_training():
+    world_ds = WorldDS()
+    world_ds.total_positive = 4
+    world_ds.total_negative = 2
+    world_ds.db_save()
+
+    words_ds = []
+    for text, n_positive, n_negative in [('good', 3, 1), ('bad', 1, 2)]:
+        word_ds = WordDS(text)
+        word_ds.n_positive = n_positive
+        word_ds.n_negative = n_negative
+        words_ds.append(word_ds)
+
+    WordDS.db_save_many(words_ds)
+
+
+# Save a tweet with the linear scores of the first versions
+def _save_tweet(filtered_text: str, negative: bool, positive_score: float, negative_score: float) -> Tweet:
+    tweet = Tweet()
+    tweet.filtered_text = filtered_text
+    tweet.negative = negative
+    tweet.positive_score = positive_score
+    tweet.negative_score = negative_score
+    DBManager(Tweet).save(tweet)
+
+    IndexRegistry.get_btree('tweet_positive_score', BTreeNodeFloat, Tweet, Tweet).insert(positive_score, tweet.id)
+    IndexRegistry.get_btree('tweet_negative_score', BTreeNodeFloat, Tweet, Tweet).insert(negative_score, tweet.id)
+
+    return tweet
+
+
+class ScoreMigrationTest(unittest.TestCase):
+
+    def tearDown(self):
+        for db_class in (WorldDS, WordDS, ScoresInfo, Tweet, TwitterCore):
+            DBManager(db_class).drop()
+
+    def test_migrate_the_linear_scores(self):
+        _save_training()
+        model = Analyze.NaiveBayesModel(ScoreTypes.LOG, use_snapshot=False)
+        tweets = [_save_tweet('good good', False, 0.25, 0.05), _save_tweet('bad', True, 0.1, 0.3)]
+
+        IndexRegistry.get_btree('twitter_core_data_name', BTreeNode50String, TwitterCore, TwitterCore).insert('core', 0)
+        IndexRegistry.get_btree('twitter_core_tweets', BTreeNodeInt, TwitterCore, Tweet).insert_many(
+            [(0, tweet.id) for tweet in tweets])
+
+        with mock.patch.object(Analyze, '_model', model):
+            ScoreMigration.migrate_if_needed()
+
+            with mock.patch.object(ScoreMigration, 'rebuild_scores') as rebuild_scores:
+                ScoreMigration.migrate_if_needed()
+
+        emotions = [model.infer(tweet.get_filtered_words()) for tweet in tweets]
+        saved_scores = [(saved_tweet.positive_score, saved_tweet.negative_score)
+                        for saved_tweet in DBManager(Tweet).find_all()]
+        positive_entries = BTree.read_saved_entries('tweet_positive_score', BTreeNodeFloat, Tweet, Tweet)
+        negative_entries = BTree.read_saved_entries('tweet_negative_score', BTreeNodeFloat, Tweet, Tweet)
+        core_negative_entries = BTree.read_saved_entries('twitter_core_most_negative_core', BTreeNodeFloat,
+                                                         TwitterCore, Tweet)
+        core_positive_entries = BTree.read_saved_entries('twitter_core_most_positive_core', BTreeNodeFloat,
+                                                         TwitterCore, Tweet)
+        scores_info = ScoresInfo.load()
+
+        self.assertEqual([(positive_score, negative_score) for _, positive_score, negative_score in emotions],
+                         saved_scores)
+        self.assertEqual(sorted((emotion[1], tweet.id) for emotion, tweet in zip(emotions, tweets)),
+                         sorted(positive_entries))
+        self.assertEqual(sorted((emotion[2], tweet.id) for emotion, tweet in zip(emotions, tweets)),
+                         sorted(negative_entries))
+        # The tweets keep their emotions in the trees of the cores
+        self.assertEqual([(emotions[1][2], tweets[1].id)], core_negative_entries)
+        self.assertEqual([(emotions[0][1], tweets[0].id)], core_positive_entries)
+        self.assertEqual(ScoreTypes.LOG, scores_info.scale)
+        rebuild_scores.assert_not_called()
+
+    def test_migrate_without_training(self):
+        model = Analyze.NaiveBayesModel(ScoreTypes.LOG, use_snapshot=False)
+
+        with mock.patch.object(Analyze, '_model', model), \
+                mock.patch.object(ScoreMigration, 'rebuild_scores') as rebuild_scores:
+            ScoreMigration.migrate_if_needed()
+
+        rebuild_scores.assert_not_called()
+        self.assertIsNone(ScoresInfo.load())
@@ -0,0 +1,28 @@
+import os
+import signal
+import unittest
+
+from Core.StopRequest import StopRequest
+
+
+class StopRequestTest(unittest.TestCase):
+
+    def test_stop_signals_are_requests(self):
+        old_handlers = [signal.getsignal(signal_number) for signal_number in (signal.SIGINT, signal.SIGTERM)]
+        requested = []
+
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            with StopRequest() as stop_request:
+                before = stop_request.is_requested()
+                os.kill(os.getpid(), signal_number)
+                requested.append((before, stop_request.is_requested()))
+
+        self.assertEqual([(False, True), (False, True)], requested)
+        self.assertEqual(old_handlers, [signal.getsignal(signal_number)
+                                        for signal_number in (signal.SIGINT, signal.SIGTERM)])
+
+    def test_second_sigint_interrupts(self):
+        with self.assertRaises(KeyboardInterrupt):
+            with StopRequest():
+                os.kill(os.getpid(), signal.SIGINT)
+                os.kill(os.getpid(), signal.SIGINT)
@@ -0,0 +1,36 @@
+import unittest
+from unittest import mock
+
+import Database.Helpers.DirHelper as DirHelper
+from Core import TrainCheckpoint
+
+
+class TrainCheckpointTest(unittest.TestCase):
+
+    def tearDown(self):
+        DirHelper.delete_table_directory(TrainCheckpoint._CHECKPOINT_DIR)
+
+    def test_checkpoint_written_and_read(self):
+        empty = TrainCheckpoint.read_checkpoint()
+
+        flush = TrainCheckpoint.Flush([(0, 'good day', False)], [(0, 'good', 1, 0), (1, 'day', 1, 0)], ['good', 'day'],
+                                      1, 0)
+        TrainCheckpoint.write_checkpoint(TrainCheckpoint.Checkpoint('dataset.csv', 10, 500, flush))
+        checkpoint = TrainCheckpoint.read_checkpoint()
+
+        TrainCheckpoint.write_checkpoint(TrainCheckpoint.Checkpoint('dataset.csv', 20))
+        replaced_checkpoint = TrainCheckpoint.read_checkpoint()
+
+        self.assertIsNone(empty)
+        self.assertEqual(('dataset.csv', 10, 500), (checkpoint.dataset, checkpoint.rows, checkpoint.position))
+        self.assertEqual((flush.tweets, flush.words, flush.new_words, 1, 0),
+                         (checkpoint.flush.tweets, checkpoint.flush.words, checkpoint.flush.new_words,
+                          checkpoint.flush.total_positive, checkpoint.flush.total_negative))
+        self.assertEqual((20, None, None),
+                         (replaced_checkpoint.rows, replaced_checkpoint.position, replaced_checkpoint.flush))
+
+    def test_checkpoint_of_other_version_is_not_read(self):
+        with mock.patch.object(TrainCheckpoint, 'CHECKPOINT_VERSION', TrainCheckpoint.CHECKPOINT_VERSION + 1):
+            TrainCheckpoint.write_checkpoint(TrainCheckpoint.Checkpoint('dataset.csv', 10))
+
+        self.assertIsNone(TrainCheckpoint.read_checkpoint())
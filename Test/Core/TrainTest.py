@@ -0,0 +1,279 @@
+import os
+import re
+import tempfile
+import unittest
+from unittest import mock
+
+import Database.Helpers.DirHelper as DirHelper
+from Core import Analyze
+from Core import ModelSnapshot
+from Core import NaturalLanguage
+from Core import Train as TrainModule
+from Core import TrainCheckpoint
+from Core.Train import Train, TrainCounts, TrainingChunk
+from Data.Dataset import TweetDS, WordDS, WorldDS
+from Database.DBManager import DBManager
+from Database.Index import IndexRegistry
+from Database.Index.Bloom import BloomCons
+from Database.Index.BTree.BTreeNode import BTreeNode280String, BTreeNode50String
+
+
+_TEST_WORDS = ['good', 'bad', 'day', 'night', 'sad', 'happy', 'movie', 'song']
+
+
+# Normalizer that only keeps the lower case words, the workers started in the tests create it instead of the nltk one
+class TestNormalizer:
+
+    def filter_text(self, text: str) -> str:
+        return ' '.join(re.findall('[a-z0-9]+', text.lower()))
+
+    def filter_texts(self, texts) -> list:
+        return [self.filter_text(text) for text in texts]
+
+
+# Return a dataset of the rows with repeated texts, quoted line breaks, blank lines and rows without the text
+def _get_test_dataset(rows: int) -> str:
+    lines = []
+
+    for row in range(0, rows):
+        words = [_TEST_WORDS[(row * 7 + word) % len(_TEST_WORDS)] for word in range(0, row % 4)] \
+            + ['text' + str(row % 120)]
+        emotion = '0' if row % 7 < 3 else '4'
+
+        if row % 50 == 7:
+            lines.append('')
+        elif row % 50 == 9:
+            lines.append(emotion)
+        elif row % 5 == 0:
+            lines.append(emotion + ',"' + ' '.join(words[:1]) + '\n' + ' '.join(words[1:]).upper() + '"')
+        else:
+            lines.append(emotion + ',' + ' '.join(words))
+
+    return '\n'.join(lines) + '\n'
+
+
+# Stop request asked after it's verified the number of times
+class TestStopRequest:
+
+    def __init__(self, checks: int):
+        self.checks = checks
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def is_requested(self) -> bool:
+        self.checks = self.checks - 1
+        return self.checks < 0
+
+
+# Return the (text, n_positive, n_negative) of the saved words
+def _get_saved_words() -> list:
+    return sorted((word_ds.text, word_ds.n_positive, word_ds.n_negative) for word_ds in DBManager(WordDS).find_all())
+
+
+# Return the (text, negative) of the saved tweets
+def _get_saved_tweets() -> list:
+    return [(tweet_ds.text, tweet_ds.negative) for tweet_ds in DBManager(TweetDS).find_all()]
+
+
+class TrainTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+        # The workers are forked with the test normalizer, the model exported by the training is forgotten
+        patches = [mock.patch.object(NaturalLanguage, 'TextNormalizer', TestNormalizer),
+                   mock.patch.object(NaturalLanguage, '_normalizer', None),
+                   mock.patch.object(TrainModule, 'DATA_SET_LOCATION', self.dir.name),
+                   mock.patch.object(Analyze, '_model', None)]
+
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        Analyze.get_model().close()
+
+        for db_class in (TweetDS, WordDS, WorldDS):
+            DBManager(db_class).drop()
+
+        DirHelper.delete_table_directory(TrainCheckpoint._CHECKPOINT_DIR)
+        DirHelper.delete_table_directory(ModelSnapshot._SNAPSHOT_DIR)
+
+    def _write_dataset(self, text: str):
+        with open(os.path.join(self.dir.name, 'dataset.csv'), 'w', encoding='utf-8', newline='') as file:
+            file.write(text)
+
+    # Return the saved tweets, words and world after the training, the tables are dropped for the next training
+    def _get_trained_data(self) -> tuple:
+        world_ds = WorldDS.load(0)
+        trained_data = (_get_saved_tweets(), _get_saved_words(), world_ds.total_positive, world_ds.total_negative)
+
+        Analyze.get_model().close()
+        for db_class in (TweetDS, WordDS, WorldDS):
+            DBManager(db_class).drop()
+        DirHelper.delete_table_directory(TrainCheckpoint._CHECKPOINT_DIR)
+
+        return trained_data
+
+    def test_train_counts_without_repeated_texts(self):
+        counts = TrainCounts()
+
+        added = [counts.add('good day', False), counts.add('bad bad day', True), counts.add('good day', True)]
+        counts.add_batch([('0', 'ignored'), ('4', 'ignored'), ('0', 'ignored')], ['sad day', 'nice', 'good day'], '0',
+                         True)
+
+        self.assertEqual([True, True, False], added)
+        self.assertEqual(3, len(counts))
+        self.assertIn('sad day', counts)
+        self.assertNotIn('nice', counts)
+        self.assertEqual(3, counts.rows)
+        self.assertEqual((1, 2), (counts.n_positive, counts.n_negative))
+        # The words of a tweet are counted once
+        self.assertEqual({'good': [1, 0], 'day': [1, 2], 'bad': [0, 1], 'sad': [0, 1]}, counts.word_counts)
+
+    def test_train_counts_remove_and_merge(self):
+        counts = TrainCounts()
+        counts.add('good day', False)
+        counts.add('bad day', True)
+        counts.rows = 2
+
+        other_counts = TrainCounts()
+        other_counts.add('good night', False)
+        other_counts.add('only', True)
+        other_counts.rows = 3
+        other_counts.remove('only')
+
+        counts.merge(other_counts)
+
+        self.assertEqual(3, len(counts))
+        self.assertEqual(5, counts.rows)
+        self.assertEqual((2, 1), (counts.n_positive, counts.n_negative))
+        # A word of removed tweets only isn't counted
+        self.assertEqual({'good': [2, 0], 'day': [1, 1], 'bad': [0, 1], 'night': [1, 0]}, counts.word_counts)
+
+    def test_training_chunk_saves_the_new_tweets(self):
+        chunk = TrainingChunk('dataset.csv')
+        counts = TrainCounts()
+        counts.add('good day', False)
+        counts.add('bad day', True)
+        chunk.add_counts(counts)
+        chunk.flush(2)
+
+        chunk = TrainingChunk('dataset.csv')
+        counts = TrainCounts()
+        counts.add('good day', True)
+        counts.add('good night', False)
+        chunk.add_counts(counts)
+        other_counts = TrainCounts()
+        other_counts.add('good night', True)
+        other_counts.add('bad night', True)
+        chunk.add_counts(other_counts)
+        chunk.flush(6, 100)
+
+        world_ds = WorldDS.load(0)
+        checkpoint = TrainCheckpoint.read_checkpoint()
+
+        self.assertEqual([('good day', False), ('bad day', True), ('good night', False), ('bad night', True)],
+                         _get_saved_tweets())
+        self.assertEqual([('bad', 0, 2), ('day', 1, 1), ('good', 2, 0), ('night', 1, 1)], _get_saved_words())
+        self.assertEqual(('good', 'night'), (WordDS.load_by_text('good').text, WordDS.load_by_text('night').text))
+        self.assertEqual((2, 2), (world_ds.total_positive, world_ds.total_negative))
+        self.assertEqual(('dataset.csv', 6, 100, None),
+                         (checkpoint.dataset, checkpoint.rows, checkpoint.position, checkpoint.flush))
+        self.assertEqual(0, len(chunk.counts))
+
+    def test_training_counts_the_same_with_any_flush_rows(self):
+        self._write_dataset(_get_test_dataset(600))
+        results = []
+
+        for flush_rows in (10000, 50, 7):
+            Train().read_train_data('dataset.csv', 'utf-8', 2, 0, 1, 0, '0', workers=1, flush_rows=flush_rows)
+            results.append(self._get_trained_data())
+
+        # Only the first row of each text is counted
+        self.assertEqual(len(set(text for text, _ in results[0][0])), len(results[0][0]))
+        self.assertEqual(len(results[0][0]), results[0][2] + results[0][3])
+
+        for result in results[1:]:
+            self.assertEqual(results[0], result)
+
+    def test_sharded_training_counts_like_the_sequential_training(self):
+        self._write_dataset(_get_test_dataset(600))
+        results = []
+
+        Train().read_train_data('dataset.csv', 'utf-8', 2, 0, 1, 0, '0', workers=1, flush_rows=50)
+        sequential_data = self._get_trained_data()
+
+        for workers, shard_size, flush_rows in ((1, 100, 50), (2, 100, 30), (3, 1000, 10000), (2, 1, 7)):
+            Train().read_train_data_sharded('dataset.csv', 'utf-8', 2, 0, 1, 0, '0', workers=workers,
+                                            shard_size=shard_size, flush_rows=flush_rows)
+            results.append(self._get_trained_data())
+
+        Train().read_train_data('dataset.csv', 'utf-8', 2, 0, 1, 0, '0', workers=2, shard_size=100)
+        results.append(self._get_trained_data())
+
+        for result in results:
+            self.assertEqual(sequential_data, result)
+
+    def test_stopped_training_continues_from_the_checkpoint(self):
+        self._write_dataset(_get_test_dataset(600))
+
+        Train().read_train_data_sharded('dataset.csv', 'utf-8', 2, 0, 1, 0, '0', workers=1, shard_size=100)
+        full_data = self._get_trained_data()
+        results = []
+
+        for training, checks in (('read_train_data', 10), ('read_train_data_sharded', 2)):
+            with mock.patch.object(TrainModule, 'StopRequest', lambda: TestStopRequest(checks)):
+                getattr(Train(), training)('dataset.csv', 'utf-8', 2, 0, 1, 0, '0', workers=1, shard_size=100)
+
+            checkpoint = TrainCheckpoint.read_checkpoint()
+            stopped_tweets = len(_get_saved_tweets())
+
+            getattr(Train(), training)('dataset.csv', 'utf-8', 2, 0, 1, 0, '0', workers=1, shard_size=100)
+            results.append((checkpoint, stopped_tweets, self._get_trained_data()))
+
+        for checkpoint, stopped_tweets, trained_data in results:
+            self.assertGreater(checkpoint.rows, 0)
+            self.assertLess(checkpoint.rows, 600)
+            self.assertIsNotNone(checkpoint.position)
+            self.assertIsNone(checkpoint.flush)
+            self.assertLess(stopped_tweets, len(full_data[0]))
+            self.assertEqual(full_data, trained_data)
+
+    def test_recover_writes_the_stopped_flush(self):
+        chunk = TrainingChunk('dataset.csv')
+        counts = TrainCounts()
+        counts.add('good day', False)
+        counts.add('bad day', True)
+        chunk.add_counts(counts)
+        chunk.flush(2)
+
+        chunk = TrainingChunk('dataset.csv')
+        counts = TrainCounts()
+        counts.add('good night', False)
+        chunk.add_counts(counts)
+        flush = chunk._get_flush()
+        TrainCheckpoint.write_checkpoint(TrainCheckpoint.Checkpoint('dataset.csv', 3, 40, flush))
+
+        # The training stopped after writing the tweets, they are written again with the same ids
+        TrainModule._write_flush(TrainCheckpoint.Flush(flush.tweets, [], [], 1, 1))
+        Train.recover()
+        Train.recover()
+
+        world_ds = WorldDS.load(0)
+        checkpoint = TrainCheckpoint.read_checkpoint()
+        tweet_index = IndexRegistry.get_hash_index('tweet_dataset_text_id', BTreeNode280String, TweetDS, TweetDS,
+                                                   bloom_false_positive_rate=BloomCons.FALSE_POSITIVE_RATE)
+        word_index = IndexRegistry.get_hash_index('word_dataset_text_id', BTreeNode50String, WordDS, WordDS)
+
+        self.assertEqual([('good day', False), ('bad day', True), ('good night', False)], _get_saved_tweets())
+        self.assertEqual([('bad', 0, 1), ('day', 1, 1), ('good', 2, 0), ('night', 1, 0)], _get_saved_words())
+        self.assertEqual([2], tweet_index.find_contents('good night'))
+        self.assertEqual([3], word_index.find_contents('night'))
+        self.assertEqual((2, 1), (world_ds.total_positive, world_ds.total_negative))
+        self.assertEqual((3, 40, None), (checkpoint.rows, checkpoint.position, checkpoint.flush))
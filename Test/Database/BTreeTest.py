@@ -1,9 +1,18 @@
+import threading
 import unittest
+from unittest import mock
 
 from Database.DBData import DBData
 from Database.Index.BTree.BTree import BTree
-from Database.Index.BTree.BTreeNode import BTreeNode50String, BTreeNodeInt, BTreeNode
+from Database.Index.BTree.BTreeNode import BTreeNode50String, BTreeNodeInt, BTreeNode, BTreePrefixNode
 from Database.DBManager import DBManager
+from Database.Cons import FileName
+from Database.Error import BTreeError
+from Database.Index.BTree import BTreeCons, BTreeUpgrade
+from Database.Index.BTree.BTreeInfo import BTreeInfo
+from Database.Index.Bloom import BloomCons
+import Database.Helpers.FileHandleHelper as FileHandleHelper
+import Database.Helpers.ObjectHelper as ObjectHelper
 
 _TEST_DEGREE = 3
 
@@ -43,6 +52,17 @@ class BTreeNode50StringTest(BTreeNode50String):
         self.contents = []
 
 
+# Node with front coded string keys, the leaves keep up to ten keys in a page of 240 chars
+class BTreeNodePrefixStringTest(BTreePrefixNode):
+    keys_size_string = 50
+    keys_data_size = 240
+
+    keys_size = 10
+    intern_keys_size = 240 // (BTreeCons.PREFIX_KEY_HEADER_SIZE + 50)
+    children_ids_size = intern_keys_size + 1
+    contents_size = 10
+
+
 # Node with integer keys
 class BTreeNodeIntTest(BTreeNodeInt):
     # Defines the sized based in the degree
@@ -1027,5 +1047,471 @@ class BTreeTest(unittest.TestCase):
 
         manager.drop()
 
+    def test_btree_insert_and_delete_mixed_with_repeated_values(self):
+        manager = DBManager(TestIntClass)
+        btree = BTree('external_id', BTreeNodeIntTest, TestIntClass)
+
+        objs = []
+        for x in range(0, 60):
+            obj = TestIntClass(x % 7)
+            manager.save(obj)
+            btree.insert(obj.external_id, obj.id)
+            objs.append(obj)
+
+        # Delete two of each three values
+        for obj in objs:
+            if obj.id % 3 != 0:
+                self.assertTrue(btree.delete(obj.external_id, obj.id))
+
+        for obj in objs:
+            result = btree.find_with_key_and_content(obj.external_id, obj.id)
+            if obj.id % 3 != 0:
+                self.assertEqual(None, result)
+            else:
+                self.assertEqual(obj.id, result)
+
+        results = btree.find_n_smallest(len(objs))
+        keys = [objs[result].external_id for result in results]
+
+        btree.drop()
+        manager.drop()
+
+        self.assertEqual(20, len(keys))
+        self.assertEqual(sorted(keys), keys)
+
+    def test_btree_upgrade_index_with_parent_id(self):
+        index_dir = 'legacy_id' + FileName.INDEX_SEPARATOR + BTreeNodeIntTest.get_node_type()
+        legacy_node_class = BTreeUpgrade.get_legacy_node_class(BTreeNodeIntTest)
+        info_manager = DBManager(BTreeUpgrade.LegacyBTreeInfo, index_dir, FileName.INDEX_MANAGER, TestIntClass)
+        node_manager = DBManager(legacy_node_class, index_dir, FileName.INDEX_DATA, TestIntClass)
+
+        # Tree saved by the version 1: a root with two leaves and a deleted node
+        nodes = [([5], [5], [1, 3]), ([1, 3], [1, 3], []), ([], [], []), ([7, 9], [7, 9], [])]
+        for keys, contents, children_ids in nodes:
+            node = legacy_node_class()
+            node.keys = keys
+            node.contents = contents
+            node.children_ids = children_ids
+            node.parent_id = -1 if node.children_ids else 0
+            node_manager.save(node)
+        node_manager.delete(node_manager.find_by_id(2))
+
+        legacy_info = BTreeUpgrade.LegacyBTreeInfo()
+        legacy_info.root_id = 0
+        info_manager.save(legacy_info)
+
+        btree = BTree('legacy_id', BTreeNodeIntTest, TestIntClass)
+        results = [btree.find_with_key_and_content(key, key) for key in [1, 3, 5, 7, 9]]
+        btree.insert(4, 4)
+        btree.delete(9, 9)
+        btree.delete(7, 7)
+        smallest = btree.find_n_smallest(10)
+
+        btree.drop()
+
+        self.assertEqual([1, 3, 5, 7, 9], results)
+        self.assertEqual([1, 3, 4, 5], smallest)
+
+    def test_counted_btree_count_rank_and_select(self):
+        manager = DBManager(TestIntClass)
+        btree = BTree('external_id', BTreeNodeIntTest, TestIntClass, counted=True)
+
+        objs = []
+        for x in range(0, 50):
+            obj = TestIntClass(x % 10)
+            manager.save(obj)
+            btree.insert(obj.external_id, obj.id)
+            objs.append(obj)
+
+        for obj in objs[:10]:
+            btree.delete(obj.external_id, obj.id)
+
+        # Each value from 0 to 9 is saved four times
+        count_all = btree.count()
+        count_range = btree.count(3, 5)
+        count_bigger = btree.count(lo=8)
+        rank = btree.rank(7)
+        selected = [objs[btree.select(k)].external_id for k in [0, 3, 4, 39]]
+
+        btree.drop()
+        manager.drop()
+
+        self.assertEqual(40, count_all)
+        self.assertEqual(12, count_range)
+        self.assertEqual(8, count_bigger)
+        self.assertEqual(28, rank)
+        self.assertEqual([0, 0, 1, 9], selected)
+
+    def test_find_n_smallest_and_biggest_with_offset(self):
+        manager = DBManager(TestIntClass)
+        counted_btree = BTree('external_id', BTreeNodeIntTest, TestIntClass, counted=True)
+        btree = BTree('external_id', BTreeNodeIntTest, TestIntClass)
+
+        for x in range(0, 40):
+            obj = TestIntClass(x)
+            manager.save(obj)
+            counted_btree.insert(obj.external_id, obj.id)
+            btree.insert(obj.external_id, obj.id)
+
+        counted_smallest = counted_btree.find_n_smallest(5, 20)
+        counted_biggest = counted_btree.find_n_biggest(5, 33)
+        smallest = btree.find_n_smallest(5, 20)
+        biggest = btree.find_n_biggest(5, 33)
+
+        counted_btree.drop()
+        manager.drop()
+
+        self.assertEqual([20, 21, 22, 23, 24], counted_smallest)
+        self.assertEqual([6, 5, 4, 3, 2], counted_biggest)
+        self.assertEqual(counted_smallest, smallest)
+        self.assertEqual(counted_biggest, biggest)
+
+    def test_not_counted_btree_rank(self):
+        btree = BTree('external_id', BTreeNodeIntTest, TestIntClass)
+
+        with self.assertRaises(BTreeError.TreeWithoutCounts):
+            btree.rank(1)
+
+        btree.drop()
+
+    def test_btree_upgrade_index_with_unordered_contents(self):
+        index_dir = 'unordered_id' + FileName.INDEX_SEPARATOR + BTreeNodeIntTest.get_node_type()
+        info_manager = DBManager(BTreeInfo, index_dir, FileName.INDEX_MANAGER, TestIntClass)
+        node_manager = DBManager(BTreeNodeIntTest, index_dir, FileName.INDEX_DATA, TestIntClass)
+
+        # Tree saved by the version 2: the contents of the key 2 aren't ordered
+        nodes = [([2], [8], [1, 2]), ([1, 2], [1, 9], []), ([2, 3], [4, 3], [])]
+        for keys, contents, children_ids in nodes:
+            node = BTreeNodeIntTest()
+            node.keys = keys
+            node.contents = contents
+            node.children_ids = children_ids
+            node_manager.save(node)
+
+        btree_info = BTreeInfo()
+        btree_info.version = 2
+        info_manager.save(btree_info)
+
+        btree = BTree('unordered_id', BTreeNodeIntTest, TestIntClass)
+        contents = btree.find_contents(2)
+        found = btree.find_with_key_and_content(2, 4)
+        version = btree.btree_info.version
+
+        btree.drop()
+
+        self.assertEqual([4, 8, 9], contents)
+        self.assertEqual(4, found)
+        self.assertEqual(BTreeCons.BTREE_VERSION, version)
+
+    def test_btree_find_contents_of_repeated_key_in_content_order(self):
+        manager = DBManager(TestIntClass)
+        btree = BTree('external_id', BTreeNodeIntTest, TestIntClass)
+
+        ids = []
+        for x in range(0, 90):
+            obj = TestIntClass(x % 3)
+            manager.save(obj)
+            ids.append(obj.id)
+
+        # Insert in reverse order, the contents of each key are returned ordered
+        for obj_id in reversed(ids):
+            btree.insert(obj_id % 3, obj_id)
+
+        contents = btree.find_contents(1)
+        btree.delete(1, 4)
+        contents_after_delete = btree.find_contents(1)
+
+        btree.drop()
+        manager.drop()
+
+        self.assertEqual(list(range(1, 90, 3)), contents)
+        self.assertEqual([1] + list(range(7, 90, 3)), contents_after_delete)
+
+    def test_btree_bulk_load(self):
+        btree = BTree('bulk_id', BTreeNodeIntTest, TestIntClass, counted=True)
+        btree.insert(1000, 1000)
+
+        btree.bulk_load([(x % 7, x) for x in range(0, 50)])
+        contents = btree.find_contents(3)
+        old_content = btree.find_with_key_and_content(1000, 1000)
+        count = btree.count()
+        smallest = btree.find_n_smallest(3)
+
+        btree.drop()
+
+        self.assertEqual(list(range(3, 50, 7)), contents)
+        self.assertEqual(None, old_content)
+        self.assertEqual(50, count)
+        self.assertEqual([0, 7, 14], smallest)
+
+    def test_btree_insert_many(self):
+        btree = BTree('many_id', BTreeNodeIntTest, TestIntClass, counted=True)
+        btree.insert(3, 1000)
+
+        btree.insert_many([(x % 7, x) for x in range(49, -1, -1)])
+        btree.insert_many([(3, 500), (100, 100)])
+        btree.insert_many([])
+        contents = btree.find_contents(3)
+        count = btree.count()
+        biggest = btree.find_n_biggest(2)
+
+        btree.drop()
+
+        self.assertEqual(list(range(3, 50, 7)) + [500, 1000], contents)
+        self.assertEqual(53, count)
+        self.assertEqual([100, 48], biggest)
+
+
+    def test_btree_readers_with_one_writer(self):
+        btree = BTree('threads_id', BTreeNodeIntTest, TestIntClass, counted=True)
+        btree.insert_many([(x, x) for x in range(0, 100, 2)])
+        errors = []
+        writer_done = threading.Event()
+
+        def read():
+            try:
+                while not writer_done.is_set():
+                    for x in range(0, 100, 10):
+                        self.assertEqual([x], btree.find_contents(x))
+                    self.assertEqual([0], btree.find_n_smallest(1))
+                    self.assertGreaterEqual(btree.count(), 50)
+            except Exception as error:
+                errors.append(error)
+
+        readers = [threading.Thread(target=read) for _ in range(0, 3)]
+        for reader in readers:
+            reader.start()
+
+        for x in range(1, 100, 2):
+            btree.insert(x, x)
+        for x in range(1, 100, 4):
+            btree.delete(x, x)
+        writer_done.set()
+
+        for reader in readers:
+            reader.join()
+
+        count = btree.count()
+        contents = btree.find_n_smallest(6)
+
+        btree.drop()
+
+        self.assertEqual([], errors)
+        self.assertEqual(75, count)
+        self.assertEqual([0, 2, 3, 4, 6, 7], contents)
+
+    def test_btree_with_bloom_filter(self):
+        btree = BTree('bloom_id', BTreeNodeIntTest, TestIntClass, bloom_false_positive_rate=0.01)
+
+        # A small filter is rebuilt while the keys are inserted
+        with mock.patch.object(BloomCons, 'INITIAL_CAPACITY', 8):
+            btree.insert_many([(x, x) for x in range(0, 40, 2)])
+            for x in range(40, 60, 2):
+                btree.insert(x, x)
+
+        found = [btree.find_first_or_default(x) for x in range(0, 60, 2)]
+        not_found = [btree.find_first_or_default(x) for x in range(1, 60, 2)]
+        negative_count = btree.bloom_filter.negative_count
+        false_positive_count = btree.bloom_filter.false_positive_count
+
+        # The filter is kept when the index is opened without a false positive rate
+        reopened_btree = BTree('bloom_id', BTreeNodeIntTest, TestIntClass)
+        reopened_found = [reopened_btree.find_with_key_and_content(x, x) for x in range(0, 60, 2)]
+        reopened_negative = reopened_btree.find_first_or_default(1)
+
+        btree.bulk_load([(1, 1)])
+        bulk_found = btree.find_first_or_default(1)
+        bulk_not_found = btree.find_first_or_default(0)
+
+        btree.drop()
+
+        self.assertEqual(list(range(0, 60, 2)), found)
+        self.assertEqual([None] * 30, not_found)
+        self.assertEqual(30, negative_count + false_positive_count)
+        self.assertGreater(negative_count, 20)
+        self.assertEqual(list(range(0, 60, 2)), reopened_found)
+        self.assertIsNotNone(reopened_btree.bloom_filter)
+        self.assertIsNone(reopened_negative)
+        self.assertEqual(1, bulk_found)
+        self.assertIsNone(bulk_not_found)
+
+    def test_btree_uses_deleted_nodes_again(self):
+        btree = BTree('free_id', BTreeNodeIntTest, TestIntClass)
+        node_manager = btree.btree_node_table_manager
+        btree.insert_many([(x, x) for x in range(0, 100)])
+        nodes = self._get_records_count(node_manager)
+
+        for x in range(0, 100, 3):
+            btree.delete(x, x)
+        free_nodes = self._get_records_count(btree.free_node_table_manager)
+
+        for x in range(0, 30, 3):
+            btree.insert(x, x)
+        nodes_after_insert = self._get_records_count(node_manager)
+        free_nodes_after_insert = self._get_records_count(btree.free_node_table_manager)
+        smallest = btree.find_n_smallest(100)
+
+        btree.drop()
+
+        self.assertGreater(free_nodes, free_nodes_after_insert)
+        self.assertGreater(free_nodes_after_insert, 0)
+        self.assertEqual(nodes, nodes_after_insert)
+        self.assertEqual([x for x in range(0, 100) if x % 3 != 0 or x < 30], smallest)
+
+    def test_btree_drops_the_latches_of_deleted_nodes(self):
+        btree = BTree('free_latch_id', BTreeNodeIntTest, TestIntClass)
+        btree.insert_many([(x, x) for x in range(0, 100)])
+
+        for x in range(0, 100):
+            if x % 10 != 0:
+                btree.delete(x, x)
+        smallest = btree.find_n_smallest(100)
+        free_manager = btree.free_node_table_manager
+        free_ids = set(free_manager.find_by_id(x).node_id for x in range(0, self._get_records_count(free_manager)))
+        latched_ids = set(btree.node_latches)
+
+        btree.vacuum()
+        latches_after_vacuum = len(btree.node_latches)
+
+        btree.drop()
+
+        self.assertEqual(list(range(0, 100, 10)), smallest)
+        self.assertGreater(len(free_ids), 0)
+        self.assertEqual(set(), free_ids & latched_ids)
+        self.assertEqual(0, latches_after_vacuum)
+
+    def test_btree_vacuum(self):
+        btree = BTree('vacuum_id', BTreeNodeIntTest, TestIntClass, counted=True)
+        btree.insert_many([(x, x) for x in range(0, 100)])
+
+        for x in range(0, 100):
+            if x % 4 != 0:
+                btree.delete(x, x)
+        nodes = self._get_records_count(btree.btree_node_table_manager)
+
+        btree.vacuum()
+        nodes_after_vacuum = self._get_records_count(btree.btree_node_table_manager)
+        free_nodes_after_vacuum = self._get_records_count(btree.free_node_table_manager)
+        smallest = btree.find_n_smallest(100)
+        count = btree.count()
+
+        btree.drop()
+
+        self.assertLess(nodes_after_vacuum, nodes)
+        self.assertEqual(0, free_nodes_after_vacuum)
+        self.assertEqual(list(range(0, 100, 4)), smallest)
+        self.assertEqual(25, count)
+
+    def test_btree_with_prefix_string_keys(self):
+        btree = BTree('prefix_id', BTreeNodePrefixStringTest, TestStringClass)
+        btree.insert_many([('stemmed_word_' + str(x), x) for x in range(0, 60)])
+        btree.insert('stemmed_word_60', 60)
+
+        # The keys are read from the pages of the file
+        reopened_btree = BTree('prefix_id', BTreeNodePrefixStringTest, TestStringClass)
+        found = [reopened_btree.find_first_or_default('stemmed_word_' + str(x)) for x in range(0, 61)]
+        leaf = reopened_btree._get_smallest_child()
+        deleted = [reopened_btree.delete('stemmed_word_' + str(x), x) for x in range(0, 61, 2)]
+        smallest = reopened_btree.find_n_smallest(3)
+
+        reopened_btree.drop()
+
+        self.assertEqual(list(range(0, 61)), found)
+        # Without front coding the page keeps only five keys
+        self.assertGreater(len(leaf.keys), 5)
+        self.assertLessEqual(len(leaf.keys_data), BTreeNodePrefixStringTest.keys_data_size)
+        self.assertTrue(all(deleted))
+        self.assertEqual([1, 11, 13], smallest)
+
+    def test_btree_with_prefix_string_keys_without_shared_prefix(self):
+        btree = BTree('long_prefix_id', BTreeNodePrefixStringTest, TestStringClass)
+        keys = [str(x) + 'x' * 40 for x in range(10, 50)]
+
+        for x, key in enumerate(keys):
+            btree.insert(key, x)
+        btree.bulk_load([(key, x) for x, key in enumerate(keys)])
+        for x in range(0, 40, 3):
+            btree.delete(keys[x], x)
+
+        btree._clear_cache()
+        found = [btree.find_first_or_default(key) for key in keys]
+        root = btree._get_root()
+        leaf = btree._get_smallest_child()
+
+        btree.drop()
+
+        self.assertEqual([None if x % 3 == 0 else x for x in range(0, 40)], found)
+        self.assertLessEqual(len(root.keys), BTreeNodePrefixStringTest.intern_keys_size)
+        self.assertLessEqual(len(leaf.keys), 5)
+
+    def test_node_can_add_key(self):
+        int_node = BTreeNodeIntTest()
+        int_node.keys = list(range(0, BTreeNodeIntTest.keys_size - 1))
+        full_int_node = BTreeNodeIntTest()
+        full_int_node.keys = list(range(0, BTreeNodeIntTest.keys_size))
+        # Four keys without a shared prefix leave less than a whole key of the page free
+        prefix_node = BTreeNodePrefixStringTest()
+        prefix_node.keys = [str(x) + 'x' * 49 for x in range(0, 4)]
+        small_prefix_node = BTreeNodePrefixStringTest()
+        small_prefix_node.keys = [str(x) + 'x' * 9 for x in range(0, 4)]
+
+        self.assertTrue(int_node.can_add_key())
+        self.assertFalse(full_int_node.can_add_key())
+        self.assertFalse(prefix_node.can_add_key())
+        self.assertTrue(small_prefix_node.can_add_key())
+
+    def test_btree_with_page_size(self):
+        btree = BTree('page_id', BTreeNodeInt, TestIntClass, counted=True, page_size=BTreeCons.PAGE_SIZE_4K)
+        btree.insert_many([(x, x) for x in range(0, 1000)])
+        for x in range(0, 1000, 2):
+            btree.delete(x, x)
+
+        reopened_btree = BTree('page_id', BTreeNodeInt, TestIntClass, counted=True, page_size=BTreeCons.PAGE_SIZE_4K)
+        found = [reopened_btree.find_first_or_default(x) for x in range(0, 1000)]
+        count = reopened_btree.count()
+        node_class = reopened_btree.node_class
+        file_size = FileHandleHelper.get_file_size(reopened_btree.btree_node_table_manager.table_file)
+
+        reopened_btree.drop()
+
+        self.assertEqual([None if x % 2 == 0 else x for x in range(0, 1000)], found)
+        self.assertEqual(500, count)
+        self.assertEqual(BTreeCons.PAGE_SIZE_4K, ObjectHelper.get_class_size(node_class))
+        self.assertGreater(node_class.keys_size, BTreeCons.MIN_PAGED_BTREE_DEGREE)
+        self.assertEqual(0, file_size % BTreeCons.PAGE_SIZE_4K)
+
+    def test_btree_increment_and_move(self):
+        counts = BTree('increment_id', BTreeNode50StringTest, TestStringClass)
+        by_count = BTree('move_id', BTreeNodeIntTest, TestIntClass, counted=True)
+
+        for x in range(0, 60):
+            word_id = x % 7
+            count = counts.increment('word_' + str(word_id), 1)
+
+            if count is None:
+                by_count.insert(1, word_id)
+            else:
+                by_count.move(count, count + 1, word_id)
+
+        found = [counts.find_first_or_default('word_' + str(word_id)) for word_id in range(0, 7)]
+        biggest = by_count.find_n_biggest(7)
+        size = by_count.count()
+        not_moved = by_count.move(100, 101, 0)
+
+        counts.drop()
+        by_count.drop()
+
+        self.assertEqual([9, 9, 9, 9, 8, 8, 8], found)
+        self.assertEqual([3, 2, 1, 0, 6, 5, 4], biggest)
+        self.assertEqual(7, size)
+        self.assertFalse(not_moved)
+
+    # Return the number of records in the file of the table manager, deleted records included
+    @staticmethod
+    def _get_records_count(table_manager) -> int:
+        return FileHandleHelper.get_file_size(table_manager.table_file) \
+            // ObjectHelper.get_class_size(table_manager.db_class)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,175 @@
+import unittest
+from unittest import mock
+
+import Database.Helpers.FileHandleHelper as FileHandleHelper
+from Database.DBData import DBData
+from Database.Index.BTree.BTree import BTree
+from Database.Index.BTree.BTreeNode import BTreeNode50String, BTreeNodeInt
+from Database.Index.Bloom import BloomCons
+from Database.Index.Hash.HashIndex import HashIndex
+
+_TEST_BUCKET_SIZE = 2
+
+
+class TestHashClass(DBData):
+    external_id = 0
+
+    def __init__(self, external_id: int):
+        self.external_id = external_id
+
+
+# Node with integer keys, the buckets of the hash index keep two entries
+class BTreeNodeIntHashTest(BTreeNodeInt):
+    children_ids_size = _TEST_BUCKET_SIZE + 1
+    keys_size = _TEST_BUCKET_SIZE
+    contents_size = _TEST_BUCKET_SIZE
+
+    def __init__(self):
+        self.children_ids = []
+        self.keys = []
+        self.contents = []
+
+
+class HashIndexTest(unittest.TestCase):
+
+    def test_hash_index_with_one_hundred_values(self):
+        hash_index = HashIndex('hash_id', BTreeNodeIntHashTest, TestHashClass)
+
+        for x in range(0, 100):
+            hash_index.insert(x, x + 1000)
+
+        results = [hash_index.find_first_or_default(x) for x in range(0, 100)]
+        not_found = hash_index.find_first_or_default(100)
+        level = hash_index.hash_info.level
+
+        hash_index.drop()
+
+        self.assertEqual(list(range(1000, 1100)), results)
+        self.assertIsNone(not_found)
+        self.assertGreater(level, 0)
+
+    def test_hash_index_with_repeated_keys(self):
+        hash_index = HashIndex('repeated_hash_id', BTreeNodeIntHashTest, TestHashClass)
+
+        hash_index.insert_many([(x % 3, x) for x in range(29, -1, -1)])
+        contents = [hash_index.find_contents(key) for key in range(0, 3)]
+
+        hash_index.drop()
+
+        self.assertEqual([list(range(key, 30, 3)) for key in range(0, 3)], contents)
+
+    def test_hash_index_insert_and_delete(self):
+        hash_index = HashIndex('delete_hash_id', BTreeNodeIntHashTest, TestHashClass)
+        hash_index.insert_many([(x % 5, x) for x in range(0, 50)])
+
+        deleted = [hash_index.delete(x % 5, x) for x in range(0, 50, 2)]
+        not_deleted = hash_index.delete(1, 2)
+        contents = hash_index.find_contents(1)
+        found = hash_index.find_with_key_and_content(1, 11)
+        deleted_found = hash_index.find_with_key_and_content(1, 6)
+
+        hash_index.drop()
+
+        self.assertTrue(all(deleted))
+        self.assertFalse(not_deleted)
+        self.assertEqual([1, 11, 21, 31, 41], contents)
+        self.assertEqual(11, found)
+        self.assertIsNone(deleted_found)
+
+    def test_hash_index_uses_the_emptied_overflow_buckets_again(self):
+        hash_index = HashIndex('reused_overflow_hash_id', BTreeNodeIntHashTest, TestHashClass)
+        overflow_file = hash_index.overflow_table_manager.table_file
+        sizes = []
+
+        for _ in range(0, 5):
+            hash_index.insert_many([(7, x) for x in range(0, 20)])
+            sizes.append(FileHandleHelper.get_file_size(overflow_file))
+
+            for x in range(0, 20):
+                hash_index.delete(7, x)
+
+        hash_index.insert_many([(7, x) for x in range(0, 20)])
+        contents = hash_index.find_contents(7)
+
+        hash_index.drop()
+
+        self.assertEqual([sizes[0]] * 5, sizes)
+        self.assertEqual(list(range(0, 20)), sorted(contents))
+
+    def test_hash_index_with_string_values(self):
+        hash_index = HashIndex('string_hash_id', BTreeNode50String, TestHashClass)
+        hash_index.insert_many([('name_' + str(x), x) for x in range(0, 30)])
+
+        found = hash_index.find_first_or_default('name_17')
+        # The keys are saved with the size of the node keys
+        long_found = hash_index.find_contents('name_17' + 'x' * 60)
+        long_key_found = hash_index.find_first_or_default('y' * 60)
+        hash_index.insert('y' * 60, 100)
+        long_key_found_after_insert = hash_index.find_first_or_default('y' * 70)
+
+        hash_index.drop()
+
+        self.assertEqual(17, found)
+        self.assertEqual([], long_found)
+        self.assertIsNone(long_key_found)
+        self.assertEqual(100, long_key_found_after_insert)
+
+    def test_hash_index_opened_again(self):
+        hash_index = HashIndex('reopened_hash_id', BTreeNodeIntHashTest, TestHashClass)
+        hash_index.insert_many([(x, x) for x in range(0, 40)])
+
+        reopened_index = HashIndex('reopened_hash_id', BTreeNodeIntHashTest, TestHashClass)
+        results = [reopened_index.find_first_or_default(x) for x in range(0, 40)]
+
+        reopened_index.drop()
+
+        self.assertEqual(list(range(0, 40)), results)
+
+    def test_hash_index_loads_the_btree_entries(self):
+        btree = BTree('btree_hash_id', BTreeNodeIntHashTest, TestHashClass)
+        btree.insert_many([(x % 10, x) for x in range(0, 30)])
+
+        hash_index = HashIndex('btree_hash_id', BTreeNodeIntHashTest, TestHashClass)
+        contents = hash_index.find_contents(4)
+        entries = hash_index.hash_info.entries
+
+        hash_index.drop()
+        btree.drop()
+
+        self.assertEqual([4, 14, 24], contents)
+        self.assertEqual(30, entries)
+
+    def test_hash_index_with_bloom_filter(self):
+        hash_index = HashIndex('bloom_hash_id', BTreeNode50String, TestHashClass, bloom_false_positive_rate=0.05)
+
+        with mock.patch.object(BloomCons, 'INITIAL_CAPACITY', 8):
+            hash_index.insert_many([('name_' + str(x), x) for x in range(0, 20)])
+            hash_index.insert('name_20', 20)
+
+        found = [hash_index.find_first_or_default('name_' + str(x)) for x in range(0, 21)]
+        not_found = [hash_index.find_first_or_default('other_' + str(x)) for x in range(0, 40)]
+        bloom_filter = hash_index.bloom_filter
+
+        hash_index.drop()
+
+        self.assertEqual(list(range(0, 21)), found)
+        self.assertEqual([None] * 40, not_found)
+        self.assertEqual(40, bloom_filter.negative_count + bloom_filter.false_positive_count)
+        self.assertEqual(21, bloom_filter.positive_count - bloom_filter.false_positive_count)
+        self.assertGreater(bloom_filter.negative_count, 30)
+
+    def test_hash_index_increment(self):
+        hash_index = HashIndex('increment_hash_id', BTreeNode50String, TestHashClass)
+
+        first_counts = [hash_index.increment('word_' + str(x % 20), 1) for x in range(0, 20)]
+        for x in range(20, 100):
+            hash_index.increment('word_' + str(x % 20), x % 3)
+
+        counts = [hash_index.find_contents('word_' + str(x)) for x in range(0, 20)]
+        entries = hash_index.hash_info.entries
+
+        hash_index.drop()
+
+        self.assertEqual([None] * 20, first_counts)
+        self.assertEqual([[1 + sum(y % 3 for y in range(20 + x, 100, 20))] for x in range(0, 20)], counts)
+        self.assertEqual(20, entries)
@@ -0,0 +1,76 @@
+import unittest
+
+from Database.DBData import DBData
+from Database.DBManager import DBManager
+from Database.Error import IndexRegistryError
+from Database.Index import IndexRegistry
+from Database.Index.BTree.BTreeNode import BTreeNodeInt
+
+
+class TestRegistryClass(DBData):
+    external_id = 0
+
+    def __init__(self, external_id: int):
+        self.external_id = external_id
+
+
+class IndexRegistryTest(unittest.TestCase):
+
+    def test_get_btree_returns_the_same_tree(self):
+        manager = DBManager(TestRegistryClass)
+        btree = IndexRegistry.get_btree('external_id', BTreeNodeInt, TestRegistryClass)
+
+        obj = TestRegistryClass(10)
+        manager.save(obj)
+        btree.insert(obj.external_id, obj.id)
+
+        same_btree = IndexRegistry.get_btree('external_id', BTreeNodeInt, TestRegistryClass)
+        found_id = same_btree.find_first_or_default(obj.external_id)
+
+        manager.drop()
+
+        self.assertIs(btree, same_btree)
+        self.assertEqual(obj.id, found_id)
+
+    def test_get_btree_after_drop_returns_an_empty_tree(self):
+        manager = DBManager(TestRegistryClass)
+        btree = IndexRegistry.get_btree('external_id', BTreeNodeInt, TestRegistryClass)
+
+        for external_id in range(0, 500):
+            btree.insert(external_id, external_id)
+
+        manager.drop()
+
+        new_btree = IndexRegistry.get_btree('external_id', BTreeNodeInt, TestRegistryClass)
+        found_id = new_btree.find_first_or_default(10)
+        new_btree.insert(10, 1)
+        new_found_id = new_btree.find_first_or_default(10)
+
+        DBManager(TestRegistryClass).drop()
+
+        self.assertIsNot(btree, new_btree)
+        self.assertIsNone(found_id)
+        self.assertEqual(1, new_found_id)
+
+    def test_get_btree_with_other_content_class(self):
+        manager = DBManager(TestRegistryClass)
+        IndexRegistry.get_btree('external_id', BTreeNodeInt, TestRegistryClass)
+
+        with self.assertRaises(IndexRegistryError.IndexOpenedWithOtherContentClass):
+            IndexRegistry.get_btree('external_id', BTreeNodeInt, TestRegistryClass, TestRegistryClass)
+
+        manager.drop()
+
+    def test_get_hash_index_of_a_btree_index(self):
+        manager = DBManager(TestRegistryClass)
+        btree = IndexRegistry.get_btree('external_id', BTreeNodeInt, TestRegistryClass)
+        btree.insert_many([(external_id, external_id + 100) for external_id in range(0, 50)])
+
+        hash_index = IndexRegistry.get_hash_index('external_id', BTreeNodeInt, TestRegistryClass)
+        found_ids = [hash_index.find_first_or_default(external_id) for external_id in range(0, 50)]
+        same_btree = IndexRegistry.get_btree('external_id', BTreeNodeInt, TestRegistryClass)
+
+        manager.drop()
+
+        self.assertEqual(list(range(100, 150)), found_ids)
+        self.assertIs(btree, same_btree)
@@ -0,0 +1,179 @@
+import unittest
+from unittest import mock
+
+from Database.DBData import DBData
+from Database.Index.BTree.BTree import BTree
+from Database.Index.BTree.BTreeNode import BTreeNode50String, BTreeNode50IntString, BTreeNodeInt
+from Database.Index.Lsm import LsmCons
+from Database.Index.Lsm.LsmIndex import LsmIndex
+
+_TEST_BLOCK_SIZE = 2
+
+
+class TestLsmClass(DBData):
+    external_id = 0
+
+    def __init__(self, external_id: int):
+        self.external_id = external_id
+
+
+# Node with integer keys, the blocks of the runs keep two entries
+class BTreeNodeIntLsmTest(BTreeNodeInt):
+    children_ids_size = _TEST_BLOCK_SIZE + 1
+    keys_size = _TEST_BLOCK_SIZE
+    contents_size = _TEST_BLOCK_SIZE
+
+    def __init__(self):
+        self.children_ids = []
+        self.keys = []
+        self.contents = []
+
+
+# The memtable is written in a run every five entries
+@mock.patch.object(LsmCons, 'MEMTABLE_SIZE', 5)
+class LsmIndexTest(unittest.TestCase):
+
+    def test_lsm_index_with_fifty_values(self):
+        lsm_index = LsmIndex('lsm_id', BTreeNodeIntLsmTest, TestLsmClass)
+
+        for x in range(0, 50):
+            lsm_index.insert(x % 10, x)
+
+        lsm_index.compact()
+        contents = [lsm_index.find_contents(key) for key in range(0, 10)]
+        not_found = lsm_index.find_first_or_default(10)
+        runs = len(lsm_index.runs)
+
+        lsm_index.drop()
+
+        self.assertEqual([list(range(key, 50, 10)) for key in range(0, 10)], contents)
+        self.assertIsNone(not_found)
+        self.assertEqual(1, runs)
+
+    def test_lsm_index_insert_and_delete(self):
+        lsm_index = LsmIndex('delete_lsm_id', BTreeNodeIntLsmTest, TestLsmClass)
+        lsm_index.insert_many([(x % 5, x) for x in range(0, 50)])
+
+        deleted = [lsm_index.delete(x % 5, x) for x in range(0, 50, 2)]
+        not_deleted = lsm_index.delete(1, 2)
+        deleted_again = lsm_index.delete(0, 0)
+        contents = lsm_index.find_contents(1)
+        found = lsm_index.find_with_key_and_content(1, 11)
+        deleted_found = lsm_index.find_with_key_and_content(1, 6)
+
+        lsm_index.insert(1, 6)
+        lsm_index.compact()
+        compacted_contents = lsm_index.find_contents(1)
+
+        lsm_index.drop()
+
+        self.assertTrue(all(deleted))
+        self.assertFalse(not_deleted)
+        self.assertFalse(deleted_again)
+        self.assertEqual([1, 11, 21, 31, 41], contents)
+        self.assertEqual(11, found)
+        self.assertIsNone(deleted_found)
+        self.assertEqual([1, 6, 11, 21, 31, 41], compacted_contents)
+
+    def test_lsm_index_find_smallest_and_biggest(self):
+        lsm_index = LsmIndex('order_lsm_id', BTreeNodeIntLsmTest, TestLsmClass)
+        lsm_index.insert_many([(x, x) for x in range(0, 40, 2)])
+        lsm_index.insert_many([(x, x) for x in range(1, 40, 2)])
+
+        for x in range(0, 10):
+            lsm_index.delete(x, x)
+
+        smallest = lsm_index.find_n_smallest(3)
+        smallest_with_offset = lsm_index.find_n_smallest(3, 2)
+        biggest = lsm_index.find_n_biggest(3)
+        biggest_with_offset = lsm_index.find_n_biggest(3, 2)
+        first = lsm_index.find_smallest()
+
+        lsm_index.drop()
+
+        self.assertEqual([10, 11, 12], smallest)
+        self.assertEqual([12, 13, 14], smallest_with_offset)
+        self.assertEqual([39, 38, 37], biggest)
+        self.assertEqual([37, 36, 35], biggest_with_offset)
+        self.assertEqual(10, first)
+
+    def test_lsm_index_compaction_in_background(self):
+        lsm_index = LsmIndex('background_lsm_id', BTreeNodeIntLsmTest, TestLsmClass)
+
+        for x in range(0, 40):
+            lsm_index.insert(x, x)
+            if lsm_index.compaction_thread is not None:
+                lsm_index.compaction_thread.join()
+
+        runs = len(lsm_index.runs)
+        results = [lsm_index.find_first_or_default(x) for x in range(0, 40)]
+
+        lsm_index.drop()
+
+        self.assertLess(runs, LsmCons.COMPACTION_RUNS * 2)
+        self.assertEqual(list(range(0, 40)), results)
+
+    def test_lsm_index_opened_again(self):
+        lsm_index = LsmIndex('reopened_lsm_id', BTreeNodeIntLsmTest, TestLsmClass)
+        lsm_index.insert_many([(x, x) for x in range(0, 23)])
+        lsm_index.delete(3, 3)
+
+        # The last entries are only in the log
+        reopened_index = LsmIndex('reopened_lsm_id', BTreeNodeIntLsmTest, TestLsmClass)
+        results = [reopened_index.find_first_or_default(x) for x in range(0, 23)]
+
+        reopened_index.drop()
+
+        self.assertEqual(list(range(0, 3)) + [None] + list(range(4, 23)), results)
+
+    def test_lsm_index_with_string_values(self):
+        lsm_index = LsmIndex('string_lsm_id', BTreeNode50String, TestLsmClass)
+        lsm_index.insert_many([('name_' + str(x), x) for x in range(0, 30)])
+
+        found = lsm_index.find_first_or_default('name_17')
+        long_key_found = lsm_index.find_first_or_default('name_17' + 'x' * 60)
+        smallest = lsm_index.find_n_smallest(3)
+
+        lsm_index.drop()
+
+        self.assertEqual(17, found)
+        self.assertIsNone(long_key_found)
+        self.assertEqual([0, 1, 10], smallest)
+
+    def test_lsm_index_loads_the_btree_entries(self):
+        btree = BTree('btree_lsm_id', BTreeNodeIntLsmTest, TestLsmClass)
+        btree.insert_many([(x % 10, x) for x in range(0, 30)])
+
+        lsm_index = LsmIndex('btree_lsm_id', BTreeNodeIntLsmTest, TestLsmClass)
+        contents = lsm_index.find_contents(4)
+        biggest = lsm_index.find_n_biggest(2)
+
+        lsm_index.drop()
+        btree.drop()
+
+        self.assertEqual([4, 14, 24], contents)
+        self.assertEqual([29, 19], biggest)
+
+    def test_lsm_index_increment_and_move(self):
+        counts = LsmIndex('increment_lsm_id', BTreeNode50String, TestLsmClass)
+        by_count = LsmIndex('move_lsm_id', BTreeNode50IntString, TestLsmClass)
+
+        for x in range(0, 60):
+            word = 'word_' + str(x % 7)
+            count = counts.increment(word, 1)
+
+            if count is None:
+                by_count.insert(1, word)
+            else:
+                by_count.move(count, count + 1, word)
+
+        found = [counts.find_first_or_default('word_' + str(x)) for x in range(0, 7)]
+        biggest = by_count.find_n_biggest(7)
+        not_moved = by_count.move(100, 101, 'word_0')
+
+        counts.drop()
+        by_count.drop()
+
+        self.assertEqual([9, 9, 9, 9, 8, 8, 8], found)
+        self.assertEqual(['word_3', 'word_2', 'word_1', 'word_0', 'word_6', 'word_5', 'word_4'], biggest)
+        self.assertFalse(not_moved)
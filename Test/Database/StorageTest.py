@@ -0,0 +1,164 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import Database.Cons.StorageTypes as StorageTypes
+import Database.Helpers.DirHelper as DirHelper
+import Database.Helpers.ObjectHelper as ObjectHelper
+from Database.DBData import DBData
+from Database.DBManager import DBManager
+from Database.Error import StorageError
+from Database.Storage.FileStorage import FileStorage
+from Database.Storage.MemoryStorage import MemoryStorage
+from Database.Storage.MmapStorage import MmapStorage
+
+
+class TestStorageClass(DBData):
+    external_id = 0
+
+    def __init__(self, external_id=0):
+        self.external_id = external_id
+
+
+class StorageTest(unittest.TestCase):
+
+    def test_storages_read_and_write_the_same_bytes(self):
+        class_name = ObjectHelper.get_class_name(TestStorageClass)
+        # The dirs are created in the disk, as the file storages need them
+        DirHelper.set_class_storage_type(class_name, StorageTypes.FILE)
+        DirHelper.create_database_directory(class_name)
+        file_name = DirHelper.get_database_file(class_name, 'storage')
+        results = []
+
+        for storage_class in (FileStorage, MmapStorage, MemoryStorage):
+            storage_class.create(file_name)
+            storage = storage_class(file_name)
+
+            empty = storage.read_at(0)
+            storage.write_at(0, b'abcdef')
+            storage.write_at(2, b'XY')
+            position = storage.append(b'gh')
+            storage.write_at(10, b'z')
+            size = storage.size()
+            storage.truncate(4)
+            storage.sync()
+            results.append((empty, position, size, storage.read_at(0), storage.read_at(1, 2), storage.size()))
+
+            storage.close()
+            storage_class.remove(file_name)
+
+        DirHelper.delete_table_directory(class_name)
+
+        for result in results:
+            self.assertEqual((b'', 6, 11, b'abXY', b'bX', 4), result)
+
+    def test_storages_map_the_file_bytes(self):
+        class_name = ObjectHelper.get_class_name(TestStorageClass)
+        DirHelper.set_class_storage_type(class_name, StorageTypes.FILE)
+        DirHelper.create_database_directory(class_name)
+        file_name = DirHelper.get_database_file(class_name, 'storage')
+        results = []
+
+        for storage_class in (FileStorage, MmapStorage, MemoryStorage):
+            storage_class.create(file_name)
+            empty = bytes(storage_class.map(file_name))
+
+            storage = storage_class(file_name)
+            storage.write_at(0, b'abcdef')
+            storage.close()
+
+            buffer = storage_class.map(file_name)
+            results.append((empty, bytes(buffer[:]), bytes(memoryview(buffer)[2:4])))
+
+            del buffer
+            storage_class.remove(file_name)
+
+        DirHelper.delete_table_directory(class_name)
+
+        for result in results:
+            self.assertEqual((b'', b'abcdef', b'cd'), result)
+
+    def test_mmap_storage_grows_the_map_in_chunks(self):
+        class_name = ObjectHelper.get_class_name(TestStorageClass)
+        DirHelper.set_class_storage_type(class_name, StorageTypes.FILE)
+        DirHelper.create_database_directory(class_name)
+        file_name = DirHelper.get_database_file(class_name, 'storage')
+        MmapStorage.create(file_name)
+
+        storage = MmapStorage(file_name)
+        mapped_sizes = set()
+        for x in range(0, 1000):
+            storage.append(bytes([x % 256]) * 100)
+            mapped_sizes.add(len(storage.mapped))
+
+        size = storage.size()
+        last_bytes = storage.read_at(size - 150)
+        storage.sync()
+        synced_file_size = os.path.getsize(file_name)
+        storage.append(b'end')
+        storage.close()
+        closed_file_size = os.path.getsize(file_name)
+
+        reopened_storage = MmapStorage(file_name)
+        reopened = (reopened_storage.size(), reopened_storage.read_at(100000, 100), reopened_storage.read_at(100000))
+        reopened_storage.close()
+        MmapStorage.remove(file_name)
+        DirHelper.delete_table_directory(class_name)
+
+        self.assertLess(len(mapped_sizes), 5)
+        self.assertEqual(100000, size)
+        self.assertEqual(bytes([230]) * 50 + bytes([231]) * 100, last_bytes)
+        self.assertEqual(100000, synced_file_size)
+        self.assertEqual(100003, closed_file_size)
+        self.assertEqual((100003, b'end', b'end'), reopened)
+
+    def test_mmap_storage_size_after_the_process_exits_without_close(self):
+        class_name = ObjectHelper.get_class_name(TestStorageClass)
+        DirHelper.set_class_storage_type(class_name, StorageTypes.FILE)
+        DirHelper.create_database_directory(class_name)
+        file_name = DirHelper.get_database_file(class_name, 'storage')
+        MmapStorage.create(file_name)
+
+        # The other process writes in the file and exits without closing it
+        script = 'import Database.Helpers.FileHandleHelper as FileHandleHelper\n' \
+                 'FileHandleHelper.get_file(%r).write_at(0, b"abc")\n' % file_name
+        environment = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        environment[StorageTypes.STORAGE_TYPE_VARIABLE] = StorageTypes.MMAP
+        subprocess.run([sys.executable, '-c', script], env=environment, check=True)
+
+        file_size = os.path.getsize(file_name)
+        storage = MmapStorage(file_name)
+        reopened = (storage.size(), storage.read_at(0))
+        storage.close()
+        MmapStorage.remove(file_name)
+        DirHelper.delete_table_directory(class_name)
+
+        self.assertEqual(3, file_size)
+        self.assertEqual((3, b'abc'), reopened)
+
+    def test_table_with_memory_storage(self):
+        class_name = ObjectHelper.get_class_name(TestStorageClass)
+        DirHelper.set_class_storage_type(class_name, StorageTypes.MEMORY)
+        manager = DBManager(TestStorageClass)
+
+        for external_id in range(0, 10):
+            manager.save(TestStorageClass(external_id))
+
+        deleted = manager.find_by_id(3)
+        manager.delete(deleted)
+        found = [obj.external_id if obj else None for obj in map(DBManager(TestStorageClass).find_by_id, range(0, 10))]
+        in_disk = os.path.exists(DirHelper.get_class_database_dir(class_name))
+
+        manager.drop()
+        after_drop = DBManager(TestStorageClass).find_by_id(0)
+        DBManager(TestStorageClass).drop()
+        DirHelper.set_class_storage_type(class_name, StorageTypes.FILE)
+
+        self.assertEqual([0, 1, 2, None, 4, 5, 6, 7, 8, 9], found)
+        self.assertFalse(in_disk)
+        self.assertIsNone(after_drop)
+
+    def test_unknown_storage_type(self):
+        with self.assertRaises(StorageError.UnknownStorageType):
+            DirHelper.set_class_storage_type(ObjectHelper.get_class_name(TestStorageClass), 'tape')
@@ -1,5 +1,8 @@
+import io
+import struct
 import unittest
 import Test.Helpers.ObjectHelperTest as ObjectHelperTest
+import Database.Helpers.ObjectReadWriteHelper as ObjectReadWriteHelper
 from Database.Cons import SupportedTypes
 
 from Database.DBData import DBData
@@ -49,6 +52,20 @@ class TestComplexTypeClass(DBData):
         self.list_string = list_string
 
 
+class TestListTypeClass(DBData):
+    list_float = []
+    list_float_size = 4
+    list_float_type = SupportedTypes.FLOAT_NAME
+
+    list_bool = []
+    list_bool_size = 3
+    list_bool_type = SupportedTypes.BOOL_NAME
+
+    def set_new_values(self, list_float: list, list_bool: list):
+        self.list_float = list_float
+        self.list_bool = list_bool
+
+
 class TableManagerTest(unittest.TestCase):
 
     def test_save_primitive_class_one(self):
@@ -181,6 +198,83 @@ class TableManagerTest(unittest.TestCase):
         self.assertEqual(obj2_l, None)
         self.assertTrue(ObjectHelperTest.compare_objs(obj3_l, obj3))
 
+    # More records than the ones read at a time, so the table is read in more than one block
+    def test_find_all_primitive_type_class(self):
+        manager = DBManager(TestPrimitiveTypeClass)
+        objs = []
+
+        for number in range(5000):
+            obj = TestPrimitiveTypeClass()
+            obj.set_new_values(number, number % 2 == 0, number / 2)
+            manager.save(obj)
+            objs.append(obj)
+
+        manager.delete(objs[0])
+        manager.delete(objs[4100])
+
+        objs_l = list(manager.find_all())
+
+        manager.drop()
+
+        expected = objs[1:4100] + objs[4101:]
+        self.assertEqual([obj.id for obj in expected], [obj.id for obj in objs_l])
+        self.assertTrue(all(ObjectHelperTest.compare_objs(obj_l, obj) for obj_l, obj in zip(objs_l, expected)))
+        self.assertTrue(all(obj_l.saved for obj_l in objs_l))
+
+    # The saved objects are updated and the new ones get the next ids, in the order of the list
+    def test_save_many_primitive_type_class(self):
+        manager = DBManager(TestPrimitiveTypeClass)
+        objs = []
+
+        for number in range(6):
+            obj = TestPrimitiveTypeClass()
+            obj.set_new_values(number, number % 2 == 0, number / 2)
+            objs.append(obj)
+
+        manager.save(objs[0])
+        manager.save(objs[1])
+        objs[1].int_number = 100
+
+        manager.save_many([objs[2], objs[1], objs[3]])
+        objs[3].float_number = 7.5
+        manager.save_many([objs[3], objs[4], objs[5]])
+
+        objs_l = list(manager.find_all())
+
+        manager.drop()
+
+        self.assertEqual([0, 1, 2, 3, 4, 5], [obj.id for obj in objs])
+        self.assertTrue(all(ObjectHelperTest.compare_objs(obj_l, obj) for obj_l, obj in zip(objs_l, objs)))
+        self.assertEqual(6, len(objs_l))
+
+    # Objects with the next ids are written after the file end, writing them again changes nothing
+    def test_save_many_with_next_ids(self):
+        manager = DBManager(TestPrimitiveTypeClass)
+        first = TestPrimitiveTypeClass()
+        first.set_new_values(1, True, 1.0)
+        manager.save(first)
+        objs = []
+
+        for obj_id in (3, 1, 2):
+            obj = TestPrimitiveTypeClass()
+            obj.set_new_values(obj_id * 10, False, obj_id / 4)
+            obj.id = obj_id
+            obj.saved = True
+            objs.append(obj)
+
+        next_id = manager.get_next_id()
+        manager.save_many(objs)
+        manager.save_many(objs)
+        after_id = manager.get_next_id()
+        objs_l = list(manager.find_all())
+
+        manager.drop()
+
+        self.assertEqual((1, 4), (next_id, after_id))
+        self.assertEqual([0, 1, 2, 3], [obj.id for obj in objs_l])
+        self.assertTrue(all(ObjectHelperTest.compare_objs(obj_l, obj)
+                            for obj_l, obj in zip(objs_l, [first, objs[1], objs[2], objs[0]])))
+
     def test_primitive_class_update(self):
         manager = DBManager(TestPrimitiveTypeClass)
 
@@ -415,6 +509,41 @@ class TableManagerTest(unittest.TestCase):
         self.assertEqual(obj1_r_l, None)
         self.assertEqual(obj4_r_l, None)
 
+    def test_save_float_and_bool_lists(self):
+        manager = DBManager(TestListTypeClass)
+
+        obj1 = TestListTypeClass()
+        obj1.set_new_values([1.5, -2.25, 0.0, 1e300], [True, False, True])
+
+        obj2 = TestListTypeClass()
+        obj2.set_new_values([3.5], [])
+
+        manager.save(obj1)
+        manager.save(obj2)
+
+        obj1_l = manager.find_by_id(obj1.id)
+        obj2_l = manager.find_by_id(obj2.id)
+
+        manager.drop()
+
+        self.assertTrue(ObjectHelperTest.compare_objs(obj1_l, obj1))
+        self.assertTrue(ObjectHelperTest.compare_objs(obj2_l, obj2))
+
+    # The lists are written with a single write, in the same format of the values written one by one
+    def test_record_format_of_lists_and_strings(self):
+        obj = TestComplexTypeClass()
+        obj.set_new_values(7, True, 0.5, 'abc', [1, 2, 3], ['de', 'fghijklmnopq'])
+        record = io.BytesIO()
+
+        ObjectReadWriteHelper.write_obj(record, obj, TestComplexTypeClass)
+
+        expected = struct.pack('b', True) + struct.pack('b', True) + struct.pack('d', 0.5) + struct.pack('q', -1) \
+            + struct.pack('q', 7) + struct.pack('q', 3) + struct.pack('3q', 1, 2, 3) + bytes(8 * 6) \
+            + struct.pack('q', 0) + struct.pack('q', 2) + b'de'.ljust(10, b'\0') + b'fghijklmno' + bytes(30) \
+            + struct.pack('b', False) + b'abc'.ljust(10, b'\0')
+
+        self.assertEqual(expected, record.getvalue())
+
 
 if __name__ == '__main__':
     unittest.main()
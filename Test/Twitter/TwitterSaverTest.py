@@ -1,8 +1,10 @@
 import unittest
+from unittest import mock
 
 from Data.Twitter import Tweet, Hashtag, User
 from Database.Cons import Values
 from Database.DBManager import DBManager
+from Twitter import TwitterStreamer
 from Twitter.TwitterStreamer import AnalitycalTwitterStreamer
 from Core import NaturalLanguage
 from unidecode import unidecode
@@ -80,11 +82,13 @@ class TwitterSaverTest(unittest.TestCase):
         tweet_5 = JsonTweet(1818391, "Gosto de hashtags #TrumpAlgumaCoisa #ObamaAlgumaCoisa #LulaLivre #Dilma #Temer",
                             user_5, entities_5)
 
-        AnalitycalTwitterStreamer.on_success(None, tweet_1.__dict__)
-        AnalitycalTwitterStreamer.on_success(None, tweet_2.__dict__)
-        AnalitycalTwitterStreamer.on_success(None, tweet_3.__dict__)
-        AnalitycalTwitterStreamer.on_success(None, tweet_4.__dict__)
-        AnalitycalTwitterStreamer.on_success(None, tweet_5.__dict__)
+        # Without a preprocessor each tweet is saved when it is received
+        streamer = AnalitycalTwitterStreamer('app_key', 'app_secret', 'oauth_token', 'oauth_token_secret')
+        streamer.on_success(tweet_1.__dict__)
+        streamer.on_success(tweet_2.__dict__)
+        streamer.on_success(tweet_3.__dict__)
+        streamer.on_success(tweet_4.__dict__)
+        streamer.on_success(tweet_5.__dict__)
 
         # Get Tweet in basic find mode
         tweetdb1 = Tweet.load(0)
@@ -253,6 +257,26 @@ class TwitterSaverTest(unittest.TestCase):
         manager = DBManager(User)
         manager.drop()
 
+    def test_streamer_saves_the_batch_when_full_or_after_the_batch_time(self):
+        streamer = AnalitycalTwitterStreamer('app_key', 'app_secret', 'oauth_token', 'oauth_token_secret')
+        streamer.batch_size = 3
+        saved_batches = []
+
+        def save_pending():
+            saved_batches.append([data['id'] for data in streamer.pending_data])
+            streamer.pending_data = []
+
+        streamer.save_pending = save_pending
+        clock = mock.Mock(return_value=0)
+
+        with mock.patch.object(TwitterStreamer, 'time', mock.Mock(time=clock)):
+            for tweet_id, received_time in enumerate([0, 1, 2, 10, 10 + TwitterStreamer.BATCH_TIME, 50]):
+                clock.return_value = received_time
+                streamer.on_success({'id': tweet_id})
+
+        self.assertEqual([[0, 1, 2], [3, 4]], saved_batches)
+        self.assertEqual([{'id': 5}], streamer.pending_data)
+
 
 
 
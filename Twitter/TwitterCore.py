@@ -1,9 +1,11 @@
 from requests.exceptions import ChunkedEncodingError
 from twython import Twython
 
+from Core.Preprocessing import TextPreprocessor
+from Core.StopRequest import StopRequest
 from Database.DBData import DBData
 from Database.DBManager import DBManager
-from Database.Index.BTree.BTree import BTree
+from Database.Index import IndexRegistry
 from Database.Index.BTree.BTreeNode import BTreeNode50String
 from Twitter.TwitterCredentials import Credentials
 from Twitter.TwitterStreamer import AnalitycalTwitterStreamer
@@ -24,7 +26,7 @@ class TwitterCore(DBData):
                                                         credentials.access_token, credentials.access_secret)
 
     def start_with(self, id_name):
-        bt_data_name = BTree('twitter_core_data_name', BTreeNode50String, TwitterCore, TwitterCore)
+        bt_data_name = IndexRegistry.get_btree('twitter_core_data_name', BTreeNode50String, TwitterCore, TwitterCore)
         saved_data = bt_data_name.find_first_or_default(id_name)
 
         if saved_data is not None:
@@ -58,9 +60,26 @@ class TwitterCore(DBData):
 
         return dict_
 
-    def stream(self, tweet_track, tweet_language):
+    # With more than one worker the tweets are saved in batches, their texts filtered in the workers
+    def stream(self, tweet_track, tweet_language, workers=1):
+        preprocessor = None
+
+        if workers > 1:
+            preprocessor = TextPreprocessor(workers)
+            self.twitter_stream.use_preprocessor(preprocessor)
+
         try:
-            self.twitter_stream.statuses.filter(track=tweet_track, language=tweet_language)
+            # SIGINT and SIGTERM stop the stream in the next tweet received
+            with StopRequest() as stop_request:
+                self.twitter_stream.use_stop_request(stop_request)
+                self.twitter_stream.statuses.filter(track=tweet_track, language=tweet_language)
         except ChunkedEncodingError:
             print("Perda de conexão com o servidor")
+        finally:
+            # The tweets received are saved however the stream stops
+            try:
+                self.twitter_stream.save_pending()
+            finally:
+                if preprocessor is not None:
+                    preprocessor.close()
 
@@ -1,134 +1,185 @@
-import msvcrt
+import time
+from collections import Counter
 
 from twython import TwythonStreamer
 
+from Core.Preprocessing import TextPreprocessor
+from Core.StopRequest import StopRequest
 from Data.Twitter import Hashtag
 from Data.Twitter import Tweet
 from Data.Twitter import User
 from Database.DBManager import DBManager
-from Database.Index.BTree.BTree import BTree
+from Database.Index import IndexRegistry
 from Database.Index.BTree.BTreeNode import BTreeNodeInt, BTreeNodeFloat, BTreeNode50String, BTreeNode50IntString
 from Twitter import TwitterCore
 
+# Seconds the first tweet of a batch waits for the batch to be full, after them the batch is saved with the next tweet
+BATCH_TIME = 30
+
 
 class AnalitycalTwitterStreamer(TwythonStreamer):
     core_id = 0
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Tweets received and not saved yet, they are saved together when the batch is full or its batch time passed
+        self.pending_data = []
+        self.batch_size = 1
+        # Time when the first tweet of the batch was received
+        self.batch_start_time = None
+        # Filters the texts of a batch in worker processes, if not given each text is filtered when it is received
+        self.preprocessor = None
+        # Asks to stop the stream, after saving the tweets received
+        self.stop_request = None
+
+    # Filter the texts of the batch in the workers of the preprocessing
+    def use_preprocessor(self, preprocessor: TextPreprocessor):
+        self.preprocessor = preprocessor
+        self.batch_size = preprocessor.workers * preprocessor.chunk_size
+
     def on_success(self, data):
-        tweet = Tweet()
-        success = tweet.set(data)
-        ignore = False
+        if not self.pending_data:
+            self.batch_start_time = time.time()
 
-        if success:
-            try:
-                print("Saving tweet: " + tweet.text)
-            except OSError:
-                ignore = True
-
-            if tweet.find_self() is None and not ignore:
-                user = User()
-                success = user.set(data['user'])
-                hashtags = []
-                if success:
-                    user.find_self()
-                    user.db_save()
-
-                    for hashtag_data in data['entities']['hashtags']:
-                        hashtag = Hashtag()
-                        success = hashtag.set(hashtag_data)
-                        if success:
-                            hashtags.append(hashtag)
-                            if hashtag.find_self() is None:
-                                hashtag.db_save()
-
-                    tweet.set_hashtags(hashtags)
-                    tweet.set_user(user)
-                    tweet.infer()
-                    tweet.db_save()
-
-                    dbm = DBManager(TwitterCore.TwitterCore)
-                    core = dbm.find_by_id(self.core_id)
-                    core.tweets = core.tweets + 1
-
-                    if tweet.negative:
-                        core.negative_count = core.negative_count + 1
-                    else:
-                        core.positive_count = core.positive_count + 1
-
-                    dbm.save(core)
-
-                    bt_core_tweets = BTree('twitter_core_tweets', BTreeNodeInt, TwitterCore, Tweet)
-                    bt_core_tweets.insert(core.id, tweet.id)
-
-                    bt_core_tweets.insert(core.id, tweet.id)
-
-                    if tweet.negative:
-                        bt_core_most_negative = BTree('twitter_core_most_negative_' + core.data_name,
-                                                  BTreeNodeFloat, TwitterCore, Tweet)
-
-                        bt_core_most_negative.insert(tweet.negative_score, tweet.id)
-
-                    else:
-                        bt_core_most_positive = BTree('twitter_core_most_positive_' + core.data_name,
-                                                  BTreeNodeFloat, TwitterCore, Tweet)
-
-                        bt_core_most_positive.insert(tweet.positive_score, tweet.id)
-
-                    words = tweet.get_filtered_words()
-
-                    if tweet.negative:
-                        bt_core_most_negative_words_main = BTree('bt_core_most_negative_words_main_' + core.data_name,
-                                                                 BTreeNode50String, TwitterCore)
-                        bt_core_most_negative_words = BTree('bt_core_most_negative_words' + core.data_name,
-                                                            BTreeNode50IntString, TwitterCore)
-
-                        for word in words:
-                            negative_count = bt_core_most_negative_words_main.find_first_or_default(word)
-
-                            if negative_count is not None:
-                                bt_core_most_negative_words.delete(negative_count, word)
-                                bt_core_most_negative_words.insert(negative_count + 1, word)
-                                bt_core_most_negative_words_main.delete(word, negative_count)
-                                bt_core_most_negative_words_main.insert(word, negative_count + 1)
-                            else:
-                                bt_core_most_negative_words_main.insert(word, 1)
-                                bt_core_most_negative_words.insert(1, word)
-
-                    else:
-                        bt_core_most_positive_words_main = BTree('bt_core_most_positive_words_main_' + core.data_name,
-                                                                 BTreeNode50String, TwitterCore)
-                        bt_core_most_positive_words = BTree('bt_core_most_positive_words' + core.data_name,
-                                                            BTreeNode50IntString, TwitterCore)
-
-                        for word in words:
-                            positive_count = bt_core_most_positive_words_main.find_first_or_default(word)
-
-                            if positive_count is not None:
-                                bt_core_most_positive_words.delete(positive_count, word)
-                                bt_core_most_positive_words.insert(positive_count + 1, word)
-                                bt_core_most_positive_words_main.delete(word, positive_count)
-                                bt_core_most_positive_words_main.insert(word, positive_count + 1)
-                            else:
-                                bt_core_most_positive_words_main.insert(word, 1)
-                                bt_core_most_positive_words.insert(1, word)
-
-                    for hashtag in hashtags:
-                        hashtag.add_tweet(tweet)
+        self.pending_data.append(data)
+
+        if len(self.pending_data) >= self.batch_size or time.time() - self.batch_start_time >= BATCH_TIME:
+            self.save_pending()
 
         if self.verify_end_option():
+            self.save_pending()
             self.disconnect()
 
+    # Save the tweets received since the last batch, in the order they were received
+    def save_pending(self):
+        pending_data = self.pending_data
+        self.pending_data = []
+
+        if not pending_data:
+            return
+
+        if self.preprocessor is not None:
+            filtered_texts = self.preprocessor.filter_texts(data.get('text', '') for data in pending_data)
+        else:
+            filtered_texts = [None] * len(pending_data)
+
+        tweets = []
+
+        for data, filtered_text in zip(pending_data, filtered_texts):
+            tweet = Tweet()
+
+            if tweet.set(data, filtered_text):
+                tweets.append((data, tweet))
+
+        # The emotions of the batch are inferred together
+        Tweet.infer_many([tweet for _, tweet in tweets])
+
+        for data, tweet in tweets:
+            self.save_tweet(data, tweet)
+
+    # Save the tweet and its user, hashtags and indexes, its emotion must be already inferred
+    def save_tweet(self, data, tweet: Tweet):
+        ignore = False
+
+        try:
+            print("Saving tweet: " + tweet.text)
+        except OSError:
+            ignore = True
+
+        if tweet.find_self() is None and not ignore:
+            user = User()
+            success = user.set(data['user'])
+            hashtags = []
+            if success:
+                user.find_self()
+                user.db_save()
+
+                for hashtag_data in data['entities']['hashtags']:
+                    hashtag = Hashtag()
+                    success = hashtag.set(hashtag_data)
+                    if success:
+                        hashtags.append(hashtag)
+                        if hashtag.find_self() is None:
+                            hashtag.db_save()
+
+                tweet.set_hashtags(hashtags)
+                tweet.set_user(user)
+                tweet.db_save()
+
+                dbm = DBManager(TwitterCore.TwitterCore)
+                core = dbm.find_by_id(self.core_id)
+                core.tweets = core.tweets + 1
+
+                if tweet.negative:
+                    core.negative_count = core.negative_count + 1
+                else:
+                    core.positive_count = core.positive_count + 1
+
+                dbm.save(core)
+
+                bt_core_tweets = IndexRegistry.get_btree('twitter_core_tweets', BTreeNodeInt, TwitterCore, Tweet)
+                bt_core_tweets.insert(core.id, tweet.id)
+
+                bt_core_tweets.insert(core.id, tweet.id)
+
+                if tweet.negative:
+                    bt_core_most_negative = IndexRegistry.get_btree('twitter_core_most_negative_' + core.data_name,
+                                                                  BTreeNodeFloat, TwitterCore, Tweet)
+
+                    bt_core_most_negative.insert(tweet.negative_score, tweet.id)
+
+                else:
+                    bt_core_most_positive = IndexRegistry.get_btree('twitter_core_most_positive_' + core.data_name,
+                                                                  BTreeNodeFloat, TwitterCore, Tweet)
+
+                    bt_core_most_positive.insert(tweet.positive_score, tweet.id)
+
+                words = tweet.get_filtered_words()
+
+                if tweet.negative:
+                    bt_core_most_negative_words_main = IndexRegistry.get_lsm_index(
+                        'bt_core_most_negative_words_main_' + core.data_name, BTreeNode50String, TwitterCore)
+                    bt_core_most_negative_words = IndexRegistry.get_lsm_index(
+                        'bt_core_most_negative_words' + core.data_name, BTreeNode50IntString, TwitterCore)
+
+                    self.add_word_counts(words, bt_core_most_negative_words_main, bt_core_most_negative_words)
+
+                else:
+                    bt_core_most_positive_words_main = IndexRegistry.get_lsm_index(
+                        'bt_core_most_positive_words_main_' + core.data_name, BTreeNode50String, TwitterCore)
+                    bt_core_most_positive_words = IndexRegistry.get_lsm_index(
+                        'bt_core_most_positive_words' + core.data_name, BTreeNode50IntString, TwitterCore)
+
+                    self.add_word_counts(words, bt_core_most_positive_words_main, bt_core_most_positive_words)
+
+                for hashtag in hashtags:
+                    hashtag.add_tweet(tweet)
+
+    # Add the uses of the words in the count trees: word -> count and count -> word
+    # The count of the word is incremented and the word moves to the new count
+    @staticmethod
+    def add_word_counts(words, bt_words_main, bt_words):
+        for word, uses in Counter(words).items():
+            count = bt_words_main.increment(word, uses)
+
+            if count is not None:
+                bt_words.move(count, count + uses, word)
+            else:
+                bt_words.insert(uses, word)
+
     def on_error(self, status_code, data):
         print(status_code, data)
+        self.save_pending()
         self.disconnect()
 
     def on_timeout(self):
         print('Connection timeout')
+        self.save_pending()
         self.disconnect()
 
-    def verify_end_option(self) -> bool:
-        if msvcrt.kbhit():
-            if msvcrt.getch() == b'c' or msvcrt.getch() == b'C':
-                return True
+    # Stop the stream when the request is asked
+    def use_stop_request(self, stop_request: StopRequest):
+        self.stop_request = stop_request
 
-        return False
+    def verify_end_option(self) -> bool:
+        return self.stop_request is not None and self.stop_request.is_requested()